@@ -0,0 +1,198 @@
+"""Testcases for css_parser.cascade."""
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import operator
+import xml.etree.ElementTree as ET
+from . import basetest
+import css_parser
+from css_parser.cascade import Cascade, ComputedStyle
+from css_parser.selectormatch import ElementTreeAdapter
+
+
+class CascadeTestCase(basetest.BaseTestCase):
+
+    def setUp(self):
+        super(CascadeTestCase, self).setUp()
+        self.root = ET.fromstring(
+            '<div id="d"><p class="a">1</p><p class="a" style="color: red; '
+            'margin: 0 !important">2</p><p>3</p></div>')
+        self.adapter = ElementTreeAdapter(self.root)
+
+    def _values(self, cascade, element, pseudoElement=None):
+        return dict((name, property.value) for name, property
+                    in cascade.style(element, pseudoElement).items())
+
+    def test_style(self):
+        "Cascade.style()"
+        sheet = css_parser.parseString('''
+            p { color: blue; margin: 1px; padding: 1px }
+            #d .a { color: green }
+            .a { color: yellow; padding: 2px !important }
+            p { padding: 3px; margin: 2px !important }
+            p.a::before { content: "x" }
+            ''')
+        cascade = Cascade(self.adapter, [sheet])
+        p1, p2, p3 = self.root
+        self.assertEqual({'color': 'green', 'margin': '2px',
+                          'padding': '2px'}, self._values(cascade, p1))
+        # style attribute wins except over important
+        self.assertEqual({'color': 'red', 'margin': '0',
+                          'padding': '2px'}, self._values(cascade, p2))
+        self.assertEqual({'color': 'blue', 'margin': '2px',
+                          'padding': '3px'}, self._values(cascade, p3))
+        self.assertEqual({'content': '"x"'},
+                         self._values(cascade, p1, '::before'))
+        self.assertEqual({}, self._values(cascade, self.root))
+        self.assertEqual(['p', '#d .a', '.a', 'p'],
+                         [i.selector.selectorText
+                          for i in cascade.matching(p1)])
+
+        # memoized by matched rules and style attribute
+        self.assertEqual(cascade.style(p1)['color'],
+                         cascade.style(p1)['color'])
+        self.assertEqual(5, len(cascade._resolved))
+
+    def test_shorthands(self):
+        "Cascade.style() does not expand shorthands"
+        sheet = css_parser.parseString('''
+            div { font: 12px serif }
+            p { margin-left: 5px; font-size: 2em }
+            p { margin: 0 }
+            ''')
+        cascade = Cascade(self.adapter, [sheet])
+        p = self.root[2]
+        self.assertEqual({'margin-left': '5px', 'margin': '0',
+                          'font-size': '2em'}, self._values(cascade, p))
+        style = cascade.computedStyle(p)
+        self.assertEqual(['font', 'font-size', 'margin', 'margin-left'],
+                         sorted(style))
+        self.assertEqual('12px serif', style['font'].value)
+
+    def test_origins(self):
+        "Cascade.addSheet(origin=...)"
+        ua = css_parser.parseString('p { color: black !important; '
+                                    'margin: 1px }')
+        user = css_parser.parseString('p { color: gray; margin: 2px '
+                                      '!important }')
+        author = css_parser.parseString('p { color: blue; margin: 3px '
+                                        '!important }')
+        cascade = Cascade(self.adapter)
+        cascade.addSheet(author)
+        cascade.addSheet(ua, origin='user-agent')
+        cascade.addSheet(user, origin='user')
+        self.assertEqual({'color': 'black', 'margin': '2px'},
+                         self._values(cascade, self.root[2]))
+        self.assertRaises(ValueError, cascade.addSheet, author, 'x')
+
+    def test_medium(self):
+        "Cascade(medium=...)"
+        sheet = css_parser.parseString('''
+            p { color: red }
+            @media print { p { color: blue } }
+            @media not print, (min-width: 1em) { p { margin: 0 } }
+            @media only screen and (color) { p { padding: 0 } }
+            ''')
+        p = self.root[2]
+        self.assertEqual({'color': 'blue', 'margin': '0', 'padding': '0'},
+                         self._values(Cascade(self.adapter, [sheet]), p))
+        self.assertEqual({'color': 'blue', 'margin': '0'},
+                         self._values(Cascade(self.adapter, [sheet],
+                                              medium='print'), p))
+        self.assertEqual({'color': 'red', 'margin': '0', 'padding': '0'},
+                         self._values(Cascade(self.adapter, [sheet],
+                                              medium='screen'), p))
+
+    def test_computedStyle(self):
+        "Cascade.computedStyle()"
+        sheet = css_parser.parseString('''
+            div { color: green; margin: 1px; font-size: 2em }
+            .a { font-size: inherit; margin: inherit }
+            p { color: unset }
+            p::before { color: blue }
+            ''')
+        cascade = Cascade(self.adapter, [sheet])
+        div = self.root
+        p1, p2, p3 = div
+        divStyle = cascade.computedStyle(div)
+        self.assertTrue(isinstance(divStyle, ComputedStyle))
+        self.assertEqual(None, divStyle.parent)
+        style = cascade.computedStyle(p1, divStyle)
+        self.assertEqual(divStyle, style.parent)
+        self.assertEqual(['color', 'font-size', 'margin'], sorted(style))
+        self.assertTrue(style['color'] is divStyle['color'])
+        self.assertEqual('1px', style['margin'].value)
+        self.assertEqual('2em', style['font-size'].value)
+        self.assertRaises(TypeError, operator.setitem, style, 'color', None)
+
+        style = cascade.computedStyle(p3)
+        self.assertEqual(['color', 'font-size'], sorted(style))
+        self.assertEqual('blue', cascade.computedStyle(
+            p3, pseudoElement='::before')['color'].value)
+
+        # shared by elements with the same rules and parent style
+        self.assertEqual(4, cascade.cacheMisses)
+        self.assertTrue(cascade.computedStyle(p1, divStyle) is
+                        cascade.computedStyle(p1))
+        self.assertTrue(cascade.computedStyle(p3, divStyle) is style)
+        self.assertEqual(4, cascade.cacheMisses)
+
+        other = ComputedStyle({}, None)
+        self.assertFalse(cascade.computedStyle(p3, other) is style)
+
+        cascade = Cascade(self.adapter, [sheet], cacheSize=1)
+        first = cascade.computedStyle(p3, divStyle)
+        cascade.computedStyle(p3, other)
+        self.assertFalse(first is cascade.computedStyle(p3, divStyle))
+        # the memos are limited too
+        for element in div:
+            cascade.computedStyle(element, divStyle)
+        self.assertEqual([1, 1, 1], [len(cascade._cache),
+                                     len(cascade._resolved),
+                                     len(cascade._inline)])
+        cascade.clearCache()
+        self.assertEqual([0, 0, 0], [len(cascade._cache),
+                                     len(cascade._resolved),
+                                     len(cascade._inline)])
+        cascade = Cascade(self.adapter, [sheet], cacheSize=0)
+        self.assertFalse(cascade.computedStyle(p3, divStyle) is
+                         cascade.computedStyle(p3, divStyle))
+        self.assertEqual(0, cascade.cacheHits + cascade.cacheMisses)
+
+    def test_walk(self):
+        "Cascade.walk()"
+        root = ET.fromstring(
+            '<body><div class="n"><p>1</p><ul><li><p>2</p></li></ul></div>'
+            '<p class="x">3</p></body>')
+        adapter = ElementTreeAdapter(root)
+        sheet = css_parser.parseString('''
+            body { color: red }
+            .n p { color: green }
+            .n > * p { margin: 0 }
+            div + p { color: blue }
+            ''')
+        cascade = Cascade(adapter, [sheet])
+        walked = list(cascade.walk(root))
+        self.assertEqual(list(root.iter()), [e for e, style in walked])
+        self.assertEqual(['red', 'red', 'green', 'red', 'red', 'green',
+                          'blue'],
+                         [style['color'].value for e, style in walked])
+        self.assertEqual(['p'], [adapter.tag(e) for e, style in walked
+                                 if 'margin' in style])
+        # parent styles are reused
+        self.assertTrue(walked[1][1].parent is walked[0][1])
+
+        other = Cascade(adapter, [sheet])
+        for element, style in walked:
+            self.assertEqual(dict(other.computedStyle(element)), dict(style))
+
+        # a subtree
+        li = root[0][1][0]
+        self.assertEqual([('li', 'red'), ('p', 'green')],
+                         [(adapter.tag(e), style['color'].value)
+                          for e, style in other.walk(li)])
+
+
+if __name__ == '__main__':
+    import unittest
+    unittest.main()
@@ -168,6 +168,30 @@ class CSSStyleRuleTestCase(test_cssrule.CSSRuleTestCase):
         self.do_raise_r(tests)  # set cssText
         css_parser.ser.prefs.useDefaults()
 
+    def test_setTokens(self):
+        "CSSStyleRule._setTokens() of sheet tokens"
+        tokenizer = css_parser.tokenize2.Tokenizer()
+        tests = {
+            'a { color: red; top: 0 !important; }': None,
+            'a { color: red': None,
+            'a { b: "x;" d; e: url(x;) }': None,
+            '[x="{"] { b: 1 }': None,
+            'a;': xml.dom.SyntaxErr,
+            'a, { b: 1 }': xml.dom.SyntaxErr,
+        }
+        for css, error in tests.items():
+            r = css_parser.css.CSSStyleRule()
+            # tokens of a single rule as collected by a sheet
+            tokens = tokenizer.tokenize(css, fullsheet=True)
+            tokens = r._tokensupto2(tokens, next(tokens))
+            if error:
+                self.assertRaises(error, r._setTokens, tokens)
+            else:
+                r._setTokens(tokens)
+                exp = css_parser.css.CSSStyleRule()
+                exp.cssText = tokens
+                self.assertEqual(exp.cssText, r.cssText)
+
     def test_selectorList(self):
         "CSSStyleRule.selectorList"
         r = css_parser.css.CSSStyleRule()
@@ -3,6 +3,7 @@
 
 from __future__ import absolute_import
 from __future__ import unicode_literals
+import io
 import xml.dom
 from . import basetest
 import css_parser.css
@@ -301,6 +302,31 @@ x|test {
         self.assertEqual('utf-8', self.s.encoding)
         self.assertEqual(1, self.s.cssRules.length)
 
+    def test_writeTo(self):
+        "CSSStyleSheet.writeTo()"
+        tests = (
+            '',
+            '/* € */ a { color: red } @media print { b { top: 0 } }',
+            '@charset "ascii"; a { content: "\xe4€" } b { top: 0 }',
+            '@charset "utf-16"; a { content: "\xe4" } b { top: 0 }',
+        )
+        for css in tests:
+            for prefs in ({}, {'lineNumbers': True},
+                          {'linesAfterRules': '\n'}):
+                css_parser.ser.prefs.useDefaults()
+                for pref, value in prefs.items():
+                    setattr(css_parser.ser.prefs, pref, value)
+                s = css_parser.parseString(css)
+                fp = io.BytesIO()
+                s.writeTo(fp)
+                self.assertEqual(s.cssText, fp.getvalue(), (css, prefs))
+        css_parser.ser.prefs.useDefaults()
+
+        # not kept by the rules
+        s = css_parser.parseString('a { color: red }')
+        s.writeTo(io.BytesIO())
+        self.assertEqual(None, s.cssRules[0]._cssTextCache)
+
     def test_namespaces1(self):
         "CSSStyleSheet.namespaces.namespaces"
         # tests for namespaces internal methods
@@ -879,6 +905,25 @@ body {
         self.assertEqual(href, s2.href)
         self.assertEqual(title, s2.title)
 
+    def test_pickle(self):
+        "CSSStyleSheet pickle"
+        import pickle
+        css = '''@namespace x "a";
+@media print { x|a:hover > b { color: red } }
+a { margin: 1px 2px !important; background: url(x.gif) }'''
+        s = css_parser.parseString(css)
+        s2 = pickle.loads(pickle.dumps(s, pickle.HIGHEST_PROTOCOL))
+        self.assertEqual(s.cssText, s2.cssText)
+        # positions are kept
+        item = s2.cssRules[1].cssRules[0].style.getProperty(
+            'color').propertyValue.seq[0]
+        self.assertEqual((2, 39), (item.line, item.col))
+        # rules may still be added
+        s2.cssRules.append(css_parser.css.CSSComment('/*x*/'))
+        self.assertEqual(s2, s2.cssRules[3].parentStyleSheet)
+        s2.cssRules[1].cssRules.append('b {}')
+        self.assertEqual(2, s2.cssRules[1].cssRules.length)
+
     def test_valid(self):
         cases = [
             ('body { color: red; }', True),
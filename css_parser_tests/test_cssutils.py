@@ -125,6 +125,12 @@ class CSSutilsTestCase(basetest.BaseTestCase):
             '@import "../import3.css";\n@import "import-impossible.css" print;\n.import2 {\n    /* sheets/import2.css */\n    background: url(http://example.com/images/example.gif);\n    background: url(//example.com/images/example.gif);\n    background: url(/images/example.gif);\n    background: url(images2/example.gif);\n    background: url(./images2/example.gif);\n    background: url(../images/example.gif);\n    background: url(./../images/example.gif)\n    }'  # noqa
             .encode())
 
+        # file is read in chunks
+        for chunkSize in (1, 7):
+            s = css_parser.CSSParser().parseFile(name, href=href,
+                                                 chunkSize=chunkSize)
+            self.assertEqual(self.exp.encode(), s.cssText)
+
         # name is used for open and setting of href automatically
         # test needs to be relative to this test file!
         os.chdir(os.path.dirname(__file__))
@@ -194,6 +200,26 @@ class CSSutilsTestCase(basetest.BaseTestCase):
         except EnvironmentError:
             pass
 
+    def test_parseFiles(self):
+        "css_parser.parseFiles()"
+        names = [basetest.get_sheet_filename('import.css'),
+                 basetest.get_sheet_filename('does-not-exist.css'),
+                 basetest.get_sheet_filename('import/import2.css')]
+        for workers in (1, 2):
+            results = css_parser.parseFiles(names, workers=workers,
+                                            media='screen')
+            self.assertEqual(3, len(results))
+            for (sheet, error), name in zip(results, names):
+                if 'does-not-exist' in name:
+                    self.assertEqual(None, sheet)
+                    self.assertIsInstance(error, IOError)
+                else:
+                    self.assertEqual(None, error)
+                    self.assertEqual(css_parser.parseFile(name).cssText,
+                                     sheet.cssText)
+                    self.assertEqual('screen', sheet.media.mediaText)
+            self.assertEqual(self.exp.encode(), results[0][0].cssText)
+
     def test_parseUrl(self):
         "css_parser.parseUrl()"
         href = basetest.get_sheet_filename('import.css')
@@ -83,6 +83,17 @@ class ErrorHandlerTestCase(basetest.BaseTestCase):
 
         css_parser.log.raiseExceptions = o
 
+        # parser tokens contain offsets only which are resolved for messages
+        parser = css_parser.CSSParser(raiseExceptions=True)
+        try:
+            parser.parseString('a {\n  color: red }\n\n@import x;')
+        except xml.dom.DOMException as e:
+            self.assertEqual(str(e), 'CSSImportRule: Unexpected ident. [4:9: x]')
+            self.assertEqual(e.line, 4)
+            self.assertEqual(e.col, 9)
+        else:
+            self.fail('DOMException not raised')
+
     def test_handlers(self):
         "css_parser.log"
         s = self._setHandler()
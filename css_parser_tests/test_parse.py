@@ -2,6 +2,7 @@
 """Tests for parsing which does not raise Exceptions normally"""
 from __future__ import absolute_import, unicode_literals, with_statement
 
+import logging
 import sys
 import xml.dom
 
@@ -214,6 +215,266 @@ class CSSParserTestCase(basetest.BaseTestCase):
             self.assertRaises(UnicodeDecodeError, css_parser.parseString,
                               test[0], test[1])
 
+    def test_iterRules(self):
+        "CSSParser.iterRules()"
+        css = '''@charset "ascii";
+@namespace a "x";
+@variables { c: red }
+a|b { color: var(c) }
+/*x*/
+@media print { a { top: 0 } }
+x { left: 0 }'''
+        p = css_parser.CSSParser()
+        sheet = p.parseString(css)
+        rules = p.iterRules(css)
+        self.assertEqual(
+            [r.cssText for r in sheet.cssRules],
+            [r.cssText for r in rules])
+
+        rules = list(p.iterRules(css))
+        self.assertEqual([r.type for r in rules],
+                         [r.type for r in sheet.cssRules])
+        # rules know their sheet but are not kept in it
+        parent = rules[0].parentStyleSheet
+        self.assertEqual('ascii', parent.encoding)
+        self.assertEqual({'a': 'x'}, dict(parent.namespaces))
+        self.assertEqual('red', rules[3].style.color)
+        self.assertEqual(1, parent.cssRules.length)
+
+        # parsing stops with the caller
+        rules = p.iterRules('a {} b {} c {}')
+        self.assertEqual('a', next(rules).selectorText)
+        rules.close()
+
+        # raising settings are only used during parsing
+        raising = css_parser.log.raiseExceptions
+        p = css_parser.CSSParser(raiseExceptions=True)
+        rules = p.iterRules('a {} $')
+        self.assertEqual('a', next(rules).selectorText)
+        self.assertEqual(raising, css_parser.log.raiseExceptions)
+        self.assertRaises(xml.dom.SyntaxErr, next, rules)
+        self.assertEqual(raising, css_parser.log.raiseExceptions)
+
+    def test_threads(self):
+        "CSSParser used in several threads"
+        import threading
+        css = 'a { color: red; x: 1 } $ b { left: 0 }'
+        results = {}
+
+        def parse(raising):
+            p = css_parser.CSSParser(raiseExceptions=raising)
+            out = []
+            for i in range(30):
+                try:
+                    out.append(p.parseString(css).cssText)
+                except xml.dom.SyntaxErr:
+                    out.append(None)
+            results[raising] = out
+
+        threads = [threading.Thread(target=parse, args=(raising,))
+                   for raising in (True, False)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(30 * [None], results[True])
+        self.assertEqual(30 * [b'a {\n    color: red;\n    x: 1\n    }'],
+                         results[False])
+
+    def test_profile(self):
+        "CSSParser(profile=)"
+        from css_parser.profiles import Profiles
+        profile = Profiles()
+        profile.addProfile('x', {'xcount': '{num}'})
+        p = css_parser.CSSParser(profile=profile)
+        out = self.captureLog(logging.WARNING, p.parseStyle, 'xcount: 1')
+        self.assertEqual('', out)
+        out = self.captureLog(logging.WARNING, p.parseStyle, 'xcount: a')
+        self.assertIn('Invalid value for "x" property: a', out)
+        # global profile is not changed
+        out = self.captureLog(logging.WARNING, css_parser.parseStyle,
+                              'xcount: 1')
+        self.assertIn('Unknown Property name', out)
+
+    def test_lazyValues(self):
+        "CSSParser(lazyValues=True)"
+        p = css_parser.CSSParser(lazyValues=True)
+        css = ('a { x: 1; color:  rgb(1,2,  3) /*c*/; '
+               'background: url( "a.gif" ) red; y: f( }')
+        out = self.captureLog(logging.WARNING, p.parseString, css)
+        self.assertEqual('', out)
+        s = p.parseString(css)
+        self.assertEqual(s.validating, False)
+        style = s.cssRules[0].style
+
+        # parsed on first use
+        color = style.getProperty('color')
+        self.assertEqual('COLOR_VALUE', color.propertyValue[0].type)
+        self.assertEqual('rgb(1, 2, 3)', color.value)
+        self.assertEqual('color: rgb(1, 2, 3) /*c*/', color.cssText)
+        out = self.captureLog(logging.WARNING,
+                              lambda: style.getProperty('y').propertyValue)
+        self.assertIn('Unknown syntax or no value:  f(', out)
+
+        # serialized as they are only if parsing would not change them
+        s = p.parseString(css)
+        self.assertEqual(b'a {\n    x: 1;\n    color: rgb(1, 2, 3) /*c*/;\n'
+                         b'    background: url(a.gif) red\n    }', s.cssText)
+        style = s.cssRules[0].style
+        self.assertNotEqual(None, style.getProperty('x')._valuetokens)
+        self.assertEqual(None, style.getProperty('color')._valuetokens)
+
+        self.assertEqual(['a.gif'], list(css_parser.getUrls(s)))
+        css_parser.replaceUrls(s, lambda url: 'b.gif')
+        self.assertEqual('background: url(b.gif) red',
+                         style.getProperty('background').cssText)
+        # values without url() are not parsed
+        self.assertNotEqual(None, style.getProperty('x')._valuetokens)
+
+        # serialized like parsed ones with any preferences
+        sheets = [('a { color: #FF0000; margin: 0px; top: 1.50em; left: 1PX; '
+                   'right: -0; x: 1; y: #aabbc }'),
+                  ("a{background:transparent; filter: progid:DXImageTransform"
+                   ".Microsoft.AlphaImageLoader(src='x.png')} b{color:red; "
+                   "x: }")]
+        for name in ('bundle.css', 'hacks.css'):
+            with open(basetest.get_sheet_filename(name), 'rb') as f:
+                sheets.append(f.read().decode('utf-8'))
+        eager = css_parser.CSSParser(fetcher=lambda url: None)
+        p = css_parser.CSSParser(lazyValues=True, fetcher=lambda url: None)
+        self._tempSer()
+        for css in sheets:
+            expected, lazy = eager.parseString(css), p.parseString(css)
+            css_parser.ser.prefs.useDefaults()
+            self.assertEqual(expected.cssText, lazy.cssText)
+            css_parser.ser.prefs.useMinified()
+            self.assertEqual(expected.cssText, lazy.cssText)
+
+    def test_lazyRules(self):
+        "CSSParser(lazyRules=True)"
+        p = css_parser.CSSParser(lazyRules=True)
+        css = 'a ,b{ x: 1 }\n@media print { c>d{top:0} }\ne { $: 0 }'
+        out = self.captureLog(logging.WARNING, p.parseString, css)
+        self.assertEqual('', out)
+
+        # unused declarations are serialized as they are
+        s = p.parseString(css)
+        self.assertEqual(b'a ,b{ x: 1 }\n@media print {\n    c>d{top:0}\n'
+                         b'    }\ne { $: 0 }', s.cssText)
+
+        # parsed on first use
+        rule = s.cssRules[0]
+        self.assertEqual('a, b', rule.selectorText)
+        self.assertEqual(['x'], [p.name for p in rule.style])
+        # still serialized as found as long as not changed
+        self.assertEqual('a ,b{ x: 1 }', rule.cssText)
+        rule = s.cssRules[1].cssRules[0]
+        rule.style.top = '1px'
+        self.assertEqual('c > d {\n    top: 1px\n    }', rule.cssText)
+        out = self.captureLog(logging.WARNING,
+                              lambda: s.cssRules[2].style)
+        self.assertIn('Unexpected token', out)
+        self.assertEqual(b'a ,b{ x: 1 }\n@media print {\n'
+                         b'    c > d {\n        top: 1px\n        }\n    }\n'
+                         b'e { $: 0 }', s.cssText)
+
+        # selectors are parsed at once, invalid and empty rules are omitted
+        css = 'a{color:red} $bad, x { color: blue } b::{top:0} c{}'
+        out = self.captureLog(logging.WARNING, p.parseString, css)
+        self.assertIn('Invalid Selector: $bad', out)
+        self.assertIn('Invalid Selector: b::', out)
+        s = p.parseString(css)
+        self.assertEqual(['a', 'c'], [r.selectorText for r in s.cssRules])
+        self.assertEqual(b'a{color:red}', s.cssText)
+
+        # serialized as found with the default preferences only
+        self._tempSer()
+        css = 'a{color:red;/* x */}'
+        for first in (False, True):
+            s = p.parseString(css)
+            for keepComments in (first, not first):
+                css_parser.ser.prefs.keepComments = keepComments
+                if keepComments:
+                    self.assertEqual(css.encode(), s.cssText)
+                else:
+                    self.assertEqual(b'a {\n    color: red;\n    }',
+                                     s.cssText)
+            css_parser.ser.prefs.useDefaults()
+            self.assertEqual(css.encode(), s.cssText)
+
+        # not a complete rule
+        out = self.captureLog(logging.WARNING, p.parseString, 'a { top: 0')
+        self.assertEqual('', out)
+        out = self.captureLog(logging.WARNING, p.parseString, '{ x: 1 }')
+        self.assertIn('No selector found', out)
+
+    def test_keepSource(self):
+        "CSSParser(keepSource=True)"
+        css = ('@import "x.css"  print;\n'
+               'a ,b{ color: red; background: url( "a.gif" ) }\n'
+               '@media print {\n  c>d{top:0}\n  e { color : blue }\n}\n'
+               '@page :first { margin: 0 }\n'
+               '@font-face { font-family : x }')
+        for lazy in (False, True):
+            p = css_parser.CSSParser(keepSource=True, lazyRules=lazy,
+                                     lazyValues=lazy, fetcher=lambda url: None)
+            s = p.parseString(css)
+            self.assertEqual(css.encode(), s.cssText)
+            self.assertEqual('e { color : blue }',
+                             s.cssRules[2].cssRules[1].cssText)
+
+            # only changed rules are serialized again
+            css_parser.replaceUrls(s, lambda url: url)
+            self.assertEqual(css.encode(), s.cssText)
+            css_parser.replaceUrls(s, lambda url: url.replace('a', 'b'))
+            s.cssRules[2].cssRules[1].style.color = 'green'
+            self.assertEqual(b'@import "x.css"  print;\n'
+                             b'a, b {\n    color: red;\n'
+                             b'    background: url(b.gif)\n    }\n'
+                             b'@media print {\n    c>d{top:0}\n'
+                             b'    e {\n        color: green\n        }\n'
+                             b'    }\n'
+                             b'@page :first { margin: 0 }\n'
+                             b'@font-face { font-family : x }', s.cssText)
+            s.cssRules[3].selectorText = ':left'
+            s.cssRules[4].style.fontFamily = 'y'
+            self.assertTrue(s.cssText.endswith(
+                b'@page :left {\n    margin: 0\n    }\n'
+                b'@font-face {\n    font-family: y\n    }'))
+
+        # source is used with the default preferences only
+        self._tempSer()
+        css = 'a ,b{ color: red /* c */ }\n@media print {\n  c>d{top:0}\n}'
+        for lazy in (False, True):
+            p = css_parser.CSSParser(keepSource=True, lazyRules=lazy,
+                                     lazyValues=lazy)
+            s = p.parseString(css)
+            css_parser.ser.prefs.useMinified()
+            self.assertEqual(b'a,b{color:red}@media print{c>d{top:0}}',
+                             s.cssText)
+            css_parser.ser.prefs.useDefaults()
+            css_parser.ser.prefs.keepComments = False
+            self.assertEqual(b'a, b {\n    color: red\n    }\n'
+                             b'@media print {\n    c > d {\n'
+                             b'        top: 0\n        }\n    }', s.cssText)
+            css_parser.ser.prefs.useDefaults()
+            self.assertEqual(css.encode(), s.cssText)
+
+        # selectors are serialized again if namespaces change
+        css = '@namespace ns "u";\n@media print { ns|a{top:0} }\nns|p{x:1}'
+        for lazy in (False, True):
+            p = css_parser.CSSParser(keepSource=True, lazyRules=lazy)
+            s = p.parseString(css)
+            self.assertEqual(css.encode(), s.cssText)
+            s.cssRules[0].prefix = 'zz'
+            self.assertEqual(b'@namespace zz "u";\n@media print {\n'
+                             b'    zz|a {\n        top: 0\n        }\n'
+                             b'    }\nzz|p {\n    x: 1\n    }', s.cssText)
+
+        # only complete rules keep their source
+        s = css_parser.CSSParser(keepSource=True).parseString('a { top: 0')
+        self.assertEqual(b'a {\n    top: 0\n    }', s.cssText)
+
     def test_validate(self):
         """CSSParser(validate)"""
         style = 'color: red'
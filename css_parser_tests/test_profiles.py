@@ -37,9 +37,9 @@ class ProfilesTestCase(basetest.BaseTestCase):
         p = css_parser.profiles.Profiles()
         p.removeProfile(all=True)
         p.addProfile('test', self.P1, self.M1)
-        self.assertEqual(list(p.knownNames), list(self.P1.keys()))
+        self.assertEqual(p.knownNames, frozenset(self.P1.keys()))
         p.removeProfile(all=True)
-        self.assertEqual(p.knownNames, [])
+        self.assertEqual(p.knownNames, frozenset())
 
     def test_profiles(self):
         "Profiles.profiles"
@@ -144,6 +144,85 @@ class ProfilesTestCase(basetest.BaseTestCase):
         p.removeProfile(all=True)
         self.assertEqual(0, len(p.profiles))
 
+    def test_cache(self):
+        "Profiles validation cache"
+        p = css_parser.profiles.Profiles()
+        r = p.validateWithProfile('opacity', '0.5', CSS2)
+        self.assertEqual((True, False, list(CM3)), r)
+        self.assertEqual((0, 1), (p.cacheHits, p.cacheMisses))
+        r[2].append('x')  # result of cache is a copy
+        self.assertEqual((True, False, list(CM3)),
+                         p.validateWithProfile('opacity', '0.5', list(CSS2)))
+        self.assertEqual((1, 1), (p.cacheHits, p.cacheMisses))
+        p.validateWithProfile('opacity', '0.5')
+        self.assertEqual((1, 2), (p.cacheHits, p.cacheMisses))
+
+        # changes of profiles clear the cache
+        p.defaultProfiles = CM3
+        self.assertEqual((True, True, list(CM3)),
+                         p.validateWithProfile('opacity', '0.5'))
+        p.removeProfile(p.CSS3_COLOR)
+        self.assertEqual((False, False, []),
+                         p.validateWithProfile('opacity', '0.5', CSS2))
+        p.addProfile('test', {'opacity': r'0\.5'})
+        self.assertEqual((True, False, ['test']),
+                         p.validateWithProfile('opacity', '0.5', CSS2))
+        self.assertEqual((1, 5), (p.cacheHits, p.cacheMisses))
+
+        # size is limited
+        p = css_parser.profiles.Profiles(cacheSize=2)
+        for value in ('red', 'green', 'blue', 'red'):
+            p.validateWithProfile('color', value)
+        self.assertEqual((0, 4), (p.cacheHits, p.cacheMisses))
+        p.validateWithProfile('color', 'red')
+        self.assertEqual((1, 4), (p.cacheHits, p.cacheMisses))
+
+        p = css_parser.profiles.Profiles(cacheSize=0)
+        p.validateWithProfile('color', 'red')
+        p.validateWithProfile('color', 'red')
+        self.assertEqual((0, 0), (p.cacheHits, p.cacheMisses))
+
+    def test_warmup(self):
+        "Profiles.warmup()"
+        import pickle
+        p = css_parser.profiles.Profiles(useGrammars=True)
+        regex = p._profilesProperties[p.CSS_LEVEL_2]['color']
+        self.assertEqual(None, regex.matcher)
+        p.warmup()
+        self.assertNotEqual(None, regex.matcher)
+        # pickled regexes are compiled again on first use only
+        regex = pickle.loads(pickle.dumps(regex))
+        self.assertEqual(None, regex.matcher)
+        self.assertTrue(regex('red'))
+
+    def test_snapshot(self):
+        "Profiles.snapshot(), Profiles.fromSnapshot()"
+        import pickle
+        p = css_parser.profiles.Profiles()
+        p.removeProfile(p.CSS3_PAGED_MEDIA)
+        p.addProfile('test', self.P1, self.M1)
+        self.assertRaises(Exception, p.snapshot)  # lambda
+
+        p.removeProfile('test')
+        p.addProfile('test', {'-x': '{testvalue}'}, self.M1)
+        p.defaultProfiles = p.CSS_LEVEL_2
+        p2 = css_parser.profiles.Profiles.fromSnapshot(p.snapshot(),
+                                                       log=css_parser.log)
+        self.assertEqual(p.profiles, p2.profiles)
+        self.assertEqual(p.knownNames, p2.knownNames)
+        self.assertEqual((p.CSS_LEVEL_2,), p2.defaultProfiles)
+        self.assertEqual(css_parser.log, p2._log)
+        for name, value in (('-x', 'x'), ('-x', 'y'), ('color', 'red'),
+                            ('size', 'a4'), ('opacity', '0.5')):
+            self.assertEqual(p.validateWithProfile(name, value),
+                             p2.validateWithProfile(name, value))
+        self.assertEqual((0, 5), (p2.cacheHits, p2.cacheMisses))
+
+        version, state = pickle.loads(p.snapshot())
+        self.assertRaises(ValueError,
+                          css_parser.profiles.Profiles.fromSnapshot,
+                          pickle.dumps(((0, version[1]), state)))
+
     # TODO: FIX
 #    def test_validateWithProfile(self):
 #        "Profiles.validate(), Profiles.validateWithProfile()"
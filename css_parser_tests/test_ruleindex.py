@@ -0,0 +1,85 @@
+"""Testcases for css_parser.ruleindex."""
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+from . import basetest
+import css_parser
+from css_parser.ruleindex import RuleIndex, selectorKey
+
+
+class RuleIndexTestCase(basetest.BaseTestCase):
+
+    def test_selectorKey(self):
+        "ruleindex.selectorKey()"
+        tests = {
+            '#x': ('id', 'x'),
+            'div p#x.a': ('id', 'x'),
+            'div p.a.b': ('class', 'a'),
+            '#x .a': ('class', 'a'),
+            'div > P:hover': ('tag', 'p'),
+            '.a + p[lang]': ('tag', 'p'),
+            '*': None,
+            'div *': None,
+            '#x ~ [lang]': None,
+            ':is(.a, .b)': None,
+            'a::before': ('tag', 'a'),
+            # escapes are removed
+            r'.md\:flex': ('class', 'md:flex'),
+            r'p#a\.b': ('id', 'a.b'),
+            r'.\31 x': ('class', '1x'),
+        }
+        for selectorText, expected in tests.items():
+            selector = css_parser.css.Selector(selectorText)
+            self.assertEqual(expected, selectorKey(selector), selectorText)
+
+    def test_candidates(self):
+        "RuleIndex.candidates()"
+        sheet = css_parser.parseString('''
+            @namespace x "x";
+            p { a: 1 }
+            .a, #x { a: 2 }
+            @media print {
+                * { a: 3 }
+                div .b { a: 4 }
+            }
+            @page { margin: 0 }
+            P.b.a { a: 5 }
+            #y { a: 6 }
+            ''')
+        index = RuleIndex(sheet)
+        self.assertEqual(7, len(index))
+
+        def texts(*args, **kwargs):
+            return [(i.selector.selectorText, i.order)
+                    for i in index.candidates(*args, **kwargs)]
+
+        self.assertEqual([('*', 3)], texts())
+        self.assertEqual([('p', 0), ('*', 3)], texts('p'))
+        self.assertEqual([('p', 0), ('.a', 1), ('#x', 2), ('*', 3),
+                          ('div .b', 4), ('P.b.a', 5)],
+                         texts('P', classes=['b', 'a', 'b'], id='x'))
+        self.assertEqual([('*', 3), ('div .b', 4), ('P.b.a', 5)],
+                         texts('span', classes=['b']))
+        self.assertEqual([('*', 3), ('#y', 6)], texts(id='y'))
+
+        rule = index.candidates('p')[0].rule
+        self.assertEqual(sheet.cssRules[1], rule)
+        self.assertEqual((0, 0, 0, 1), index.candidates('p')[0].specificity)
+
+    def test_import(self):
+        "RuleIndex.addSheet() with @import"
+        def fetcher(url):
+            return None, '.a { a: 1 }'
+        parser = css_parser.CSSParser(fetcher=fetcher)
+        sheet = parser.parseString('@import "x.css"; .a { a: 2 }',
+                                   href='http://example.com/')
+        index = RuleIndex()
+        index.addSheet(sheet)
+        self.assertEqual(['a: 1', 'a: 2'],
+                         [i.rule.style.cssText
+                          for i in index.candidates(classes=['a'])])
+
+
+if __name__ == '__main__':
+    import unittest
+    unittest.main()
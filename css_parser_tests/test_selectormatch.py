@@ -0,0 +1,184 @@
+"""Testcases for css_parser.selectormatch."""
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import xml.etree.ElementTree as ET
+from . import basetest
+import css_parser
+from css_parser.selectormatch import (compileSelector, AncestorFilter,
+                                      DictAdapter, ElementTreeAdapter)
+
+XHTML = '''<html xmlns="http://www.w3.org/1999/xhtml"><body>
+<div class="note" id="d" lang="en-GB"><p class="a b">1</p><!-- c --><p>2</p>
+<span/><p><a href="x">3</a></p></div>
+<ul><li>1</li><li>2</li><li>3</li><li>4</li><li>5</li></ul>
+</body></html>'''
+
+
+class SelectorMatchTestCase(basetest.BaseTestCase):
+
+    def _matching(self, selectorText, adapter, elements):
+        compiled = compileSelector(selectorText, adapter)
+        return [i for i, element in enumerate(elements)
+                if compiled.match(element)]
+
+    def test_elementtree(self):
+        "compileSelector() with ElementTreeAdapter"
+        root = ET.fromstring(XHTML)
+        adapter = ElementTreeAdapter(root)
+        elements = [e for e in root.iter() if isinstance(e.tag, str)]
+        # 0 html, 1 body, 2 div, 3 p.a.b, 4 p, 5 span, 6 p, 7 a, 8 ul,
+        # 9-13 li
+        tests = {
+            '*': list(range(14)),
+            'P': [3, 4, 6],
+            '*|p': [3, 4, 6],
+            '|p': [],
+            '#d': [2],
+            '.a.b': [3],
+            '.a.c': [],
+            'div.note p': [3, 4, 6],
+            'body > p': [],
+            'div > p:first-child': [3],
+            'p + p': [4],
+            'p ~ span': [5],
+            '.a ~ *': [4, 5, 6],
+            'p:last-of-type': [6],
+            ':is(li:first-child, li:last-child)': [9, 13],
+            'li:nth-child(2n+1)': [9, 11, 13],
+            'li:nth-child(odd)': [9, 11, 13],
+            'li:nth-of-type(even)': [10, 12],
+            'li:nth-last-child(-n+2)': [12, 13],
+            'li:nth-child(3)': [11],
+            '#d :only-child': [7],
+            ':root': [0],
+            ':empty': [5],
+            '[href]': [7],
+            '[class="a b"]': [3],
+            '[class~=b]': [3],
+            '[class|=a]': [],
+            '[class^=a]': [3],
+            '[class$=" b"]': [3],
+            '[class*=" "]': [3],
+            'a:link': [7],
+            'a:hover': [],
+            ':lang(en)': [2, 3, 4, 5, 6, 7],
+            ':lang(en-us)': [],
+            ':is(span, a)': [5, 7],
+            'body :where(ul) li:first-child': [9],
+            'p:not(:first-child)': [4, 6],
+            ':not(p, li, a):empty': [5],
+            'div:has(> p.a)': [2],
+            'body:has(> p)': [],
+            'p:has(a[href^=x])': [6],
+            'p:has(+ p)': [3],
+            ':has(~ ul)': [2],
+            'p::before': [3, 4, 6],
+            'p:unknown': [],
+        }
+        for selectorText, expected in tests.items():
+            self.assertEqual(expected,
+                             self._matching(selectorText, adapter, elements),
+                             selectorText)
+
+        compiled = compileSelector('p:first-child::before', adapter)
+        self.assertEqual('::before', compiled.pseudoElement)
+        self.assertEqual(None, compileSelector('p', adapter).pseudoElement)
+        self.assertEqual((0, 0, 1, 2), compiled.specificity)
+
+    def test_namespaces(self):
+        "compileSelector() with @namespace"
+        root = ET.fromstring(XHTML)
+        adapter = ElementTreeAdapter(root)
+        sheet = css_parser.parseString(
+            '@namespace "http://www.w3.org/1999/xhtml"; @namespace o "o";'
+            'p {} o|p {}')
+        xhtml, other = [rule.selectorList[0] for rule in sheet.cssRules
+                        if rule.type == rule.STYLE_RULE]
+        self.assertEqual(True, compileSelector(xhtml, adapter).match(root[0][0][0]))
+        self.assertEqual(False, compileSelector(other, adapter).match(root[0][0][0]))
+
+    def test_dict(self):
+        "compileSelector() with DictAdapter"
+        a = {'tag': 'a', 'attrs': {'href': '#'}}
+        p1 = {'tag': 'p', 'attrs': {'class': 'x'}, 'text': 'text'}
+        p2 = {'tag': 'p', 'children': [a]}
+        root = {'tag': 'div', 'attrs': {'id': 'r'}, 'children': [p1, p2]}
+        adapter = DictAdapter(root)
+        elements = [root, p1, p2, a]
+        self.assertEqual([1, 2], self._matching('#r > p', adapter, elements))
+        self.assertEqual([2], self._matching('.x + p', adapter, elements))
+        self.assertEqual([3], self._matching('div a', adapter, elements))
+        self.assertEqual([2], self._matching('p:has(a)', adapter, elements))
+        self.assertEqual([3], self._matching(':empty', adapter, elements))
+        self.assertEqual([1], self._matching('p:first-of-type', adapter,
+                                             elements))
+
+        # types of siblings compare like type selectors
+        p1, p2, p3 = {'tag': 'p'}, {'tag': 'P'}, {'tag': 'p', 'namespace': 'o'}
+        root = {'tag': 'div', 'children': [p1, p2, p3]}
+        adapter = DictAdapter(root)
+        self.assertEqual([0, 2], self._matching('p:first-of-type', adapter,
+                                                [p1, p2, p3]))
+        self.assertEqual([1, 2], self._matching('p:last-of-type', adapter,
+                                                [p1, p2, p3]))
+
+        # escaped ids and classes
+        p1 = {'tag': 'p', 'attrs': {'class': 'md:flex x'}}
+        p2 = {'tag': 'p', 'attrs': {'id': 'a.b'}, 'children': [p1]}
+        adapter = DictAdapter(p2)
+        self.assertEqual([0], self._matching(r'.md\:flex', adapter,
+                                             [p1, p2]))
+        self.assertEqual([1], self._matching(r'#a\.b', adapter, [p1, p2]))
+        self.assertEqual([0], self._matching(r'#a\2e b > .\78', adapter,
+                                             [p1, p2]))
+
+    def test_ancestorFilter(self):
+        "AncestorFilter and CompiledSelector.mayMatch()"
+        root = ET.fromstring(XHTML)
+        adapter = ElementTreeAdapter(root)
+        body, div = root[0], root[0][0]
+        ancestors = AncestorFilter(adapter)
+        for element in (root, body, div):
+            ancestors.push(element)
+        self.assertEqual(3, len(ancestors))
+
+        tests = {
+            'p': True,
+            'div p': True,
+            'html > body .note p': True,
+            '#d > p': True,
+            'div.other p': False,
+            'ul p': False,
+            '#x p': False,
+            # siblings are not ancestors
+            'ul + div p': True,
+            'ul ~ p': True,
+            '.note + ul p': False,
+            ':is(ul) p': True,
+        }
+        for selectorText, expected in tests.items():
+            compiled = compileSelector(selectorText, adapter)
+            self.assertEqual(expected, compiled.mayMatch(ancestors),
+                             selectorText)
+        self.assertEqual((), compileSelector('p + p', adapter).ancestorHashes)
+
+        compiled = compileSelector('div.note p', adapter)
+        ancestors.pop()
+        self.assertEqual(False, compiled.mayMatch(ancestors))
+        ancestors.push(div)
+        self.assertEqual(True, compiled.mayMatch(ancestors))
+
+        # escaped ids and classes
+        p = {'tag': 'p', 'attrs': {'id': 'a.b', 'class': 'md:flex'}}
+        adapter = DictAdapter(p)
+        ancestors = AncestorFilter(adapter)
+        ancestors.push(p)
+        for selectorText in (r'#a\.b p', r'.md\:flex p'):
+            compiled = compileSelector(selectorText, adapter)
+            self.assertEqual(True, compiled.mayMatch(ancestors), selectorText)
+
+
+if __name__ == '__main__':
+    import unittest
+    unittest.main()
@@ -3,6 +3,7 @@
 
 from __future__ import absolute_import
 from __future__ import unicode_literals
+import pickle
 from . import basetest
 import css_parser
 
@@ -770,6 +771,108 @@ class CSSSerializerTestCase(basetest.BaseTestCase):
         self.assertEqual('@charset "ascii";\n/* \\3BA \\3BF \\3C5 \\3C1 \\3BF \\3C2  */'.encode(),
                          sheet.cssText)
 
+    def test_cached(self):
+        "CSSSerializer kept serializations"
+        sheet = css_parser.parseString('@namespace p "u"; @variables { x: 1px }'
+                                       ' @media print { a { color: red } }'
+                                       ' p|b { left: var(x) }')
+        media, rule = sheet.cssRules[2], sheet.cssRules[2].cssRules[0]
+        self.assertEqual('a {\n    color: red\n    }', rule.cssText)
+        self.assertEqual(rule.cssText, rule._cssTextCache[1])
+        sheet.cssText
+        self.assertTrue(media._cssTextCache)
+        self.assertTrue(rule.selectorList[0]._cssTextCache)
+
+        tests = [
+            (lambda: rule.style.setProperty('color', 'blue'),
+             'a {\n        color: blue\n        }'),
+            (lambda: rule.style.removeProperty('color'), ''),
+            (lambda: rule.style.setProperty('top', '0'),
+             'a {\n        top: 0\n        }'),
+            (lambda: setattr(rule.style.getProperty('top'), 'priority',
+                             'important'),
+             'a {\n        top: 0 !important\n        }'),
+            (lambda: setattr(rule, 'selectorText', 'b'),
+             'b {\n        top: 0 !important\n        }'),
+            (lambda: media.media.appendMedium('tv'),
+             'b {\n        top: 0 !important\n        }'),
+        ]
+        for change, expected in tests:
+            sheet.cssText  # kept by all
+            change()
+            self.assertEqual(None, media._cssTextCache)
+            self.assertEqual(None, sheet._cssTextCache)
+            if expected:
+                self.assertTrue(expected in media.cssText, media.cssText)
+            else:
+                self.assertEqual('', media.cssText)
+        self.assertTrue(media.cssText.startswith('@media print, tv {'))
+
+        # media queries of a kept media list
+        for change, expected in [
+                (lambda: setattr(media.media[0], 'mediaType', 'screen'),
+                 '@media screen, tv {'),
+                (lambda: setattr(media.media[1], 'mediaText',
+                                 'print and (color)'),
+                 '@media screen, print and (color) {'),
+                (lambda: media.media.__setitem__(0, 'tv'),
+                 '@media tv, print and (color) {')]:
+            sheet.cssText
+            change()
+            self.assertEqual(None, sheet._cssTextCache)
+            self.assertTrue(media.cssText.startswith(expected), media.cssText)
+            self.assertTrue(sheet.cssText.startswith(
+                b'@namespace p "u";\n' + expected.encode()), sheet.cssText)
+        media.media[0].mediaType = 'print'
+
+        kept = css_parser.CSSParser(keepSource=True).parseString(
+            '@media print { a { color: red } }')
+        kept.cssText
+        kept.cssRules[0].media[0].mediaType = 'screen'
+        self.assertEqual(b'@media screen {\n    a { color: red }\n    }',
+                         kept.cssText)
+
+        # context of objects
+        sheet.cssText
+        self.assertTrue(b'p|b {\n    left: 1px\n    }' in sheet.cssText)
+        sheet.namespaces['q'] = 'u'
+        self.assertTrue(b'q|b {\n    left: 1px\n    }' in sheet.cssText)
+        sheet.insertRule('@variables { x: 2px }', 2)
+        self.assertTrue(b'q|b {\n    left: 2px\n    }' in sheet.cssText)
+        css_parser.ser.prefs.indent = '\t'
+        self.assertTrue(b'q|b {\n\tleft: 2px\n\t}' in sheet.cssText)
+        css_parser.ser.prefs.useDefaults()
+
+        # not pickled
+        sheet = pickle.loads(pickle.dumps(sheet))
+        self.assertEqual(None, sheet.cssRules[2]._cssTextCache)
+
+    def test_minified(self):
+        "CSSSerializer with Preferences.useMinified()"
+        style = css_parser.parseStyle(
+            'font: italic 12px/1.5 "A b", sans-serif;'
+            'background: url(x.png) #FFFFFF;'
+            'margin: -0.5em +1px 0 0;'
+            'x: rgb(1, 2, 3) calc(1px + 2px) f(a) /*c*/ 1 !important;'
+            'y: a, b / c', validate=False)
+        css_parser.ser.prefs.useMinified()
+        self.assertTrue(css_parser.ser._minified())
+        # uses Out for all values
+        general = css_parser.CSSSerializer(css_parser.ser.prefs)
+        general._minified = lambda: False
+        for property in style:
+            self.assertEqual(
+                general.do_css_PropertyValue(property.propertyValue),
+                css_parser.ser.do_css_PropertyValue(property.propertyValue))
+        self.assertEqual('font:italic 12px/1.5 "A b",sans-serif;'
+                         'background:url(x.png) #FFF;'
+                         'margin:-.5em +1px 0 0;'
+                         'x:rgb(1,2,3) calc(1px + 2px) f(a) 1 !important;'
+                         'y:a,b/c', style.cssText)
+
+        css_parser.ser.prefs.keepComments = True
+        self.assertFalse(css_parser.ser._minified())
+
     def test_Property(self):
         "CSSSerializer.do_Property"
 
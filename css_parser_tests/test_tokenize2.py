@@ -660,6 +660,149 @@ class TokenizerTestCase(basetest.BaseTestCase):
             # EOF is added so -1
             self.assertEqual(len(tokens) - 1, len(tests[css]))
 
+    def test_tokenizesinglepass(self):
+        "css_parser Tokenizer(singlePass=True).tokenize()"
+        tokenizer = Tokenizer()
+        singlepass = Tokenizer(singlePass=True)
+        tests = {}
+        tests.update(self.testsall)
+        tests.update(self.tests2)
+        tests.update(self.tests3)
+        tests.update(self.testsfullsheet)
+        tests.update(self.testsfullsheetfalse)
+        tests.update(self.testsfullsheettrue)
+        for css in tests:
+            for fullsheet in (False, True):
+                self.assertEqual(list(tokenizer.tokenize(css, fullsheet)),
+                                 list(singlepass.tokenize(css, fullsheet)))
+
+        # same tokens for real sheets
+        for name in ('acid2.css', 'hacks.css', 'html.css', 'sample_5.css'):
+            with open(basetest.get_sheet_filename(name), 'rb') as f:
+                css = f.read().decode('utf-8', 'replace')
+            self.assertEqual(list(tokenizer.tokenize(css, True)),
+                             list(singlepass.tokenize(css, True)))
+
+        # comments are omitted
+        tokenizer = Tokenizer(doComments=False)
+        singlepass = Tokenizer(doComments=False, singlePass=True)
+        for css in ('a /* x */ b', '/* incomplete', 'a/**/{}'):
+            self.assertEqual(list(tokenizer.tokenize(css, True)),
+                             list(singlepass.tokenize(css, True)))
+
+    def test_lazypositions(self):
+        "css_parser Tokenizer(lazyPositions=True).tokenize()"
+        tokenizer = Tokenizer()
+        lazy = Tokenizer(lazyPositions=True)
+        tests = {}
+        tests.update(self.testsall)
+        tests.update(self.tests2)
+        tests.update(self.tests3)
+        tests.update(self.testsfullsheet)
+        tests.update(self.testsfullsheettrue)
+        tests.update({
+            '\xef\xbb\xbf@charset "x";\na {}': None,
+            'a\n /* x\n y': None,
+        })
+        for css in tests:
+            for fullsheet in (False, True):
+                expected = list(tokenizer.tokenize(css, fullsheet))
+                tokens = list(lazy.tokenize(css, fullsheet))
+                self.assertEqual(expected, [tokenize2.resolve(t) for t in tokens])
+                self.assertEqual([t[2:] for t in expected],
+                                 [tokenize2.linecol(t[2], t[3]) for t in tokens])
+
+        tokens = list(lazy.tokenize('a\n  b'))
+        self.assertEqual(('IDENT', 'b', 4), tokens[2][:3])
+        self.assertTrue(isinstance(tokens[2][3], tokenize2.LineIndex))
+        self.assertEqual((2, 3), tokens[2][3].position(4))
+
+    def test_spans(self):
+        "css_parser Tokenizer().spans()"
+        tokenizer = Tokenizer()
+        tests = {}
+        tests.update(self.testsall)
+        tests.update(self.tests2)
+        tests.update(self.tests3)
+        tests.update(self.testsfullsheet)
+        tests.update(self.testsfullsheettrue)
+        for css in tests:
+            for fullsheet in (False, True):
+                tokens = list(tokenizer.tokenize(css, fullsheet))
+                spans = list(tokenizer.spans(css, fullsheet))
+                self.assertEqual([t[:2] for t in tokens],
+                                 [(s.type, s.value) for s in spans])
+
+        css = 'a\n  b\\,c "x'
+        index = tokenize2.LineIndex(css)
+        spans = list(tokenizer.spans(css, fullsheet=True))
+        self.assertEqual([('IDENT', 0, 1, ''),
+                          ('S', 1, 4, ''),
+                          ('IDENT', 4, 8, ''),
+                          ('S', 8, 9, ''),
+                          ('STRING', 9, 11, '"'),
+                          ('EOF', 11, 11, '')],
+                         [(s.type, s.start, s.end, s.suffix) for s in spans])
+        self.assertEqual('b\\,c', spans[2].value)
+        self.assertEqual(('IDENT', 'b\\,c', 2, 3), spans[2].token(index))
+        self.assertEqual(('STRING', '"x"', None, None), spans[4].token())
+
+    def test_tokenizechunks(self):
+        "css_parser Tokenizer().tokenizeChunks()"
+        def chunks(css, size):
+            return [css[i:i + size] for i in range(0, len(css), size)]
+
+        tests = {}
+        tests.update(self.testsall)
+        tests.update(self.tests2)
+        tests.update(self.tests3)
+        tests.update(self.testsfullsheet)
+        tests.update(self.testsfullsheettrue)
+        tests.update({
+            'a{b:url(' + 'x' * 200 + ')}': None,
+            'a\n/* x\n y': None,
+            '@media (aspect-ratio:  16   /  9) {}': None,
+            ' ' * 100 + 'x\\41 b': None,
+        })
+        for lazyPositions in (False, True):
+            tokenizer = Tokenizer(lazyPositions=lazyPositions)
+            for css in tests:
+                for fullsheet in (False, True):
+                    exp = [tokenize2.resolve(t)
+                           for t in tokenizer.tokenize(css, fullsheet)]
+                    for size in (1, 3, 100):
+                        tokens = [tokenize2.resolve(t) for t in
+                                  tokenizer.tokenizeChunks(chunks(css, size),
+                                                           fullsheet)]
+                        self.assertEqual(exp[:-1], tokens[:-1])
+                        self.assertEqual([t[:2] for t in exp[-1:]],
+                                         [t[:2] for t in tokens[-1:]])
+
+    def test_tokenizechunkssplits(self):
+        "css_parser Tokenizer().tokenizeChunks() split at any position"
+        pad = '/**/' + ' ' * 70
+        tests = (
+            pad + 'a{b:aurl(16/92)}',
+            pad + '@media (16/9) and ( 4 / 3 ) {}',
+            pad + 'a { b: url( "x" ) c\\(d e(1) }',
+            pad + 'a{b:"x\\\n y"}',
+            pad + '/* \\41',
+            pad + '@charset "x"; a { x: 1e3 } #a\\ b',
+        )
+        tokenizer = Tokenizer()
+        for css in tests:
+            css += pad
+            for fullsheet in (False, True):
+                exp = list(tokenizer.tokenize(css, fullsheet))
+                for i in range(len(css)):
+                    for j in (i, i + 1, i + 70):
+                        chunks = [css[:i], css[i:j], css[j:]]
+                        tokens = list(tokenizer.tokenizeChunks(chunks,
+                                                               fullsheet))
+                        self.assertEqual([t[:2] for t in exp],
+                                         [t[:2] for t in tokens],
+                                         (css, i, j))
+
     # --------------
 
     def __old(self):
@@ -696,6 +839,20 @@ class TokenizerUtilsTestCase(basetest.BaseTestCase):
         ('foobar', 10, 'bar', False),
     ]
 
+    def test_firstchars(self):
+        "tokenize2._firstchars()"
+        tests = [
+            ('a', frozenset([ord('a')])),
+            ('a|[bc]', frozenset([ord('a'), ord('b'), ord('c')])),
+            ('-?x', frozenset([ord('-'), ord('x')])),
+            ('(?<!\\()\\s*1', None),
+            ('(?<!\\() *1', frozenset([ord(' '), ord('1')])),
+            ('[^\\0-\\177]', frozenset()),
+            ('a*', None),
+        ]
+        for pattern, expected in tests:
+            self.assertEqual(tokenize2._firstchars(pattern), expected)
+
 
 if __name__ == '__main__':
     import unittest
@@ -6,7 +6,8 @@ import sys
 from contextlib import contextmanager
 from email.message import Message
 
-from css_parser.util import Base, LazyRegex, ListSeq, _defaultFetcher, _readUrl
+from css_parser.tokenize2 import LineIndex
+from css_parser.util import Base, Item, LazyRegex, ListSeq, Seq, _defaultFetcher, _readUrl
 
 from . import basetest
 
@@ -49,6 +50,35 @@ class ListSeqTestCase(basetest.BaseTestCase):
             self.assertEqual(2, x)
 
 
+class ItemTestCase(basetest.BaseTestCase):
+
+    def test_linecol(self):
+        "util.Item.line and col"
+        item = Item('a', 'IDENT', 1, 2)
+        self.assertEqual((1, 2), (item.line, item.col))
+
+        # (offset, LineIndex) computed lazily
+        item = Item('b', 'IDENT', 6, LineIndex('a {\n  b: 1 }'))
+        self.assertEqual((2, 3), (item.line, item.col))
+        self.assertTrue(repr(item).endswith("line=2, col=3)"))
+
+    def test_slots(self):
+        "util.Item and Seq have no __dict__"
+        import pickle
+        item = Item('b', 'IDENT', 6, LineIndex('a {\n  b: 1 }'))
+        self.assertFalse(hasattr(item, '__dict__'))
+        self.assertRaises(AttributeError, setattr, item, 'x', 1)
+        seq = Seq(readonly=False)
+        seq.appendItem(item)
+        self.assertFalse(hasattr(seq, '__dict__'))
+
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            seq2 = pickle.loads(pickle.dumps(seq, protocol))
+            self.assertEqual(False, seq2._readonly)
+            self.assertEqual([('b', 'IDENT', 2, 3)],
+                             [(i.value, i.type, i.line, i.col) for i in seq2])
+
+
 class BaseTestCase(basetest.BaseTestCase):
 
     def test_normalize(self):
@@ -130,6 +160,12 @@ class BaseTestCase(basetest.BaseTestCase):
             res = ''.join([t[1] for t in restokens])
             self.assertEqual(exp, res)
 
+            # same end found in a list
+            if 'default' == typ or typ in b._scanners:
+                scanner = b._scanners['default' != typ and typ or None]
+                self.assertEqual(restokens, tokens[:scanner.find(tokens)])
+                self.assertEqual(restokens, scanner.collect(iter(tokens)))
+
 
 class _readUrl_TestCase(basetest.BaseTestCase):
     """needs mock"""
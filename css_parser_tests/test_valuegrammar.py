@@ -0,0 +1,96 @@
+"""Testcases for css_parser.valuegrammar."""
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import pickle
+from . import basetest
+import css_parser
+from css_parser.profiles import Profiles
+from css_parser.valuegrammar import ValueGrammar, components
+
+MACROS = {'length': r'0|-?\d+(px|em)', 'color': r'red|#[0-9a-f]{3}|rgb\(.*\)'}
+
+
+class ValueGrammarTestCase(basetest.BaseTestCase):
+
+    def test_components(self):
+        "valuegrammar.components()"
+        self.assertEqual([('DIMENSION', '1px'), ('CHAR', ','),
+                          ('FUNCTION', 'rgb(1, (2), 3)'), ('CHAR', '/'),
+                          ('STRING', '"a b"'), ('URI', 'url(x)'),
+                          ('FUNCTION', 'f(1')],
+                         components('1px, rgb(1, (2), 3)/ /**/ "a b" url(x) '
+                                    'f(1'))
+
+    def test_syntax(self):
+        "ValueGrammar syntax errors"
+        for grammar in ('a |', '[ a', 'a ]', '| a', 'a $', '<a', ''):
+            self.assertRaises(ValueError, ValueGrammar, grammar)
+        g = ValueGrammar('<x>')
+        self.assertRaises(ValueError, g.compile, MACROS)
+        self.assertRaises(ValueError, ValueGrammar, '<x>', {'x': 'a <x>'})
+
+    def test_match(self):
+        "ValueGrammar.compile()"
+        tests = {
+            'none | <length>{2,3} <color>?': (
+                ('none', '1px 2px', '1px 2px 3px red', '0 0 #fff', 'NONE'),
+                ('', '1px', 'none none', '1px 2px 3px 4px', 'red 1px 2px')),
+            '<length>#': (
+                ('0', '1px,2px', '1px , 2px, 0'),
+                ('1px 2px', '1px,', ', 1px', '1px,,2px')),
+            '[ a | b ]* c+ / <x>{1,}': (
+                ('c/a', 'a b a c c / a a', 'c/ rgb(1,2) A'),
+                ('a b c', 'c /', 'c d/a', '/a')),
+            '<x>?': (('', 'A', 'rgb(1)'), ('a a', '1px')),
+        }
+        for grammar, (valid, invalid) in tests.items():
+            matcher = ValueGrammar(grammar, {'x': 'a | <color>'}).compile(
+                MACROS)
+            for value in valid:
+                self.assertTrue(matcher(value), (grammar, value))
+            for value in invalid:
+                self.assertFalse(matcher(value), (grammar, value))
+
+    def test_linear(self):
+        "ValueGrammar matching does not backtrack"
+        matcher = ValueGrammar('[ <string> | <x>+ ]#',
+                               {'x': '<ident>'}).compile(
+            {'ident': r'[a-z][a-z0-9]*', 'string': r'"[^"]*"'})
+        self.assertTrue(matcher(', '.join(['a b c'] * 1000)))
+        self.assertFalse(matcher(', '.join(['a b c'] * 1000) + ', 1'))
+        self.assertFalse(matcher('a ' * 1000 + '1'))
+
+    def test_profiles(self):
+        "Profiles(useGrammars=True)"
+        regexes = css_parser.profile
+        p = Profiles(useGrammars=True)
+        tests = [
+            ('font-family', '"a b", Arial Black, sans-serif'),
+            ('font-family', 'Arial, 1'),
+            ('font', 'italic bold 12px/1.5 Arial, sans-serif'),
+            ('font', 'bold 12px'),
+            ('background', 'url(x.gif) no-repeat left top #fff'),
+            ('background', 'red blue x'),
+            ('box-shadow', 'inset 1px 2px rgb(1, 2, 3), 0 0 3px 4px red'),
+            ('box-shadow', '1px 2px, none'),
+            ('text-shadow', '1px 2px red'),
+            ('color', 'red'),
+        ]
+        for name, value in tests:
+            self.assertEqual(regexes.validateWithProfile(name, value),
+                             p.validateWithProfile(name, value))
+
+        # custom profiles may use grammars too
+        p.addProfile('test', {'-x': ValueGrammar('<length> <color>?')})
+        self.assertTrue(p.validate('-x', '1px red'))
+        self.assertFalse(p.validate('-x', 'red'))
+
+        p = pickle.loads(pickle.dumps(p))
+        self.assertTrue(p.validate('-x', '1px red'))
+        self.assertTrue(p.validate('font-family', 'a, b'))
+
+
+if __name__ == '__main__':
+    import unittest
+    unittest.main()
@@ -200,6 +200,13 @@ def parseFile(*a, **k):
 parseFile.__doc__ = CSSParser.parseFile.__doc__
 
 
+def parseFiles(filenames, workers=None, **k):
+    return CSSParser().parseMany(filenames, workers=workers, **k)
+
+
+parseFiles.__doc__ = CSSParser.parseMany.__doc__
+
+
 def parseUrl(*a, **k):
     return CSSParser().parseUrl(*a, **k)
 
@@ -222,6 +229,12 @@ def setSerializer(serializer):
     ser = serializer
 
 
+def _mayHaveUrls(property):
+    "Return False if the value of `property` is not parsed and has no url()"
+    tokens = property._valuetokens
+    return tokens is None or any(t[0] == 'URI' for t in tokens)
+
+
 def getUrls(sheet):
     """Retrieve all ``url(urlstring)`` values (in e.g.
     :class:`css_parser.css.CSSImportRule` or :class:`css_parser.css.CSSValue`
@@ -247,6 +260,8 @@ def getUrls(sheet):
 
     for style in styleDeclarations(sheet):
         for p in style.getProperties(all=True):
+            if not _mayHaveUrls(p):
+                continue
             for v in p.propertyValue:
                 if v.type == 'URI':
                     yield v.uri
@@ -269,7 +284,9 @@ def replaceUrls(sheetOrStyle, replacer, ignoreImportRules=False):
     if not ignoreImportRules and not isinstance(sheetOrStyle,
                                                 css.CSSStyleDeclaration):
         for importrule in (r for r in sheetOrStyle if r.type == r.IMPORT_RULE):
-            importrule.href = replacer(importrule.href)
+            href = replacer(importrule.href)
+            if href != importrule.href:
+                importrule.href = href
 
     def styleDeclarations(base):
         "recursive generator to find all CSSStyleDeclarations"
@@ -285,9 +302,14 @@ def replaceUrls(sheetOrStyle, replacer, ignoreImportRules=False):
 
     for style in styleDeclarations(sheetOrStyle):
         for p in style.getProperties(all=True):
+            if not _mayHaveUrls(p):
+                continue
             for v in p.propertyValue:
                 if v.type == v.URI:
-                    v.uri = replacer(v.uri)
+                    uri = replacer(v.uri)
+                    if uri != v.uri:
+                        # unchanged values keep their source
+                        v.uri = uri
 
 
 def resolveImports(sheet, target=None):
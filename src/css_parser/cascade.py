@@ -0,0 +1,454 @@
+"""Cascade of the declarations of style sheets and style attributes for the
+elements of a document.
+
+:class:`Cascade` finds the style rules matching an element with a
+:class:`~css_parser.ruleindex.RuleIndex` and
+:mod:`~css_parser.selectormatch` and returns the winning
+:class:`~css_parser.css.Property` for each property name, ordered by origin
+and importance, specificity and source order as in
+http://www.w3.org/TR/css-cascade-3/#cascading
+
+Example::
+
+    import xml.etree.ElementTree as ET
+    from css_parser.selectormatch import ElementTreeAdapter
+    root = ET.fromstring('<div><p class="a" style="color: red">x</p></div>')
+    cascade = Cascade(ElementTreeAdapter(root), [sheet])
+    cascade.style(root[0])['color'].value  # 'red'
+
+:meth:`Cascade.style` returns the declarations which apply to an element
+itself, :meth:`Cascade.computedStyle` adds the inherited properties of the
+parent element. Values are not computed, e.g. ``em`` lengths are kept as
+they are.
+"""
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import itertools
+from collections import OrderedDict
+from collections.abc import Mapping
+
+import css_parser
+
+from .ruleindex import RuleIndex
+from .selectormatch import AncestorFilter, compileSelector
+
+__all__ = ['Cascade', 'ComputedStyle', 'INHERITED']
+__docformat__ = 'restructuredtext'
+__version__ = '$Id$'
+
+USER_AGENT = 'user-agent'
+USER = 'user'
+AUTHOR = 'author'
+
+# rank of normal declarations of each origin, important declarations are in
+# reverse order after all normal ones
+_ORIGINS = (USER_AGENT, USER, AUTHOR)
+
+# specificity of a style attribute
+_INLINE = (1, 0, 0, 0)
+
+# names of properties which are inherited by default
+INHERITED = frozenset((
+    'azimuth', 'border-collapse', 'border-spacing', 'caption-side', 'color',
+    'cursor', 'direction', 'elevation', 'empty-cells', 'font',
+    'font-family', 'font-feature-settings', 'font-kerning', 'font-size',
+    'font-size-adjust', 'font-stretch', 'font-style', 'font-variant',
+    'font-weight', 'hyphens', 'letter-spacing', 'line-height', 'list-style',
+    'list-style-image', 'list-style-position', 'list-style-type', 'orphans',
+    'overflow-wrap', 'pitch', 'pitch-range', 'quotes', 'richness', 'speak',
+    'speak-header', 'speak-numeral', 'speak-punctuation', 'speech-rate',
+    'stress', 'tab-size', 'text-align', 'text-align-last', 'text-indent',
+    'text-justify', 'text-shadow', 'text-transform', 'visibility',
+    'voice-family', 'volume', 'white-space', 'widows', 'word-break',
+    'word-spacing', 'word-wrap', 'writing-mode'))
+
+
+def _mediaMatches(mediaList, medium):
+    """Return if `mediaList` applies to media type `medium`. Media features
+    like ``(min-width: 10em)`` cannot be evaluated and are assumed to
+    apply."""
+    if mediaList is None or not mediaList.length:
+        return True
+    for item in mediaList:
+        seq = item.value.seq
+        idents = [part.value.lower() for part in seq if part.type == 'IDENT']
+        negated = idents[:1] == ['not']
+        if idents[:1] in (['not'], ['only']):
+            idents = idents[1:]
+        if idents and seq[0].type == 'IDENT':
+            matches = idents[0] in ('all', medium)
+        else:
+            # media features only
+            matches = True
+        if matches != negated:
+            return True
+    return False
+
+
+class ComputedStyle(Mapping):
+    """Immutable mapping of property name to the
+    :class:`~css_parser.css.Property` applying to an element: the winning
+    declarations of the element itself and the ones of :data:`INHERITED`
+    properties of its parent.
+
+    Elements with the same matched rules, style attribute and parent style
+    share one ComputedStyle, neither it nor its Property objects may be
+    changed.
+
+    Properties are inherited by their own name only, e.g. an inherited
+    ``font`` of the parent and a ``font-size`` of the element are both
+    kept, see :class:`Cascade`.
+
+    id
+        number identifying the style during the lifetime of the process
+    parent
+        ComputedStyle of the parent element or ``None``
+    """
+    __slots__ = ('_properties', 'id', 'parent')
+
+    _ids = itertools.count(1)
+
+    def __init__(self, declarations, parent=None):
+        """
+        :param declarations:
+            dict of the winning Property of the element by name
+        :param parent:
+            ComputedStyle of the parent element
+        """
+        properties = {}
+        if parent is not None:
+            for name, property in parent.items():
+                if name in INHERITED:
+                    properties[name] = property
+        for name, property in declarations.items():
+            value = property.value
+            if value == 'inherit' or value == 'unset' and name in INHERITED:
+                if parent is not None and name in parent:
+                    properties[name] = parent[name]
+                else:
+                    properties.pop(name, None)
+            elif value == 'unset':
+                properties.pop(name, None)
+            else:
+                properties[name] = property
+        self._properties = properties
+        self.id = next(self._ids)
+        self.parent = parent
+
+    def __getitem__(self, name):
+        return self._properties[name]
+
+    def __iter__(self):
+        return iter(self._properties)
+
+    def __len__(self):
+        return len(self._properties)
+
+    def __repr__(self):
+        return "<css_parser.cascade.%s id=%r properties=%r>" % (
+            self.__class__.__name__, self.id, sorted(self._properties))
+
+
+class Cascade(object):
+    """Resolves the declarations applying to the elements of a document.
+
+    The style sheets are used as they are when added, later changes of them
+    are not reflected.
+
+    Resolved declarations are memoized for each set of matched selectors
+    and style attribute, elements matching the same rules share the work.
+    The last `cacheSize` computed styles are kept by their matched
+    selectors, style attribute and parent style so e.g. all similar
+    paragraphs of a chapter share one :class:`ComputedStyle`. The memos
+    of resolved declarations and parsed style attributes are limited to
+    `cacheSize` items each too.
+
+    Shorthand properties are not expanded, a declaration only wins over
+    declarations of the same property name. So e.g. for
+    ``p { margin-left: 5px } p { margin: 0 }`` both ``margin-left`` and
+    ``margin`` are returned and the caller has to combine them.
+    """
+    def __init__(self, adapter, sheets=(), medium=None, parser=None,
+                 cacheSize=4096):
+        """
+        :param adapter:
+            :class:`~css_parser.selectormatch.ElementAdapter` of the document
+        :param sheets:
+            iterable of author :class:`~css_parser.css.CSSStyleSheet`, in
+            document order
+        :param medium:
+            media type like ``'screen'`` or ``'print'`` the rules of
+            @media rules and @import rules must apply to, if ``None`` all
+            rules are used
+        :param parser:
+            :class:`~css_parser.CSSParser` used for style attributes
+        :param cacheSize:
+            maximum number of computed styles (and of resolved
+            declarations and parsed style attributes each) kept for
+            sharing, ``0`` disables sharing
+        """
+        self.adapter = adapter
+        self.medium = medium
+        self._parser = parser or css_parser.CSSParser()
+        self._index = RuleIndex()
+        self._origins = []
+        # by IndexedSelector.order: CompiledSelector or None if not in medium
+        self._compiled = {}
+        # memos limited to cacheSize items each like _cache
+        self._inline = OrderedDict()
+        self._resolved = OrderedDict()
+        # shared styles: {(orders, style attribute, parent id): style, ...}
+        self._cacheSize = cacheSize
+        self._cache = OrderedDict()
+        self._cacheHits = 0
+        self._cacheMisses = 0
+        for sheet in sheets:
+            self.addSheet(sheet)
+
+    def __repr__(self):
+        return "<css_parser.cascade.%s selectors=%r medium=%r>" % (
+            self.__class__.__name__, len(self._index), self.medium)
+
+    def addSheet(self, sheet, origin=AUTHOR):
+        """Add the style rules of `sheet` after the ones of sheets already
+        added.
+
+        :param origin:
+            one of ``'user-agent'``, ``'user'`` or ``'author'``
+        """
+        if origin not in _ORIGINS:
+            raise ValueError('Cascade: Unknown origin: %r' % origin)
+        count = len(self._index)
+        self._index.addSheet(sheet)
+        self._origins.extend([_ORIGINS.index(origin)] *
+                             (len(self._index) - count))
+
+    def _inMedium(self, rule):
+        # if all @media and @import rules `rule` is in apply to the medium
+        medium = self.medium
+        while rule is not None:
+            parent = rule.parentRule
+            if parent is None:
+                sheet = rule.parentStyleSheet
+                if sheet is None:
+                    break
+                if not _mediaMatches(sheet.media, medium):
+                    return False
+                parent = sheet.ownerRule
+                if parent is not None and not _mediaMatches(parent.media,
+                                                            medium):
+                    return False
+            elif parent.type == parent.MEDIA_RULE and not _mediaMatches(
+                    parent.media, medium):
+                return False
+            rule = parent
+        return True
+
+    def _compile(self, indexed):
+        if self.medium is not None and not self._inMedium(indexed.rule):
+            compiled = None
+        else:
+            compiled = compileSelector(indexed.selector, self.adapter)
+        self._compiled[indexed.order] = compiled
+        return compiled
+
+    def matching(self, element, pseudoElement=None, ancestors=None):
+        """Return list of :class:`~css_parser.ruleindex.IndexedSelector` of
+        the selectors matching `element` in source order.
+
+        :param pseudoElement:
+            name of a pseudo-element like ``'::before'`` to return the
+            selectors of instead of the ones of the element itself
+        :param ancestors:
+            :class:`~css_parser.selectormatch.AncestorFilter` of the
+            ancestors of `element`, selectors requiring ancestors which are
+            not in it are rejected without walking up the document
+        """
+        adapter = self.adapter
+        compiled = self._compiled
+        result = []
+        for indexed in self._index.candidates(adapter.tag(element),
+                                              adapter.classes(element),
+                                              adapter.id(element)):
+            try:
+                selector = compiled[indexed.order]
+            except KeyError:
+                selector = self._compile(indexed)
+            if (selector is not None and
+                    selector.pseudoElement == pseudoElement and
+                    (ancestors is None or selector.mayMatch(ancestors)) and
+                    selector.match(element)):
+                result.append(indexed)
+        return result
+
+    def _inlineStyle(self, styleText):
+        # parsed style attributes are shared by their text
+        return self._memo(self._inline, styleText, self._parser.parseStyle,
+                          styleText)
+
+    def _memo(self, memo, key, function, *args):
+        # return memo[key], the result of function(*args) if not kept, the
+        # least recently used item is removed if more than cacheSize are
+        if not self._cacheSize:
+            return function(*args)
+        try:
+            value = memo[key]
+        except KeyError:
+            value = memo[key] = function(*args)
+            if len(memo) > self._cacheSize:
+                memo.popitem(last=False)
+        else:
+            memo.move_to_end(key)
+        return value
+
+    def style(self, element, pseudoElement=None):
+        """Return dict of the winning :class:`~css_parser.css.Property` of
+        each property name set for `element`.
+
+        Declarations in the style attribute of the element (ignored for a
+        pseudo-element) are author declarations with a higher specificity
+        than any selector. Shorthand and longhand properties are resolved
+        independently of each other.
+
+        :param pseudoElement:
+            name of a pseudo-element like ``'::before'`` to return the style
+            of instead of the one of the element itself
+        """
+        return dict(self._declarations(element, pseudoElement)[1])
+
+    def _declarations(self, element, pseudoElement, ancestors=None):
+        # return (key, dict of winning declarations)
+        matched = self.matching(element, pseudoElement, ancestors)
+        if pseudoElement is None:
+            styleText = self.adapter.attr(element, 'style')
+        else:
+            styleText = None
+        key = (tuple(indexed.order for indexed in matched), styleText)
+        return key, self._memo(self._resolved, key, self._resolve, matched,
+                               styleText)
+
+    def computedStyle(self, element, parentStyle=None, pseudoElement=None):
+        """Return :class:`ComputedStyle` of `element`.
+
+        :param parentStyle:
+            ComputedStyle of the parent element (or of `element` for a
+            pseudo-element), if not given it is computed too which is
+            expensive for many elements, pass it when walking a document
+        :param pseudoElement:
+            name of a pseudo-element like ``'::before'`` to return the style
+            of instead of the one of the element itself
+        """
+        if parentStyle is None:
+            if pseudoElement is not None:
+                parentStyle = self.computedStyle(element)
+            else:
+                parent = self.adapter.parent(element)
+                if parent is not None:
+                    parentStyle = self.computedStyle(parent)
+
+        return self._shared(element, parentStyle, pseudoElement)
+
+    def _shared(self, element, parentStyle, pseudoElement=None,
+                ancestors=None):
+        # return computed style, shared with elements with the same matched
+        # selectors, style attribute and parent style
+        key, declarations = self._declarations(element, pseudoElement,
+                                               ancestors)
+        if not self._cacheSize:
+            return ComputedStyle(declarations, parentStyle)
+
+        key += (parentStyle.id if parentStyle is not None else 0,)
+        try:
+            style = self._cache[key]
+        except KeyError:
+            self._cacheMisses += 1
+            style = self._cache[key] = ComputedStyle(declarations,
+                                                     parentStyle)
+            if len(self._cache) > self._cacheSize:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(key)
+            self._cacheHits += 1
+        return style
+
+    def walk(self, root, parentStyle=None):
+        """Yield ``(element, ComputedStyle)`` for `root` and all elements
+        below it in document order.
+
+        The style of the parent of each element is reused and an
+        :class:`~css_parser.selectormatch.AncestorFilter` of the ancestors
+        is maintained which rejects most selectors with descendant or child
+        combinators quickly.
+
+        :param parentStyle:
+            ComputedStyle of the parent of `root`, computed if not given
+        """
+        adapter = self.adapter
+        ancestors = AncestorFilter(adapter)
+        parents = []
+        parent = adapter.parent(root)
+        while parent is not None:
+            parents.append(parent)
+            parent = adapter.parent(parent)
+        for parent in reversed(parents):
+            ancestors.push(parent)
+        if parentStyle is None and parents:
+            parentStyle = self.computedStyle(parents[0])
+
+        # None marks the end of the children of the last pushed element
+        stack = [(root, parentStyle)]
+        while stack:
+            item = stack.pop()
+            if item is None:
+                ancestors.pop()
+                continue
+            element, parentStyle = item
+            style = self._shared(element, parentStyle, ancestors=ancestors)
+            yield element, style
+            children = adapter.children(element)
+            if children:
+                ancestors.push(element)
+                stack.append(None)
+                stack.extend((child, style) for child in reversed(children))
+
+    def clearCache(self):
+        """Remove all kept computed styles, resolved declarations and
+        parsed style attributes."""
+        self._cache.clear()
+        self._resolved.clear()
+        self._inline.clear()
+
+    cacheHits = property(lambda self: self._cacheHits,
+                         doc="Number of computed styles shared from the "
+                             "cache.")
+
+    cacheMisses = property(lambda self: self._cacheMisses,
+                           doc="Number of computed styles not found in the "
+                               "cache.")
+
+    def _resolve(self, matched, styleText):
+        # sort all declarations by the cascade, later ones win
+        declarations = []
+        origins = self._origins
+        for indexed in matched:
+            origin = origins[indexed.order]
+            specificity = indexed.specificity
+            for property in indexed.rule.style.getProperties():
+                declarations.append((self._rank(origin, property),
+                                     specificity, indexed.order, property))
+        if styleText:
+            order = len(self._index)
+            for property in self._inlineStyle(styleText).getProperties():
+                declarations.append((self._rank(_ORIGINS.index(AUTHOR),
+                                                 property),
+                                     _INLINE, order, property))
+        declarations.sort(key=lambda declaration: declaration[:3])
+        return dict((declaration[3].name, declaration[3])
+                    for declaration in declarations)
+
+    def _rank(self, origin, property):
+        # normal: user-agent, user, author; then important: author, user,
+        # user-agent
+        if property.priority:
+            return 2 * len(_ORIGINS) - 1 - origin
+        return origin
@@ -73,7 +73,8 @@ class CSSCharsetRule(cssrule.CSSRule):
 
     def _getCssText(self):
         """The parsable textual representation."""
-        return css_parser.ser.do_CSSCharsetRule(self)
+        ser = css_parser.ser
+        return ser._cached(self, ser.do_CSSCharsetRule)
 
     def _setCssText(self, cssText):
         """
@@ -152,6 +153,7 @@ class CSSCharsetRule(cssrule.CSSRule):
                                 % encoding)
             else:
                 self._encoding = encoding.lower()
+                self._changed()
 
     encoding = property(lambda self: self._encoding, _setEncoding,
                         doc="(DOM)The encoding information used in this @charset rule.")
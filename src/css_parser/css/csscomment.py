@@ -47,7 +47,8 @@ class CSSComment(cssrule.CSSRule):
 
     def _getCssText(self):
         """Return serialized property cssText."""
-        return css_parser.ser.do_CSSComment(self)
+        ser = css_parser.ser
+        return ser._cached(self, ser.do_CSSComment)
 
     def _setCssText(self, cssText):
         """
@@ -79,6 +80,7 @@ class CSSComment(cssrule.CSSRule):
                             error=xml.dom.InvalidModificationErr)
         else:
             self._cssText = self._tokenvalue(commenttoken)
+            self._changed()
 
     cssText = property(_getCssText, _setCssText,
                        doc="The parsable textual representation of this rule.")
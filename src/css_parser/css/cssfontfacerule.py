@@ -71,7 +71,8 @@ class CSSFontFaceRule(cssrule.CSSRule):
 
     def _getCssText(self):
         """Return serialized property cssText."""
-        return css_parser.ser.do_CSSFontFaceRule(self)
+        ser = css_parser.ser
+        return ser._cached(self, ser.do_CSSFontFaceRule)
 
     def _setCssText(self, cssText):
         """
@@ -163,6 +164,7 @@ class CSSFontFaceRule(cssrule.CSSRule):
         else:
             style._parentRule = self
             self._style = style
+        self._changed()
 
     style = property(lambda self: self._style, _setStyle,
                      doc="(DOM) The declaration-block of this rule set, "
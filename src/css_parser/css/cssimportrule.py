@@ -47,7 +47,7 @@ class CSSImportRule(cssrule.CSSRule):
         self._styleSheet = None
 
         # string or uri used for reserialization
-        self.hreftype = None
+        self._hreftype = None
 
         # prepare seq
         seq = self._tempSeq()
@@ -97,7 +97,8 @@ class CSSImportRule(cssrule.CSSRule):
 
     def _getCssText(self):
         """Return serialized property cssText."""
-        return css_parser.ser.do_CSSImportRule(self)
+        ser = css_parser.ser
+        return ser._cached(self, ser.do_CSSImportRule)
 
     def _setCssText(self, cssText):
         """
@@ -260,8 +261,18 @@ class CSSImportRule(cssrule.CSSRule):
     cssText = property(fget=_getCssText, fset=_setCssText,
                        doc="(DOM) The parsable textual representation of this rule.")
 
+    def _setHreftype(self, hreftype):
+        self._hreftype = hreftype
+        self._changed()
+
+    hreftype = property(lambda self: self._hreftype, _setHreftype,
+                        doc="``'string'`` or ``'uri'`` (or ``None``), format "
+                            "of the href when reserialized, see also "
+                            "Preferences.importHrefFormat.")
+
     def _setHref(self, href):
-        # set new href
+        # set new href, may be the same to load the sheet again
+        changed = href != self._href
         self._href = href
         # update seq
         for i, item in enumerate(self.seq):
@@ -320,6 +331,8 @@ class CSSImportRule(cssrule.CSSRule):
                 self.hrefFound = True
 
         self._styleSheet = importedSheet
+        if changed:
+            self._changed()
 
     _href = None  # needs to be set
     href = property(lambda self: self._href, _setHref,
@@ -350,6 +363,7 @@ class CSSImportRule(cssrule.CSSRule):
             # if no media until now add after href
             self.seq.insert(ihref+1,
                             self._media, 'media', None, None)
+        self._changed()
 
     media = property(lambda self: self._media, _setMedia,
                      doc="(DOM) A list of media types for this rule "
@@ -376,6 +390,7 @@ class CSSImportRule(cssrule.CSSRule):
             # set title of imported sheet
             if self.styleSheet:
                 self.styleSheet.title = name
+            self._changed()
 
         else:
             self._log.error('CSSImportRule: Not a valid name: %s' % name)
@@ -61,7 +61,8 @@ class CSSMediaRule(cssrule.CSSRuleRules):
 
     def _getCssText(self):
         """Return serialized property cssText."""
-        return css_parser.ser.do_CSSMediaRule(self)
+        ser = css_parser.ser
+        return ser._cached(self, ser.do_CSSMediaRule)
 
     def _setCssText(self, cssText):
         """
@@ -174,7 +175,8 @@ class CSSMediaRule(cssrule.CSSRuleRules):
                     rule = css_parser.css.CSSStyleRule(
                             parentRule=self,
                             parentStyleSheet=self.parentStyleSheet)
-                    rule.cssText = self._tokensupto2(tokenizer, token)
+                    rule._setTokens(self._scanners[None].collect(tokenizer,
+                                                                 token))
                     if rule.wellformed:
                         self.insertRule(rule)
                     return expected
@@ -199,6 +201,7 @@ class CSSMediaRule(cssrule.CSSRuleRules):
                             parentRule=self,
                             parentStyleSheet=self.parentStyleSheet)
                         rule.cssText = tokens
+                        rule._keepSource(tokens)
                         if rule.wellformed:
                             self.insertRule(rule)
                     else:
@@ -206,6 +209,7 @@ class CSSMediaRule(cssrule.CSSRuleRules):
                                 tokens,
                                 parentRule=self,
                                 parentStyleSheet=self.parentStyleSheet)
+                        rule._keepSource(tokens)
                         if rule.wellformed:
                             self.insertRule(rule)
                     return expected
@@ -252,6 +256,7 @@ class CSSMediaRule(cssrule.CSSRuleRules):
                 name = None
 
             self._name = name
+            self._changed()
         else:
             self._log.error('CSSImportRule: Not a valid name: %s' % name)
 
@@ -272,6 +277,7 @@ class CSSMediaRule(cssrule.CSSRuleRules):
         else:
             media._parentRule = self
             self._media = media
+        self._changed()
 
         # NOT IN @media seq at all?!
 #        # update seq
@@ -101,7 +101,8 @@ class CSSNamespaceRule(cssrule.CSSRule):
 
     def _getCssText(self):
         """Return serialized property cssText"""
-        return css_parser.ser.do_CSSNamespaceRule(self)
+        ser = css_parser.ser
+        return ser._cached(self, ser.do_CSSNamespaceRule)
 
     def _setCssText(self, cssText):
         """
@@ -240,6 +241,11 @@ class CSSNamespaceRule(cssrule.CSSRule):
     namespaceURI = property(lambda self: self._namespaceURI, _setNamespaceURI,
                             doc="URI (handled as simple string) of the defined namespace.")
 
+    def _changed(self):
+        super(CSSNamespaceRule, self)._changed()
+        if self.parentStyleSheet is not None:
+            self.parentStyleSheet._namespacesChanged()
+
     def _replaceNamespaceURI(self, namespaceURI):
         """Used during parse of new sheet only!
 
@@ -252,6 +258,7 @@ class CSSNamespaceRule(cssrule.CSSRule):
                 self._seq.replace(i, namespaceURI, 'namespaceURI')
                 self._seq._readonly = True
                 break
+        self._changed()
 
     def _setPrefix(self, prefix=None):
         """
@@ -287,6 +294,7 @@ class CSSNamespaceRule(cssrule.CSSRule):
 
         # set new prefix
         self._prefix = prefix
+        self._changed()
 
     prefix = property(lambda self: self._prefix, _setPrefix,
                       doc="Prefix used for the defined namespace.")
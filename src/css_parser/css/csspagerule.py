@@ -278,7 +278,8 @@ class CSSPageRule(cssrule.CSSRuleRules):
 
     def _getCssText(self):
         """Return serialized property cssText."""
-        return css_parser.ser.do_CSSPageRule(self)
+        ser = css_parser.ser
+        return ser._cached(self, ser.do_CSSPageRule)
 
     def _setCssText(self, cssText):
         """
@@ -351,6 +352,7 @@ class CSSPageRule(cssrule.CSSRuleRules):
                 self.cssRules = css_parser.css.CSSRuleList()
                 for r in cssRules:
                     self.cssRules.append(r)
+                self._changed()
 
     cssText = property(_getCssText, _setCssText,
                        doc="(DOM) The parsable textual representation of this rule.")
@@ -384,6 +386,7 @@ class CSSPageRule(cssrule.CSSRuleRules):
         if wellformed:
             self._selectorText = newseq
             self._specificity = specificity
+            self._changed()
 
     selectorText = property(_getSelectorText, _setSelectorText,
                             doc="(DOM) The parsable textual representation of "
@@ -401,6 +404,7 @@ class CSSPageRule(cssrule.CSSRuleRules):
         else:
             style._parentRule = self
             self._style = style
+        self._changed()
 
     style = property(lambda self: self._style, _setStyle,
                      doc="(DOM) The declaration-block of this rule set, "
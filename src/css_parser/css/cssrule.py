@@ -3,6 +3,8 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 import xml.dom
 
 import css_parser
+from css_parser.parsecontext import current
+from css_parser.tokenize2 import LineIndex
 
 """CSSRule implements DOM Level 2 CSS CSSRule."""
 
@@ -91,6 +93,17 @@ class CSSRule(css_parser.util.Base2):
     atkeyword = property(lambda self: self._atkeyword, _setAtkeyword,
                          doc="Normalized  keyword of an @rule (e.g. ``@import``).")
 
+    def _keepSource(self, tokens):
+        """Keep the text of the complete rule `tokens` have been parsed from
+        if parsing with ``keepSource``, see :class:`~css_parser.CSSParser`.
+        The text is used when serializing until the rule is changed."""
+        source = current().source
+        if source is not None and tokens:
+            first, last = tokens[0], tokens[-1]
+            if isinstance(first[3], LineIndex) and last[0] == 'CHAR' and\
+               last[1] in '};':
+                self._source = source[first[2]:last[2] + 1]
+
     def _setCssText(self, cssText):
         """
         :param cssText:
@@ -115,6 +128,11 @@ class CSSRule(css_parser.util.Base2):
                            "rule. This reflects the current state of the rule "
                            "and not its initial value.")
 
+    def _parentNode(self):
+        if self._parentRule is not None:
+            return self._parentRule
+        return self._parentStyleSheet
+
     parent = property(lambda self: self._parent,
                       doc="The Parent Node of this CSSRule or None.")
 
@@ -215,6 +233,7 @@ class CSSRuleRules(CSSRule):
             # detach
             self._cssRules[index]._parentRule = None
             del self._cssRules[index]
+            self._changed()
 
         except IndexError:
             raise xml.dom.IndexSizeErr('%s: %s is not a valid index '
@@ -266,6 +285,7 @@ class CSSRuleRules(CSSRule):
         rule._parentRule = self
         rule._parentStyleSheet = None
         self._cssRules.insert(index, rule)
+        self._changed()
         return index
 
     def add(self, rule):
@@ -32,6 +32,15 @@ class CSSRuleList(list):
 
     append = extend = __setitem__ = __setslice__ = __notimplemented
 
+    def __reduce__(self):
+        # rules are restored without using the ``append`` set on instances
+        return self.__class__, (), (list(self), self.__dict__)
+
+    def __setstate__(self, state):
+        rules, attrs = state
+        list.extend(self, rules)
+        self.__dict__.update(attrs)
+
     def item(self, index):
         """(DOM) Retrieve a CSS rule by ordinal `index`. The order in this
         collection represents the order of the rules in the CSS style
@@ -180,7 +180,8 @@ class CSSStyleDeclaration(CSS2Properties, css_parser.util.Base2):
         known = ['_tokenizer', '_log', '_ttypes',
                  '_seq', 'seq', 'parentRule', '_parentRule', 'cssText',
                  'valid', 'wellformed', 'validating',
-                 '_readonly', '_profiles', '_validating']
+                 '_readonly', '_profiles', '_validating', '_source',
+                 '_cssTextCache']
         known.extend(CSS2Properties._properties)
         if n in known:
             super(CSSStyleDeclaration, self).__setattr__(n, v)
@@ -272,7 +273,8 @@ class CSSStyleDeclaration(CSS2Properties, css_parser.util.Base2):
 
     def _getCssText(self):
         """Return serialized property cssText."""
-        return css_parser.ser.do_css_CSSStyleDeclaration(self)
+        ser = css_parser.ser
+        return ser._cached(self, ser.do_css_CSSStyleDeclaration)
 
     def _setCssText(self, cssText):
         """Setting this attribute will result in the parsing of the new value
@@ -290,14 +292,9 @@ class CSSStyleDeclaration(CSS2Properties, css_parser.util.Base2):
         tokenizer = self._tokenize2(cssText)
 
         def ident(expected, seq, token, tokenizer=None):
-            # a property
-
-            tokens = self._tokensupto2(tokenizer, starttoken=token,
-                                       semicolon=True)
-            if self._tokenvalue(tokens[-1]) == ';':
-                tokens.pop()
+            # a property, reads its tokens from tokenizer directly
             property = Property(parent=self)
-            property.cssText = tokens
+            tokens = property._setTokens(tokenizer, starttoken=token)
             if property.wellformed:
                 seq.append(property, 'Property')
             else:
@@ -360,6 +357,9 @@ class CSSStyleDeclaration(CSS2Properties, css_parser.util.Base2):
 #        for x in self.children():
 #            x.parent = self
 
+    def _parentNode(self):
+        return self._parentRule
+
     parentRule = property(lambda self: self._parentRule, _setParentRule,
                           doc="(DOM) The CSS rule that contains this declaration block or "
                           "None if this CSSStyleDeclaration is not attached to a CSSRule.")
@@ -635,6 +635,7 @@ class CSSStyleDeclaration(CSS2Properties, css_parser.util.Base2):
             self.seq._readonly = False
             self.seq.append(newp, 'Property')
             self.seq._readonly = True
+            self._changed()
 
         else:
             self._log.warn('Invalid Property: %s: %s %s'
@@ -1,8 +1,10 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 
 import xml.dom
+from itertools import chain, islice
 
 import css_parser
+from css_parser.parsecontext import current, using
 
 from . import cssrule
 from .cssstyledeclaration import CSSStyleDeclaration
@@ -72,7 +74,8 @@ class CSSStyleRule(cssrule.CSSRule):
 
     def _getCssText(self):
         """Return serialized property cssText."""
-        return css_parser.ser.do_CSSStyleRule(self)
+        ser = css_parser.ser
+        return ser._cached(self, ser.do_CSSStyleRule)
 
     def _setCssText(self, cssText):
         """
@@ -95,6 +98,7 @@ class CSSStyleRule(cssrule.CSSRule):
               Raised if the rule is readonly.
         """
         super(CSSStyleRule, self)._setCssText(cssText)
+        self._unparsed = self._source = None
 
         # might be (cssText, namespaces)
         cssText, namespaces = self._splitNamespacesOff(cssText)
@@ -111,12 +115,116 @@ class CSSStyleRule(cssrule.CSSRule):
         if trail:
             self._log.error('CSSStyleRule: Trailing content: %s' %
                             self._valuestr(cssText), token=trail)
-        elif not selectortokens:
-            self._log.error('CSSStyleRule: No selector found: %r' %
-                            self._valuestr(cssText))
+        else:
+            self.__setTokens(selectortokens, styletokens, namespaces,
+                             lambda: self._valuestr(cssText))
+
+    cssText = property(_getCssText, _setCssText,
+                       doc="(DOM) The parsable textual representation of this "
+                       "rule.")
+
+    def _setTokens(self, tokens):
+        """Set rule from `tokens` of a complete ruleset as collected with
+        ``_tokensupto2(tokenizer, starttoken)`` by a sheet or @media rule.
+
+        These end with the ``}`` or ``EOF`` ending the style declaration
+        (if any) so only the selector is searched for, the declaration is
+        parsed from the remaining tokens directly.
+        """
+        if tokens and (self._type(tokens[0]) == self._prods.FUNCTION or
+                       self._tokenvalue(tokens[0]) in (')', ']', '}')):
+            # starttoken of _tokensupto2 is not counted as other tokens so
+            # end of declaration is not known
+            return self._setCssText(tokens)
+
+        super(CSSStyleRule, self)._setCssText(tokens)
+        self._unparsed = self._source = None
+
+        tokens, namespaces = self._splitNamespacesOff(tokens)
+        try:
+            # use parent style sheet ones if available
+            namespaces = self.parentStyleSheet.namespaces
+        except AttributeError:
+            pass
+
+        start = self._scanners['blockstartonly'].find(tokens)
+        selectortokens = tokens[:start]
+        selectorList = None
+        context = current()
+        if context.lazyRules and self.__isRuleset(tokens, start):
+            # the selector is parsed now so invalid rules are dropped as
+            # usual, the style declaration by _parse on first use, the rule
+            # is serialized as found till then
+            selectorList = SelectorList(parentRule=self)
+            selectorList.selectorText = (selectortokens[:-1], namespaces)
+            if selectorList.wellformed:
+                self._selectorList = selectorList
+                self._unparsed = (tokens[start:-1], context)
+                self._keepSource(tokens)
+                if self._source is None:
+                    self._source = ''.join(self._tokenvalue(t)
+                                           for t in tokens)
+                return
+
+        if start < len(tokens):
+            end = tokens[-1]
+            styletokens = islice(tokens, start, len(tokens) - 1)
+        else:
+            end, styletokens = None, []
+        self.__setTokens(selectortokens, styletokens, namespaces,
+                         lambda: self._valuestr(tokens), end, selectorList)
+        if self.wellformed:
+            self._keepSource(tokens)
+
+    def __isRuleset(self, tokens, start):
+        """Return if `tokens` are a selector followed by a complete
+        declaration block which is not empty, the block starts at index
+        `start`. Parsing other tokens is not deferred so errors are reported
+        during parsing (and empty rules are omitted as usual)."""
+        if self._type(tokens[-1]) == 'EOF' or\
+           self._tokenvalue(tokens[-1]) != '}':
+            return False
+        return 1 < start < len(tokens) and\
+            self._tokenvalue(tokens[start - 1]) == '{' and\
+            not self._tokenvalue(tokens[0]).startswith('@') and\
+            any(self._type(t) != 'S' for t in islice(tokens, start,
+                                                     len(tokens) - 1))
+
+    def _parse(self):
+        """Parse the style declaration if not parsed yet, see parameter
+        `lazyRules` of :class:`~css_parser.CSSParser`."""
+        if self._unparsed is not None:
+            tokens, context = self._unparsed
+            self._unparsed = None
+            context = context.copy()
+            context.lazyRules = False
+            # parsing changes neither this rule (which is still serialized
+            # as found in the source) nor the ones containing it
+            sources = [(node, node._source) for node in self._lineage()]
+            readonly, self._readonly = self._readonly, False
+            try:
+                with using(context):
+                    style = CSSStyleDeclaration(parentRule=self)
+                    style.cssText = tokens
+                    self._style = style
+            finally:
+                self._readonly = readonly
+                for node, source in sources:
+                    node._source = source
+
+    def __setTokens(self, selectortokens, styletokens, namespaces, text,
+                    end=None, selectorList=None):
+        """Set selector and style parsed from their tokens, `text` returns
+        the cssText used in messages.
+
+        If `end` is given `styletokens` is an iterator and `end` its last
+        token, else a list. `selectorList` is the one already parsed from
+        `selectortokens` if given.
+        """
+        if not selectortokens:
+            self._log.error('CSSStyleRule: No selector found: %r' % text())
         elif self._tokenvalue(selectortokens[0]).startswith('@'):
-            self._log.error('CSSStyleRule: No style rule: %r' %
-                            self._valuestr(cssText),
+            self._log.error('CSSStyleRule: No style rule: %r' % text(),
                             error=xml.dom.InvalidModificationErr)
         else:
             newSelectorList = SelectorList(parentRule=self)
@@ -128,32 +236,38 @@ class CSSStyleRule(cssrule.CSSRule):
                 ok = False
                 self._log.error(
                     'CSSStyleRule: No start { of style declaration found: %r' %
-                    self._valuestr(cssText), bracetoken)
+                    text(), bracetoken)
+                # all tokens are selector tokens
+                end = None
+                styletokens = []
             elif not selectortokens:
                 ok = False
                 self._log.error('CSSStyleRule: No selector found: %r.' %
-                                self._valuestr(cssText), bracetoken)
+                                text(), bracetoken)
             # SET
-            newSelectorList.selectorText = (selectortokens,
-                                            namespaces)
+            if selectorList is None:
+                newSelectorList.selectorText = (selectortokens,
+                                                namespaces)
+            else:
+                newSelectorList = selectorList
 
-            if not styletokens:
+            if end is None and styletokens:
+                end = styletokens.pop()
+            if end is None:
                 ok = False
                 self._log.error(
                     'CSSStyleRule: No style declaration or "}" found: %r' %
-                    self._valuestr(cssText))
+                    text())
             else:
-                braceorEOFtoken = styletokens.pop()
-                val, typ = self._tokenvalue(braceorEOFtoken), self._type(braceorEOFtoken)
+                val, typ = self._tokenvalue(end), self._type(end)
                 if val != '}' and typ != 'EOF':
                     ok = False
                     self._log.error('CSSStyleRule: No "}" after style '
-                                    'declaration found: %r'
-                                    % self._valuestr(cssText))
+                                    'declaration found: %r' % text())
                 else:
                     if 'EOF' == typ:
                         # add again as style needs it
-                        styletokens.append(braceorEOFtoken)
+                        styletokens = chain(styletokens, [end])
                     # SET, may raise:
                     newStyle.cssText = styletokens
 
@@ -161,10 +275,6 @@ class CSSStyleRule(cssrule.CSSRule):
                 self.selectorList = newSelectorList
                 self.style = newStyle
 
-    cssText = property(_getCssText, _setCssText,
-                       doc="(DOM) The parsable textual representation of this "
-                       "rule.")
-
     def __getNamespaces(self):
         """Uses children namespaces if not attached to a sheet, else the sheet's
         ones."""
@@ -185,11 +295,17 @@ class CSSStyleRule(cssrule.CSSRule):
             selectorList object
         """
         self._checkReadonly()
+        self._parse()
         selectorList._parentRule = self
         self._selectorList = selectorList
+        self._changed()
+
+    def _getSelectorList(self):
+        return self._selectorList
 
     _selectorList = None
-    selectorList = property(lambda self: self._selectorList, _setSelectorList,
+    _unparsed = None
+    selectorList = property(_getSelectorList, _setSelectorList,
                             doc="The SelectorList of this rule.")
 
     def _setSelectorText(self, selectorText):
@@ -210,12 +326,14 @@ class CSSStyleRule(cssrule.CSSRule):
               Raised if this rule is readonly.
         """
         self._checkReadonly()
+        self._parse()
 
         sl = SelectorList(selectorText=selectorText, parentRule=self)
         if sl.wellformed:
             self._selectorList = sl
+            self._changed()
 
-    selectorText = property(lambda self: self._selectorList.selectorText,
+    selectorText = property(lambda self: self.selectorList.selectorText,
                             _setSelectorText,
                             doc="(DOM) The textual representation of the "
                                 "selector for the rule set.")
@@ -226,13 +344,19 @@ class CSSStyleRule(cssrule.CSSRule):
             current style object.
         """
         self._checkReadonly()
+        self._parse()
         if isinstance(style, string_type):
             self._style = CSSStyleDeclaration(cssText=style, parentRule=self)
         else:
             style._parentRule = self
             self._style = style
+        self._changed()
+
+    def _getStyle(self):
+        self._parse()
+        return self._style
 
-    style = property(lambda self: self._style, _setStyle,
+    style = property(_getStyle, _setStyle,
                      doc="(DOM) The declaration-block of this rule set.")
 
     type = property(lambda self: self.STYLE_RULE,
@@ -60,6 +60,7 @@ class CSSStyleSheet(css_parser.stylesheets.StyleSheet):
             validating=validating)
 
         self._ownerRule = ownerRule
+        self._namespacesVersion = 0
         self.cssRules = css_parser.css.CSSRuleList()
         self._namespaces = _Namespaces(parentStyleSheet=self, log=self._log)
         self._variables = CSSVariablesDeclaration()
@@ -129,6 +130,8 @@ class CSSStyleSheet(css_parser.stylesheets.StyleSheet):
             rule._parentStyleSheet = self
 
         self._cssRules = cssRules
+        self._changed()
+        self._namespacesChanged()
 
     cssRules = property(lambda self: self._cssRules, _setCssRules,
                         "All Rules in this style sheet, a "
@@ -136,27 +139,14 @@ class CSSStyleSheet(css_parser.stylesheets.StyleSheet):
 
     def _getCssText(self):
         "Textual representation of the stylesheet (a byte string)."
-        return css_parser.ser.do_CSSStyleSheet(self)
+        ser = css_parser.ser
+        return ser._cached(self, ser.do_CSSStyleSheet)
 
-    def _setCssText(self, cssText):
-        """Parse `cssText` and overwrites the whole stylesheet.
-
-        :param cssText:
-            a parseable string or a tuple of (cssText, dict-of-namespaces)
-        :exceptions:
-            - :exc:`~xml.dom.NamespaceErr`:
-              If a namespace prefix is found which is not declared.
-            - :exc:`~xml.dom.NoModificationAllowedErr`:
-              Raised if the rule is readonly.
-            - :exc:`~xml.dom.SyntaxErr`:
-              Raised if the specified CSS string value has a syntax error and
-              is unparsable.
+    def _ruleProductions(self, insertRule):
+        """Return (productions, default production) to parse the top-level
+        rules of a sheet, each parsed rule is given to
+        ``insertRule(rule[, _clean])``.
         """
-        self._checkReadonly()
-
-        cssText, namespaces = self._splitNamespacesOff(cssText)
-        tokenizer = self._tokenize2(cssText)
-
         def S(expected, seq, token, tokenizer=None):
             # @charset must be at absolute beginning of style sheet
             # or 0 for py3
@@ -164,14 +154,16 @@ class CSSStyleSheet(css_parser.stylesheets.StyleSheet):
 
         def COMMENT(expected, seq, token, tokenizer=None):
             "special: sets parent*"
-            self.insertRule(css_parser.css.CSSComment([token], parentStyleSheet=self))
+            insertRule(css_parser.css.CSSComment([token], parentStyleSheet=self))
             # or 0 for py3
             return max(1, expected or 0)
 
         def charsetrule(expected, seq, token, tokenizer):
             # parse and consume tokens in any case
             rule = css_parser.css.CSSCharsetRule(parentStyleSheet=self)
-            rule.cssText = self._tokensupto2(tokenizer, token)
+            tokens = self._tokensupto2(tokenizer, token)
+            rule.cssText = tokens
+            rule._keepSource(tokens)
 
             if (expected or 0) > 0:
                 self._log.error('CSSStylesheet: CSSCharsetRule only allowed '
@@ -179,28 +171,32 @@ class CSSStyleSheet(css_parser.stylesheets.StyleSheet):
                                 token, xml.dom.HierarchyRequestErr)
                 return expected
             elif rule.wellformed:
-                self.insertRule(rule)
+                insertRule(rule)
 
             return 1
 
         def importrule(expected, seq, token, tokenizer):
             # parse and consume tokens in any case
             rule = css_parser.css.CSSImportRule(parentStyleSheet=self)
-            rule.cssText = self._tokensupto2(tokenizer, token)
+            tokens = self._tokensupto2(tokenizer, token)
+            rule.cssText = tokens
+            rule._keepSource(tokens)
 
             if (expected or 0) > 1:
                 self._log.error('CSSStylesheet: CSSImportRule not allowed '
                                 'here.', token, xml.dom.HierarchyRequestErr)
                 return expected
             elif rule.wellformed:
-                self.insertRule(rule)
+                insertRule(rule)
 
             return 1
 
         def namespacerule(expected, seq, token, tokenizer):
             # parse and consume tokens in any case
+            tokens = self._tokensupto2(tokenizer, token)
             rule = css_parser.css.CSSNamespaceRule(
-                    cssText=self._tokensupto2(tokenizer, token), parentStyleSheet=self)
+                    cssText=tokens, parentStyleSheet=self)
+            rule._keepSource(tokens)
 
             if (expected or 0) > 2:
                 self._log.error('CSSStylesheet: CSSNamespaceRule not allowed '
@@ -209,7 +205,7 @@ class CSSStyleSheet(css_parser.stylesheets.StyleSheet):
             elif rule.wellformed:
                 if rule.prefix not in self.namespaces:
                     # add new if not same prefix
-                    self.insertRule(rule, _clean=False)
+                    insertRule(rule, _clean=False)
                 else:
                     # same prefix => replace namespaceURI
                     for r in self.cssRules.rulesOfType(rule.NAMESPACE_RULE):
@@ -223,14 +219,16 @@ class CSSStyleSheet(css_parser.stylesheets.StyleSheet):
         def variablesrule(expected, seq, token, tokenizer):
             # parse and consume tokens in any case
             rule = css_parser.css.CSSVariablesRule(parentStyleSheet=self)
-            rule.cssText = self._tokensupto2(tokenizer, token)
+            tokens = self._tokensupto2(tokenizer, token)
+            rule.cssText = tokens
+            rule._keepSource(tokens)
 
             if (expected or 0) > 2:
                 self._log.error('CSSStylesheet: CSSVariablesRule not allowed '
                                 'here.', token, xml.dom.HierarchyRequestErr)
                 return expected
             elif rule.wellformed:
-                self.insertRule(rule)
+                insertRule(rule)
                 self._updateVariables()
 
             return 2
@@ -238,25 +236,31 @@ class CSSStyleSheet(css_parser.stylesheets.StyleSheet):
         def fontfacerule(expected, seq, token, tokenizer):
             # parse and consume tokens in any case
             rule = css_parser.css.CSSFontFaceRule(parentStyleSheet=self)
-            rule.cssText = self._tokensupto2(tokenizer, token)
+            tokens = self._tokensupto2(tokenizer, token)
+            rule.cssText = tokens
+            rule._keepSource(tokens)
             if rule.wellformed:
-                self.insertRule(rule)
+                insertRule(rule)
             return 3
 
         def mediarule(expected, seq, token, tokenizer):
             # parse and consume tokens in any case
             rule = css_parser.css.CSSMediaRule(parentStyleSheet=self)
-            rule.cssText = self._tokensupto2(tokenizer, token)
+            tokens = self._tokensupto2(tokenizer, token)
+            rule.cssText = tokens
+            rule._keepSource(tokens)
             if rule.wellformed:
-                self.insertRule(rule)
+                insertRule(rule)
             return 3
 
         def pagerule(expected, seq, token, tokenizer):
             # parse and consume tokens in any case
             rule = css_parser.css.CSSPageRule(parentStyleSheet=self)
-            rule.cssText = self._tokensupto2(tokenizer, token)
+            tokens = self._tokensupto2(tokenizer, token)
+            rule.cssText = tokens
+            rule._keepSource(tokens)
             if rule.wellformed:
-                self.insertRule(rule)
+                insertRule(rule)
             return 3
 
         def unknownrule(expected, seq, token, tokenizer):
@@ -265,15 +269,19 @@ class CSSStyleSheet(css_parser.stylesheets.StyleSheet):
                 self._log.error('CSSStylesheet: MarginRule out CSSPageRule.',
                                 token, neverraise=True)
                 rule = css_parser.css.MarginRule(parentStyleSheet=self)
-                rule.cssText = self._tokensupto2(tokenizer, token)
+                tokens = self._tokensupto2(tokenizer, token)
+                rule.cssText = tokens
+                rule._keepSource(tokens)
             else:
                 self._log.warn('CSSStylesheet: Unknown @rule found.',
                                token, neverraise=True)
                 rule = css_parser.css.CSSUnknownRule(parentStyleSheet=self)
-                rule.cssText = self._tokensupto2(tokenizer, token)
+                tokens = self._tokensupto2(tokenizer, token)
+                rule.cssText = tokens
+                rule._keepSource(tokens)
 
             if rule.wellformed:
-                self.insertRule(rule)
+                insertRule(rule)
 
             # or 0 for py3
             return max(1, expected or 0)
@@ -281,11 +289,45 @@ class CSSStyleSheet(css_parser.stylesheets.StyleSheet):
         def ruleset(expected, seq, token, tokenizer):
             # parse and consume tokens in any case
             rule = css_parser.css.CSSStyleRule(parentStyleSheet=self)
-            rule.cssText = self._tokensupto2(tokenizer, token)
+            rule._setTokens(self._scanners[None].collect(tokenizer, token))
             if rule.wellformed:
-                self.insertRule(rule)
+                insertRule(rule)
             return 3
 
+        return {'S': S,
+                'COMMENT': COMMENT,
+                'CDO': lambda *ignored: None,
+                'CDC': lambda *ignored: None,
+                'CHARSET_SYM': charsetrule,
+                'FONT_FACE_SYM': fontfacerule,
+                'IMPORT_SYM': importrule,
+                'NAMESPACE_SYM': namespacerule,
+                'PAGE_SYM': pagerule,
+                'MEDIA_SYM': mediarule,
+                'VARIABLES_SYM': variablesrule,
+                'ATKEYWORD': unknownrule
+                }, ruleset
+
+    def _setCssText(self, cssText):
+        """Parse `cssText` and overwrites the whole stylesheet.
+
+        :param cssText:
+            a parseable string or a tuple of (cssText, dict-of-namespaces)
+        :exceptions:
+            - :exc:`~xml.dom.NamespaceErr`:
+              If a namespace prefix is found which is not declared.
+            - :exc:`~xml.dom.NoModificationAllowedErr`:
+              Raised if the rule is readonly.
+            - :exc:`~xml.dom.SyntaxErr`:
+              Raised if the specified CSS string value has a syntax error and
+              is unparsable.
+        """
+        self._checkReadonly()
+
+        cssText, namespaces = self._splitNamespacesOff(cssText)
+        tokenizer = self._tokenize2(cssText)
+        productions, ruleset = self._ruleProductions(self.insertRule)
+
         # save for possible reset
         oldCssRules = self.cssRules
         oldNamespaces = self._namespaces
@@ -299,20 +341,7 @@ class CSSStyleSheet(css_parser.stylesheets.StyleSheet):
         newseq = []
 
         # ['CHARSET', 'IMPORT', ('VAR', NAMESPACE'), ('PAGE', 'MEDIA', ruleset)]
-        wellformed, expected = self._parse(0, newseq, tokenizer,
-                                           {'S': S,
-                                            'COMMENT': COMMENT,
-                                            'CDO': lambda *ignored: None,
-                                            'CDC': lambda *ignored: None,
-                                            'CHARSET_SYM': charsetrule,
-                                            'FONT_FACE_SYM': fontfacerule,
-                                            'IMPORT_SYM': importrule,
-                                            'NAMESPACE_SYM': namespacerule,
-                                            'PAGE_SYM': pagerule,
-                                            'MEDIA_SYM': mediarule,
-                                            'VARIABLES_SYM': variablesrule,
-                                            'ATKEYWORD': unknownrule
-                                            },
+        wellformed, expected = self._parse(0, newseq, tokenizer, productions,
                                            default=ruleset)
 
         if wellformed:
@@ -379,6 +408,49 @@ class CSSStyleSheet(css_parser.stylesheets.StyleSheet):
             except AttributeError:
                 pass
 
+    def _iterRules(self, cssText, encodingOverride=None):
+        """Generator: Parse `cssText` and yield each top-level rule as soon
+        as it is parsed instead of adding it to this sheet.
+
+        The rules keep this sheet as ``parentStyleSheet`` but are not
+        contained in its ``cssRules``. Only state later rules depend on is
+        kept: namespaces, variables and a @charset rule (for the encoding of
+        @import sheets).
+        """
+        self._checkReadonly()
+
+        cssText, namespaces = self._splitNamespacesOff(cssText)
+        tokenizer = self._tokenize2(cssText)
+        parsed = []
+
+        def insertRule(rule, _clean=True):
+            if rule.type == rule.CHARSET_RULE:
+                self._cssRules.insert(0, rule)
+            elif rule.type == rule.IMPORT_RULE and rule.styleSheet:
+                for var in rule.styleSheet.variables:
+                    self._variables.setVariable(
+                        var, rule.styleSheet.variables[var])
+            elif rule.type == rule.VARIABLES_RULE:
+                for var in rule.variables:
+                    self._variables.setVariable(var, rule.variables[var])
+            parsed.append(rule)
+
+        productions, ruleset = self._ruleProductions(insertRule)
+        productions = self._adddefaultproductions(productions)
+
+        self.cssRules = css_parser.css.CSSRuleList()
+        self._namespaces = namespaces
+        self._variables = CSSVariablesDeclaration()
+        if encodingOverride:
+            self.__encodingOverride = encodingOverride
+
+        expected, seq = 0, []
+        for token in tokenizer:
+            p = productions.get(token[0], ruleset)
+            expected = p(expected, seq, token, tokenizer)
+            while parsed:
+                yield parsed.pop(0)
+
     def _setFetcher(self, fetcher=None):
         """Set @import URL loader, if None the default is used."""
         self._fetcher = fetcher
@@ -413,6 +485,22 @@ class CSSStyleSheet(css_parser.stylesheets.StyleSheet):
                         "(css_parser) Reflect encoding of an @charset rule or 'utf-8' "
                         "(default) if set to ``None``")
 
+    def _namespacesChanged(self):
+        """Called after the namespaces of this sheet have changed, the kept
+        serializations of contained objects are not used anymore. The kept
+        source of style rules is dropped too as their selectors may use a
+        changed prefix."""
+        self._namespacesVersion += 1
+
+        def dropSource(rules):
+            for rule in rules:
+                if rule.type == rule.STYLE_RULE:
+                    rule._changed()
+                elif hasattr(rule, 'cssRules'):
+                    dropSource(rule.cssRules)
+
+        dropSource(self._cssRules)
+
     namespaces = property(lambda self: self._namespaces,
                           doc="All Namespaces used in this CSSStyleSheet.")
 
@@ -499,6 +587,9 @@ class CSSStyleSheet(css_parser.stylesheets.StyleSheet):
 
             rule._parentStyleSheet = None  # detach
             del self._cssRules[index]  # delete from StyleSheet
+            self._changed()
+            if rule.type == rule.NAMESPACE_RULE:
+                self._namespacesChanged()
 
     def insertRule(self, rule, index=None, inOrder=False, _clean=True):
         """
@@ -712,6 +803,7 @@ class CSSStyleSheet(css_parser.stylesheets.StyleSheet):
                     self.namespaces[rule.prefix] == rule.namespaceURI):
                 # no doublettes
                 self._cssRules.insert(index, rule)
+                self._namespacesChanged()
                 if _clean:
                     self._cleanNamespaces()
 
@@ -785,6 +877,7 @@ class CSSStyleSheet(css_parser.stylesheets.StyleSheet):
 
         # post settings
         rule._parentStyleSheet = self
+        self._changed()
 
         if rule.IMPORT_RULE == rule.type and not rule.hrefFound:
             # try loading the imported sheet which has new relative href now
@@ -807,6 +900,11 @@ class CSSStyleSheet(css_parser.stylesheets.StyleSheet):
     valid = property(_getValid,
                      doc='``True`` if all contained rules are valid')
 
+    def writeTo(self, fp):
+        """Write :attr:`cssText` to the binary file-like object `fp` rule by
+        rule, see :meth:`css_parser.serialize.CSSSerializer.serializeTo`."""
+        css_parser.ser.serializeTo(self, fp)
+
     @Deprecated('Use ``css_parser.setSerializer(serializer)`` instead.')
     def setSerializer(self, cssserializer):
         """Set the css_parser global Serializer used for all output."""
@@ -47,7 +47,8 @@ class CSSUnknownRule(cssrule.CSSRule):
 
     def _getCssText(self):
         """Return serialized property cssText."""
-        return css_parser.ser.do_CSSUnknownRule(self)
+        ser = css_parser.ser
+        return ser._cached(self, ser.do_CSSUnknownRule)
 
     def _setCssText(self, cssText):
         """
@@ -69,6 +69,9 @@ class CSSValue(css_parser.util._NewBase):
 
         self._readonly = readonly
 
+    def _parentNode(self):
+        return self.parent
+
     def __repr__(self):
         return "css_parser.css.%s(%r)" % (
                 self.__class__.__name__, self.cssText)
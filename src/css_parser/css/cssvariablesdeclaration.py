@@ -205,6 +205,9 @@ class CSSVariablesDeclaration(css_parser.util._NewBase):
     def _setParentRule(self, parentRule):
         self._parentRule = parentRule
 
+    def _parentNode(self):
+        return self._parentRule
+
     parentRule = property(lambda self: self._parentRule, _setParentRule,
                           doc="(DOM) The CSS rule that contains this"
                               " declaration block or None if this block"
@@ -254,6 +257,7 @@ class CSSVariablesDeclaration(css_parser.util._NewBase):
                         del self.seq[i]
             self.seq._readonly = True
             del self._vars[normalname]
+            self._changed()
 
         return r.cssText
 
@@ -312,6 +316,7 @@ class CSSVariablesDeclaration(css_parser.util._NewBase):
                     self.seq.append([variableName, v], 'var')
                 self.seq._readonly = True
                 self._vars[variableName] = v
+                self._changed()
 
     def item(self, index):
         """Used to retrieve the variables that have been explicitly set in
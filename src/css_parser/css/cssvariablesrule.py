@@ -85,7 +85,8 @@ class CSSVariablesRule(cssrule.CSSRule):
 
     def _getCssText(self):
         """Return serialized property cssText."""
-        return css_parser.ser.do_CSSVariablesRule(self)
+        ser = css_parser.ser
+        return ser._cached(self, ser.do_CSSVariablesRule)
 
     def _setCssText(self, cssText):
         """
@@ -192,6 +193,7 @@ class CSSVariablesRule(cssrule.CSSRule):
         else:
             variables._parentRule = self
             self._variables = variables
+        self._changed()
 
     variables = property(lambda self: self._variables, _setVariables,
                          doc="(DOM) The variables of this rule set, a "
@@ -107,6 +107,7 @@ class MarginRule(cssrule.CSSRule):
         else:
             self._atkeyword = n
             self._keyword = margin
+            self._changed()
 
     margin = property(lambda self: self._atkeyword, _setMargin,
                       doc="Margin area of parent CSSPageRule. "
@@ -128,7 +129,8 @@ class MarginRule(cssrule.CSSRule):
 
     def _getCssText(self):
         """Return serialized property cssText."""
-        return css_parser.ser.do_MarginRule(self)
+        ser = css_parser.ser
+        return ser._cached(self, ser.do_MarginRule)
 
     def _setCssText(self, cssText):
         """
@@ -209,6 +211,7 @@ class MarginRule(cssrule.CSSRule):
         else:
             style._parentRule = self
             self._style = style
+        self._changed()
 
     style = property(lambda self: self._style, _setStyle,
                      doc="(DOM) The declaration-block of this rule set.")
@@ -1,6 +1,7 @@
 from __future__ import unicode_literals, division, absolute_import, print_function
 import css_parser
 from .value import PropertyValue
+from css_parser.parsecontext import current, using
 from css_parser.helper import Deprecated
 """Property is a single CSS property in a CSSStyleDeclaration."""
 
@@ -72,6 +73,9 @@ class Property(css_parser.util.Base):
         self.__nametoken = None
         self._name = ''
         self._literalname = ''
+        # tokens of a value parsed on first use and the ParseContext to use
+        self._valuetokens = None
+        self._valuecontext = None
         self.seqs[1] = PropertyValue(parent=self)
         if name:
             self.name = name
@@ -121,22 +125,55 @@ class Property(css_parser.util.Base):
               Raised if the rule is readonly.
         """
         # check and prepare tokenlists for setting
-        tokenizer = self._tokenize2(cssText)
-        nametokens = self._tokensupto2(tokenizer, propertynameendonly=True)
+        self._setTokens(self._tokenize2(cssText), cssText)
+
+    cssText = property(fget=_getCssText, fset=_setCssText,
+                       doc="A parsable textual representation.")
+
+    def _setTokens(self, tokenizer, cssText=None, starttoken=None):
+        """Set property from `tokenizer`, see :meth:`_setCssText`.
+
+        If `cssText` is ``None`` `tokenizer` is the token stream of a
+        :class:`~css_parser.css.CSSStyleDeclaration` and `starttoken` the
+        first token of this property. Only tokens up to and including the
+        ``;`` ending this property are consumed then.
+
+        Returns all tokens of the property (without an ending ``;``).
+        """
+        declaration = cssText is None
+
+        def ended(tokens):
+            "remove ; ending this property in a declaration"
+            if declaration and tokens and self._tokenvalue(tokens[-1]) == ';':
+                tokens.pop()
+                return True
+            return False
+
+        scanners = self._scanners
+        nametokens = scanners['propertynameendonly'].collect(tokenizer,
+                                                             starttoken)
+        if ended(nametokens):
+            valuetokens, prioritytokens = [], []
+        else:
+            valuetokens = scanners['propertyvalueendonly'].collect(tokenizer)
+            if ended(valuetokens):
+                prioritytokens = []
+            else:
+                prioritytokens = scanners['propertypriorityendonly'].collect(
+                    tokenizer)
+                ended(prioritytokens)
+        if declaration:
+            cssText = nametokens + valuetokens + prioritytokens
+
         if nametokens:
             wellformed = True
 
-            valuetokens = self._tokensupto2(tokenizer,
-                                            propertyvalueendonly=True)
-            prioritytokens = self._tokensupto2(tokenizer,
-                                               propertypriorityendonly=True)
-
             if self._mediaQuery and not valuetokens:
                 # MediaQuery may consist of name only
                 self.name = nametokens
                 self.propertyValue = None
                 self.priority = None
-                return
+                return cssText
 
             # remove colon from nametokens
             colontoken = nametokens.pop()
@@ -161,6 +198,17 @@ class Property(css_parser.util.Base):
             if wellformed:
                 self.wellformed = True
                 self.name = nametokens
+                context = current()
+                if context.lazyValues and any(
+                        self._type(t) not in ('S', 'COMMENT')
+                        for t in valuetokens):
+                    # parsed by propertyValue, nothing is validated, an
+                    # empty value is reported now
+                    self._valuetokens = valuetokens
+                    self._valuecontext = context
+                    self.priority = prioritytokens
+                    return cssText
+
                 self.propertyValue = valuetokens
                 self.priority = prioritytokens
 
@@ -173,8 +221,7 @@ class Property(css_parser.util.Base):
             self._log.error('Property: No property name found: %s' %
                             self._valuestr(cssText))
 
-    cssText = property(fget=_getCssText, fset=_setCssText,
-                       doc="A parsable textual representation.")
+        return cssText
 
     def _setName(self, name):
         """
@@ -223,9 +270,10 @@ class Property(css_parser.util.Base):
             self._literalname = new['literalname']
             self._name = self._normalize(self._literalname)
             self.seqs[0] = newseq
+            self._changed()
 
             # validate
-            if self._isValidating() and self._name not in css_parser.profile.knownNames:
+            if self._isValidating() and self._name not in current().profile.knownNames:
                 # self.valid = False
                 self._log.warn('Property: Unknown Property name.',
                                token=token, neverraise=True)
@@ -257,13 +305,27 @@ class Property(css_parser.util.Base):
           TODO: Raised if the specified CSS string value represents a different
           type of values than the values allowed by the CSS property.
         """
+        self._valuetokens = None
         if self._mediaQuery and not cssText:
             self.seqs[1] = PropertyValue(parent=self)
+            self._changed()
         else:
             self.seqs[1].cssText = cssText
             self.wellformed = self.wellformed and self.seqs[1].wellformed
 
-    propertyValue = property(lambda self: self.seqs[1],
+    def _getPropertyValue(self):
+        if self._valuetokens is not None:
+            # parse value not parsed during parsing now
+            tokens = self._valuetokens
+            # parsing does not change the source
+            sources = [(node, node._source) for node in self._lineage()]
+            with using(self._valuecontext.copy()):
+                self._setPropertyValue(tokens)
+            for node, source in sources:
+                node._source = source
+        return self.seqs[1]
+
+    propertyValue = property(_getPropertyValue,
                              _setPropertyValue,
                              doc="(css_parser) PropertyValue object of property")
 
@@ -359,6 +421,7 @@ class Property(css_parser.util.Base):
             self._literalpriority = new['literalpriority']
             self._priority = self._normalize(self.literalpriority)
             self.seqs[2] = newseq
+            self._changed()
             # validate priority
             if self._priority not in ('', 'important'):
                 self._log.error('Property: No CSS priority value: %s' %
@@ -373,6 +436,9 @@ class Property(css_parser.util.Base):
     def _setParent(self, parent):
         self._parent = parent
 
+    def _parentNode(self):
+        return self._parent
+
     parent = property(lambda self: self._parent, _setParent,
                       doc="The Parent Node (normally a CSSStyledeclaration) of this "
                       "Property")
@@ -436,6 +502,7 @@ class Property(css_parser.util.Base):
             DEBUG   Property: Found valid "CSS Level 2.1" value: red [5:9: color]
         """
         valid = False
+        profile = current().profile
 
         profiles = None
         try:
@@ -446,7 +513,7 @@ class Property(css_parser.util.Base):
         else:
             if rule is not None:
                 if rule.type == rule.FONT_FACE_RULE:
-                    profiles = [css_parser.profile.CSS3_FONT_FACE]
+                    profiles = [profile.CSS3_FONT_FACE]
                 # TODO: same for @page
 
         if self.name and self.value:
@@ -458,10 +525,10 @@ class Property(css_parser.util.Base):
             #     css_parser.log.warn(u'No value for variable "%s" found, keeping '
             #                       u'variable.' % cv.name, neverraise=True)
 
-            if self.name in css_parser.profile.knownNames:
+            if self.name in profile.knownNames:
                 # add valid, matching, validprofiles...
                 valid, matching, validprofiles = \
-                    css_parser.profile.validateWithProfile(self.name, self.value, profiles)
+                    profile.validateWithProfile(self.name, self.value, profiles)
 
                 if not valid:
                     self._log.error('Property: Invalid value for '
@@ -473,7 +540,7 @@ class Property(css_parser.util.Base):
                 # TODO: remove logic to profiles!
                 elif valid and not matching:  # (profiles and profiles not in validprofiles):
                     if not profiles:
-                        notvalidprofiles = '/'.join(css_parser.profile.defaultProfiles)
+                        notvalidprofiles = '/'.join(profile.defaultProfiles)
                     else:
                         notvalidprofiles = profiles
                     self._log.warn('Property: Not valid for profile "%s" '
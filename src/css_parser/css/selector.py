@@ -283,6 +283,9 @@ class Selector(css_parser.util.Base2):
     element = property(lambda self: self._element,
                        doc="Effective element target of this selector.")
 
+    def _parentNode(self):
+        return self._parent
+
     parent = property(lambda self: self._parent,
                       doc="(DOM) The SelectorList that contains this Selector "
                           "or None if this Selector is not attached to a "
@@ -290,7 +293,8 @@ class Selector(css_parser.util.Base2):
 
     def _getSelectorText(self):
         """Return serialized format."""
-        return css_parser.ser.do_css_Selector(self)
+        ser = css_parser.ser
+        return ser._cached(self, ser.do_css_Selector)
 
     def _setSelectorText(self, selectorText):
         """
@@ -61,6 +61,10 @@ class SelectorList(css_parser.util.Base, css_parser.util.ListSeq):
                           self._namespaces,
                           id(self))
 
+    def __delitem__(self, index):
+        del self.seq[index]
+        self._changed()
+
     def __setitem__(self, index, newSelector):
         """Overwrite ListSeq.__setitem__
 
@@ -69,6 +73,7 @@ class SelectorList(css_parser.util.Base, css_parser.util.ListSeq):
         newSelector = self.__prepareset(newSelector)
         if newSelector:
             self.seq[index] = newSelector
+            self._changed()
 
     def __prepareset(self, newSelector, namespaces=None):
         "Used by appendSelector and __setitem__"
@@ -151,6 +156,7 @@ class SelectorList(css_parser.util.Base, css_parser.util.ListSeq):
                 if s.selectorText != newSelector.selectorText:
                     self.seq.append(s)
             self.seq.append(newSelector)
+            self._changed()
             return newSelector
 
     def _getSelectorText(self):
@@ -185,11 +191,12 @@ class SelectorList(css_parser.util.Base, css_parser.util.ListSeq):
         wellformed = True
         tokenizer = self._tokenize2(selectorText)
         newseq = []
+        scanner = self._scanners['listseponly']
 
         expected = True
         while True:
             # find all upto and including next ",", EOF or nothing
-            selectortokens = self._tokensupto2(tokenizer, listseponly=True)
+            selectortokens = scanner.collect(tokenizer)
             if selectortokens:
                 if self._tokenvalue(selectortokens[-1]) == ',':
                     expected = selectortokens.pop()
@@ -218,6 +225,7 @@ class SelectorList(css_parser.util.Base, css_parser.util.ListSeq):
                             self._valuestr(selectorText))
         if wellformed:
             self.seq = newseq
+            self._changed()
 
     selectorText = property(_getSelectorText, _setSelectorText,
                             doc="(css_parser) The textual representation of the "
@@ -227,6 +235,9 @@ class SelectorList(css_parser.util.Base, css_parser.util.ListSeq):
                       doc="The number of :class:`~css_parser.css.Selector` "
                           "objects in the list.")
 
+    def _parentNode(self):
+        return self._parentRule
+
     parentRule = property(lambda self: self._parentRule,
                           doc="(DOM) The CSS rule that contains this "
                               "SelectorList or ``None`` if this SelectorList "
@@ -70,6 +70,9 @@ class PropertyValue(css_parser.util._NewBase):
 
         self._readonly = readonly
 
+    def _parentNode(self):
+        return self.parent
+
     def __len__(self):
         return len(as_list(self.__items()))
 
@@ -257,6 +260,9 @@ class Value(css_parser.util._NewBase):
         if cssText:
             self.cssText = cssText
 
+    def _parentNode(self):
+        return self.parent
+
     def __repr__(self):
         return "css_parser.css.%s(%r)" % (self.__class__.__name__, self.cssText)
 
@@ -295,6 +301,7 @@ class Value(css_parser.util._NewBase):
     def _setValue(self, value):
         # TODO: check!
         self._value = value
+        self._changed()
 
     value = property(lambda self: self._value, _setValue,
                      doc="Actual value if possible: An int or float or else "
@@ -587,6 +594,7 @@ class URIValue(Value):
     def _setUri(self, uri):
         # TODO: check?
         self._value = uri
+        self._changed()
 
     uri = property(lambda self: self._value, _setUri,
                    doc="Actual URL without delimiters or the empty string")
@@ -3,16 +3,21 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 
 import logging
 import xml.dom
+from functools import partial
 from urllib.error import HTTPError as urllib_HTTPError
 from urllib.error import URLError as urllib_URLError
 
+from . import parsecontext
+from .tokenize2 import linecol
+
 """css_parser ErrorHandler
 
 ErrorHandler
     used as log with usual levels (debug, info, warn, error)
 
     if instanciated with ``raiseExceptions=True`` raises exeptions instead
-    of logging
+    of logging, a :class:`~css_parser.parsecontext.ParseContext` of the
+    current thread may overwrite this setting during parsing
 
 log
     defaults to instance of ErrorHandler for any kind of log message from
@@ -71,8 +76,8 @@ class _ErrorHandler(object):
         if name in calls:
             if name == 'warn':
                 name = 'warning'
-            self._logcall = getattr(self._log, name)
-            return self.__handle
+            # bound here as the handler's state is shared by all threads
+            return partial(self.__handle, _logcall=getattr(self._log, name))
         elif name in other:
             return getattr(self._log, name)
         else:
@@ -80,7 +85,7 @@ class _ErrorHandler(object):
                 '(errorhandler) No Attribute %r found' % name)
 
     def __handle(self, msg='', token=None, error=xml.dom.SyntaxErr,
-                 neverraise=False, args=None):
+                 neverraise=False, args=None, _logcall=None):
         """
         handles all calls
         logs or raises exception
@@ -92,13 +97,18 @@ class _ErrorHandler(object):
             line, col = None, None
             if token:
                 if isinstance(token, tuple):
-                    value, line, col = token[1], token[2], token[3]
+                    # tokens may contain (offset, LineIndex) only
+                    value, (line, col) = token[1], linecol(token[2], token[3])
                 else:
                     value, line, col = token.value, token.line, token.col
                 msg = '%s [%s:%s: %s]' % (
                     msg, line, col, value)
 
-            if error and self.raiseExceptions and not neverraise:
+            raiseExceptions = parsecontext.current().raiseExceptions
+            if raiseExceptions is None:
+                raiseExceptions = self.raiseExceptions
+
+            if error and raiseExceptions and not neverraise:
                 if isinstance(error, urllib_HTTPError) or isinstance(error, urllib_URLError):
                     raise
                 elif issubclass(error, xml.dom.DOMException):
@@ -106,7 +116,7 @@ class _ErrorHandler(object):
                     error.col = col
                 raise error(msg)
             else:
-                self._logcall(msg)
+                _logcall(msg)
 
     def setLog(self, log):
         """set log of errorhandler's log"""
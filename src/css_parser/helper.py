@@ -55,10 +55,21 @@ def normalize(x):
     - lowercase
     """
     if x:
+        return unescape(x).lower()
+    else:
+        return x
+
+
+def unescape(x):
+    r"""
+    removes any \ before non unicode sequences (0-9a-zA-Z) so for
+    x=="md\:flex" return "md:flex" (unicode escape sequences should have
+    been resolved by the tokenizer already)
+    """
+    if x and '\\' in x:
         def removeescape(matchobj):
             return matchobj.group(0)[1:]
-        x = _simpleescapes(removeescape, x)
-        return x.lower()
+        return _simpleescapes(removeescape, x)
     else:
         return x
 
@@ -11,7 +11,9 @@ from .helper import path2url
 import codecs
 import css_parser
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from . import tokenize2
+from .parsecontext import ParseContext, using
 
 from css_parser import css
 
@@ -19,6 +21,14 @@ if sys.version_info < (2, 6):
     bytes = str
 
 
+def _parseFile(parser, filename, kwargs):
+    "Return (sheet, None) or (None, error) of parsing a file in a worker"
+    try:
+        return parser.parseFile(filename, **kwargs), None
+    except Exception as e:
+        return None, e
+
+
 class CSSParser(object):
     """Parse a CSS StyleSheet from URL, string or file and return a DOM Level 2
     CSS StyleSheet object.
@@ -30,11 +40,16 @@ class CSSParser(object):
         parser.setFetcher(fetcher)
         sheet = parser.parseFile('test1.css', 'ascii')
         print sheet.cssText
+
+    A parser may be used by several threads at the same time, the settings
+    used during parsing are kept for each parse separately and do not change
+    global settings.
     """
 
     def __init__(self, log=None, loglevel=None, raiseExceptions=None,
                  fetcher=None, parseComments=True,
-                 validate=True):
+                 validate=True, profile=None, lazyValues=False,
+                 lazyRules=False, keepSource=False):
         """
         :param log:
             logging object
@@ -50,33 +65,64 @@ class CSSParser(object):
             if comments should be added to CSS DOM or simply omitted
         :param validate:
             if parsing should validate, may be overwritten in parse methods
+        :param profile:
+            :class:`~css_parser.profiles.Profiles` used for validation during
+            parsing, defaults to ``css_parser.profile``
+        :param lazyValues:
+            if ``True`` values of properties are not parsed before
+            ``propertyValue`` (or e.g. ``value``) of a property is used and
+            nothing is validated (regardless of `validate`). Values never
+            used are serialized from their source tokens if the serializer
+            preferences would not change them (e.g. ``1px`` or ``red``),
+            others (e.g. ``#FF0000`` or ``url( x )``) are parsed to be
+            serialized. Errors in values are reported when they are parsed.
+        :param lazyRules:
+            if ``True`` the style declarations of style rules are not
+            parsed before ``style`` of a rule is used, selectors are parsed
+            at once so invalid rules are omitted as usual. Rules not changed
+            are serialized as found in the source with the default serializer
+            preferences and parsed to be serialized with other ones. Errors
+            in declarations are reported when they are parsed.
+        :param keepSource:
+            if ``True`` rules of a sheet keep the text they are parsed from
+            and are serialized to that text with the default serializer
+            preferences while they (or any rule or value they contain) are
+            not changed. Files are not parsed in chunks then.
         """
         if log is not None:
             css_parser.log.setLog(log)
         if loglevel is not None:
             css_parser.log.setLevel(loglevel)
 
-        # remember global setting
-        self.__globalRaising = css_parser.log.raiseExceptions
         if raiseExceptions:
             self.__parseRaising = raiseExceptions
         else:
             # DEFAULT during parse
             self.__parseRaising = False
 
-        self.__tokenizer = tokenize2.Tokenizer(doComments=parseComments)
+        self.__tokenizer = tokenize2.Tokenizer(doComments=parseComments,
+                                                singlePass=True,
+                                                lazyPositions=True)
         self.setFetcher(fetcher)
 
         self._validate = validate
-
-    def __parseSetting(self, parse):
-        """during parse exceptions may be handled differently depending on
-        init parameter ``raiseExceptions``
+        self.__profile = profile
+        self.__lazyValues = lazyValues
+        self.__lazyRules = lazyRules
+        self.__keepSource = keepSource
+
+    def __parseSetting(self, source=None):
+        """Return a new :class:`~css_parser.parsecontext.ParseContext` for a
+        parse of `source`, exceptions may be handled differently during a
+        parse depending on init parameter ``raiseExceptions``.
         """
-        if parse:
-            css_parser.log.raiseExceptions = self.__parseRaising
-        else:
-            css_parser.log.raiseExceptions = self.__globalRaising
+        if not self.__keepSource:
+            source = None
+        return ParseContext(raiseExceptions=self.__parseRaising,
+                            profile=self.__profile,
+                            lazyValues=self.__lazyValues,
+                            lazyRules=self.__lazyRules,
+                            source=source)
 
     def parseStyle(self, cssText, encoding='utf-8', validate=None):
         """Parse given `cssText` which is assumed to be the content of
@@ -93,14 +139,16 @@ class CSSParser(object):
         :returns:
             :class:`~css_parser.css.CSSStyleDeclaration`
         """
-        self.__parseSetting(True)
         if isinstance(cssText, bytes):
             # TODO: use codecs.getdecoder('css') here?
             cssText = cssText.decode(encoding)
         if validate is None:
             validate = self._validate
-        style = css.CSSStyleDeclaration(cssText, validating=validate)
-        self.__parseSetting(False)
+        if self.__lazyValues:
+            # unparsed values cannot be validated
+            validate = False
+        with using(self.__parseSetting()):
+            style = css.CSSStyleDeclaration(cssText, validating=validate)
         return style
 
     def parseString(self, cssText, encoding=None, href=None, media=None,
@@ -132,13 +180,23 @@ class CSSParser(object):
         :returns:
             :class:`~css_parser.css.CSSStyleSheet`.
         """
-        self.__parseSetting(True)
         # TODO: py3 needs bytes here!
         if isinstance(cssText, bytes):
             cssText = codecs.getdecoder('css')(cssText, encoding=encoding)[0]
 
+        # tokenizing this ways closes open constructs and adds EOF
+        return self.__parseTokens(self.__tokenizer.tokenize(cssText,
+                                                            fullsheet=True),
+                                  encoding, href, media, title, validate,
+                                  cssText)
+
+    def __newSheet(self, href, media, title, validate):
+        "Return new empty sheet using the settings of this parser"
         if validate is None:
             validate = self._validate
+        if self.__lazyValues:
+            # unparsed values cannot be validated
+            validate = False
 
         sheet = css_parser.css.CSSStyleSheet(
                 href=href,
@@ -146,19 +204,72 @@ class CSSParser(object):
                 title=title,
                 validating=validate)
         sheet._setFetcher(self.__fetcher)
-        # tokenizing this ways closes open constructs and adds EOF
-        sheet._setCssTextWithEncodingOverride(self.__tokenizer.tokenize(cssText,
-                                                                        fullsheet=True),
-                                              encodingOverride=encoding)
-        self.__parseSetting(False)
         return sheet
 
+    def __parseTokens(self, tokens, encoding, href, media, title, validate,
+                      source=None):
+        "Return new sheet with rules parsed from `tokens` of text `source`"
+        sheet = self.__newSheet(href, media, title, validate)
+        with using(self.__parseSetting(source)):
+            sheet._setCssTextWithEncodingOverride(tokens,
+                                                  encodingOverride=encoding)
+        return sheet
+
+    def iterRules(self, cssText, encoding=None, href=None, media=None,
+                  title=None, validate=None):
+        """Generator: Parse `cssText` like :meth:`parseString` but yield
+        each top-level :class:`~css_parser.css.CSSRule` as soon as it is
+        parsed. No :class:`~css_parser.css.CSSStyleSheet` with all rules is
+        built and rules are not kept by the parser, so memory use does not
+        grow with the number of rules.
+
+        Rules are yielded in source order and are not reordered or cleaned
+        up as in a complete sheet. A @namespace rule for an already declared
+        prefix only changes the namespace used by following rules. Parameters
+        are the same as for :meth:`parseString`.
+        """
+        if isinstance(cssText, bytes):
+            cssText = codecs.getdecoder('css')(cssText, encoding=encoding)[0]
+
+        sheet = self.__newSheet(href, media, title, validate)
+        rules = sheet._iterRules(self.__tokenizer.tokenize(cssText,
+                                                           fullsheet=True),
+                                 encodingOverride=encoding)
+        context = self.__parseSetting(cssText)
+        while True:
+            # only use parse settings while parsing, not in caller code
+            with using(context):
+                try:
+                    rule = next(rules)
+                except StopIteration:
+                    return
+            yield rule
+
+    def __readChunks(self, filename, encoding, chunksize):
+        "Yield text of `filename` decoded incrementally in chunks"
+        decoder = codecs.getincrementaldecoder('css')(encoding=encoding)
+        with open(filename, 'rb') as f:
+            while True:
+                data = f.read(chunksize)
+                if not data:
+                    break
+                text = decoder.decode(data, False)
+                if text:
+                    yield text
+        text = decoder.decode(b'', True)
+        if text:
+            yield text
+
     def parseFile(self, filename, encoding=None,
                   href=None, media=None, title=None,
-                  validate=None):
+                  validate=None, chunkSize=65536):
         """Retrieve content from `filename` and parse it. Errors may be raised
         (e.g. IOError).
 
+        The file is read, decoded and tokenized in chunks of `chunkSize`
+        bytes so the complete file content is never held in memory at once
+        (unless the parser has been created with ``keepSource``).
+
         :param filename:
             of the CSS file to parse, if no `href` is given filename is
             converted to a (file:) URL and set as ``href`` of resulting
@@ -171,20 +282,64 @@ class CSSParser(object):
             @charset rule.
             Other values override detected encoding for the sheet at
             `filename` including any imported sheets.
+        :param chunkSize:
+            Number of bytes read from `filename` at once.
         :returns:
             :class:`~css_parser.css.CSSStyleSheet`.
         """
         if not href:
             href = path2url(filename)
 
-        f = open(filename, 'rb')
-        css = f.read()
-        f.close()
+        chunks = self.__readChunks(filename, encoding, chunkSize)
+        if self.__keepSource:
+            # complete text is needed
+            cssText = ''.join(chunks)
+            return self.__parseTokens(
+                self.__tokenizer.tokenize(cssText, fullsheet=True),
+                encoding, href, media, title, validate, cssText)
 
-        return self.parseString(css,
-                                encoding=encoding,  # read returns a str
-                                href=href, media=media, title=title,
-                                validate=validate)
+        # tokenizing this ways closes open constructs and adds EOF
+        return self.__parseTokens(self.__tokenizer.tokenizeChunks(chunks,
+                                                                  fullsheet=True),
+                                  encoding, href, media, title, validate)
+
+    def parseMany(self, filenames, encoding=None, media=None, title=None,
+                  validate=None, workers=None):
+        """Parse several files like :meth:`parseFile` in a pool of `workers`
+        processes. Errors are not raised but returned for each file.
+
+        The parser and the resulting sheets are pickled to be passed between
+        processes, so e.g. a fetcher set with :meth:`setFetcher` must be
+        picklable. Settings of ``css_parser.log`` are those of the worker
+        processes.
+
+        :param filenames:
+            files to parse, ``sheet.href`` is set to the URL of each file
+        :param workers:
+            maximum number of processes used, defaults to the number of
+            processors. If ``1`` files are parsed in this process.
+        :returns:
+            list of ``(sheet, error)`` tuples in the order of `filenames`
+            where either the :class:`~css_parser.css.CSSStyleSheet` or the
+            exception raised while parsing the file is ``None``.
+        """
+        kwargs = {'encoding': encoding, 'media': media, 'title': title,
+                  'validate': validate}
+        if workers == 1:
+            return [_parseFile(self, filename, kwargs)
+                    for filename in filenames]
+
+        results = []
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_parseFile, self, filename, kwargs)
+                       for filename in filenames]
+            for future in futures:
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    # e.g. an unpicklable result or a broken pool
+                    results.append((None, e))
+        return results
 
     def parseUrl(self, href, encoding=None, media=None, title=None,
                  validate=None):
@@ -0,0 +1,110 @@
+"""Settings and state of parsing in the current thread.
+
+Each thread has its own current :class:`ParseContext` so several threads may
+parse at the same time. :class:`~css_parser.CSSParser` uses a new context
+with its own settings for each parse, classes used without a parser use the
+default context of the thread which uses the global settings.
+"""
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import threading
+from contextlib import contextmanager
+
+import css_parser
+
+from .tokenize2 import Tokenizer
+
+__all__ = ['ParseContext']
+__docformat__ = 'restructuredtext'
+__version__ = '$Id$'
+
+
+class ParseContext(object):
+    """Settings and state of a parse.
+
+    raiseExceptions
+        if errors are raised (``True``) or only logged (``False``), if
+        ``None`` ``css_parser.log.raiseExceptions`` is used
+    profile
+        :class:`~css_parser.profiles.Profiles` used for validation, if
+        ``None`` ``css_parser.profile`` is used
+    lazyValues
+        if values of properties are parsed on first use only
+    lazyRules
+        if declarations of style rules are parsed on first use only
+    source
+        the parsed text if rules keep the text they are parsed from, else
+        ``None``
+    """
+    def __init__(self, raiseExceptions=None, profile=None, lazyValues=False,
+                 lazyRules=False, source=None):
+        self.raiseExceptions = raiseExceptions
+        self._profile = profile
+        self.lazyValues = lazyValues
+        self.lazyRules = lazyRules
+        self.source = source
+        self._tokenizer = None
+        # tokens saved by a ProdParser for the one parsing the outer value
+        self.savedTokens = []
+
+    def __repr__(self):
+        return ("css_parser.parsecontext.%s(raiseExceptions=%r, profile=%r, "
+                "lazyValues=%r, lazyRules=%r)" % (self.__class__.__name__,
+                                                  self.raiseExceptions,
+                                                  self._profile,
+                                                  self.lazyValues,
+                                                  self.lazyRules))
+
+    def copy(self):
+        """Return new context with the same settings (but no parsing
+        state)."""
+        return self.__class__(self.raiseExceptions, self._profile,
+                              self.lazyValues, self.lazyRules, self.source)
+
+    def __getstate__(self):
+        # parsing state is not kept
+        return (self.raiseExceptions, self._profile, self.lazyValues,
+                self.lazyRules, self.source)
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+    def _getProfile(self):
+        if self._profile is None:
+            return css_parser.profile
+        return self._profile
+
+    profile = property(_getProfile,
+                       doc="Profiles used for validation.")
+
+    def _getTokenizer(self):
+        if self._tokenizer is None:
+            self._tokenizer = Tokenizer(singlePass=True)
+        return self._tokenizer
+
+    tokenizer = property(_getTokenizer,
+                         doc="Tokenizer used by ProdParser and value "
+                             "grammars, pushed back tokens are kept here.")
+
+
+_local = threading.local()
+
+
+def current():
+    """Return the :class:`ParseContext` of the current thread."""
+    try:
+        return _local.context
+    except AttributeError:
+        _local.context = context = ParseContext()
+        return context
+
+
+@contextmanager
+def using(context):
+    """Make `context` the current one of this thread in a ``with`` block."""
+    previous = current()
+    _local.context = context
+    try:
+        yield context
+    finally:
+        _local.context = previous
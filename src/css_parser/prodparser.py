@@ -26,7 +26,8 @@ import sys
 import types
 
 import css_parser
-from css_parser.tokenize2 import Tokenizer
+from css_parser import parsecontext
+from css_parser.tokenize2 import resolve
 
 from .helper import pushtoken
 
@@ -118,7 +119,7 @@ class Choice(object):
             else:
                 if not optional:
                     # None matched but also None is optional
-                    raise NoMatch('No match for %s in %s' % (token, self))
+                    raise NoMatch('No match for %s in %s' % (resolve(token), self))
                     # raise ParseError(u'No match in %s for %s' % (self, token))
         elif token:
             raise Exhausted('Extra token')
@@ -233,7 +234,7 @@ class Sequence(object):
                     raise Done()
 
             else:
-                raise NoMatch('No match for %s in %s' % (token, self))
+                raise NoMatch('No match for %s in %s' % (resolve(token), self))
 
         if token:
             raise Exhausted('Extra token')
@@ -349,21 +350,19 @@ class Prod(object):
             self.__class__.__name__, self._name, id(self))
 
 
-# global tokenizer as there is only one!
-tokenizer = Tokenizer()
-
-# global: saved from subProds
-savedTokens = []
-
-
 class ProdParser(object):
     """Productions parser."""
 
     def __init__(self, clear=True):
         self.types = css_parser.cssproductions.CSSProductions
         self._log = css_parser.log
+        # tokenizer and tokens saved from subProds are shared by all
+        # ProdParsers of the current parse
+        context = parsecontext.current()
+        self._tokenizer = context.tokenizer
+        self._savedTokens = context.savedTokens
         if clear:
-            tokenizer.clear()
+            self._tokenizer.clear()
 
     def _texttotokens(self, text):
         """Build a generator which is the only thing that is parsed!
@@ -372,7 +371,7 @@ class ProdParser(object):
         # under python 2.x this was basestring, but ...
         if isinstance(text, string_type):
             # DEFAULT, to tokenize strip space
-            return tokenizer.tokenize(text.strip())
+            return self._tokenizer.tokenize(text.strip())
 
         elif type(text) is types.GeneratorType:  # noqa
             # DEFAULT, already tokenized, should be generator
@@ -479,7 +478,7 @@ class ProdParser(object):
             # get from savedTokens or normal tokens
             try:
                 # print debug, "SAVED", savedTokens
-                token = savedTokens.pop()
+                token = self._savedTokens.pop()
             except IndexError:
                 try:
                     token = next(tokens)
@@ -510,7 +509,7 @@ class ProdParser(object):
             elif type_ == self.types.INVALID:
                 # invalidate parse
                 wellformed = False
-                self._log.error('Invalid token: %r' % (token,))
+                self._log.error('Invalid token: %r' % (resolve(token),))
                 break
 
             elif type_ == 'EOF':
@@ -546,24 +545,24 @@ class ProdParser(object):
                     if stopIfNoMoreMatch:  # and token:
                         # print "\t1stopIfNoMoreMatch", e, token, prod, 'PUSHING'
                         # tokenizer.push(token)
-                        savedTokens.append(token)
+                        self._savedTokens.append(token)
                         stopall = True
 
                     else:
                         wellformed = False
-                        self._log.error('%s: %s: %r' % (name, e, token))
+                        self._log.error('%s: %s: %r' % (name, e, resolve(token)))
                     break
 
                 except ParseError as e:
                     # needed???
                     if stopIfNoMoreMatch:  # and token:
                         # print "\t2stopIfNoMoreMatch", e, token, prod
-                        tokenizer.push(token)
+                        self._tokenizer.push(token)
                         stopall = True
 
                     else:
                         wellformed = False
-                        self._log.error('%s: %s: %r' % (name, e, token))
+                        self._log.error('%s: %s: %r' % (name, e, resolve(token)))
                     break
 
                 else:
@@ -596,7 +595,7 @@ class ProdParser(object):
                         # but keep this token for next run
 
                         # TODO: CHECK!!!!
-                        tokenizer.push(token)
+                        self._tokenizer.push(token)
                         tokens = itertools.chain(token, tokens)
 
                         stopall = True
@@ -1,8 +1,12 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+import pickle
 import re
+import threading
+from collections import OrderedDict
 
 from css_parser import util
+from css_parser.valuegrammar import ValueGrammar
 
 """CSS profiles.
 
@@ -24,6 +28,10 @@ def as_list(p):
     return list(p)
 
 
+# format of Profiles.snapshot()
+_SNAPSHOT_FORMAT = 1
+
+
 class NoSuchProfileException(Exception):
     """Raised if no profile with given name is found"""
     pass
@@ -58,6 +66,15 @@ class Profiles(object):
 
     If you want to redefine any of these macros do this in your custom
     macros.
+
+    Some properties with values which are slow to validate with regular
+    expressions (e.g. long lists in ``font-family`` or ``box-shadow``) may
+    be validated by a :class:`~css_parser.valuegrammar.ValueGrammar` instead
+    if a Profiles object is created with ``useGrammars=True``.
+
+    Results of :meth:`validateWithProfile` are kept in a cache of the
+    last `cacheSize` validated ``(name, value, profiles)`` combinations which
+    is cleared whenever profiles or ``defaultProfiles`` change.
     """
     CSS_LEVEL_2 = 'CSS Level 2.1'
     CSS3_BACKGROUNDS_AND_BORDERS = 'CSS Backgrounds and Borders Module Level 3'
@@ -105,10 +122,25 @@ class Profiles(object):
         'shadow': '(inset)?{w}{length}{w}{length}{w}{length}?{w}{length}?{w}{color}?'
     }
 
-    def __init__(self, log=None):
-        """A few profiles are predefined."""
+    def __init__(self, log=None, cacheSize=4096, useGrammars=False):
+        """A few profiles are predefined.
+
+        :param cacheSize:
+            maximum number of validation results kept, ``0`` disables the
+            cache
+        :param useGrammars:
+            if ``True`` the predefined profiles use grammars instead of
+            regular expressions for some properties
+        """
         self._log = log
 
+        # validation results: {(name, value, profiles): result, ...}
+        self._cacheSize = cacheSize
+        self._cache = OrderedDict()
+        self._cacheLock = threading.Lock()
+        self._cacheHits = 0
+        self._cacheMisses = 0
+
         # macro cache
         self._usedMacros = Profiles._TOKEN_MACROS.copy()
         self._usedMacros.update(Profiles._MACROS.copy())
@@ -122,41 +154,47 @@ class Profiles(object):
 
         self._defaultProfiles = None
 
+        def predefined(profile):
+            "properties of a predefined profile"
+            if useGrammars and profile in grammars:
+                return dict(properties[profile], **grammars[profile])
+            return properties[profile]
+
         self.addProfiles([(self.CSS_LEVEL_2,
-                           properties[self.CSS_LEVEL_2],
+                           predefined(self.CSS_LEVEL_2),
                            macros[self.CSS_LEVEL_2]
                            ),
                           (self.CSS3_BACKGROUNDS_AND_BORDERS,
-                           properties[self.CSS3_BACKGROUNDS_AND_BORDERS],
+                           predefined(self.CSS3_BACKGROUNDS_AND_BORDERS),
                            macros[self.CSS3_BACKGROUNDS_AND_BORDERS]
                            ),
                           (self.CSS3_BASIC_USER_INTERFACE,
-                           properties[self.CSS3_BASIC_USER_INTERFACE],
+                           predefined(self.CSS3_BASIC_USER_INTERFACE),
                            macros[self.CSS3_BASIC_USER_INTERFACE]
                            ),
                           (self.CSS3_BOX,
-                           properties[self.CSS3_BOX],
+                           predefined(self.CSS3_BOX),
                            macros[self.CSS3_BOX]
                            ),
                           (self.CSS3_COLOR,
-                           properties[self.CSS3_COLOR],
+                           predefined(self.CSS3_COLOR),
                            macros[self.CSS3_COLOR]
                            ),
                           (self.CSS3_FONTS,
-                           properties[self.CSS3_FONTS],
+                           predefined(self.CSS3_FONTS),
                            macros[self.CSS3_FONTS]
                            ),
                           # new object for font-face only?
                           (self.CSS3_FONT_FACE,
-                           properties[self.CSS3_FONT_FACE],
+                           predefined(self.CSS3_FONT_FACE),
                            macros[self.CSS3_FONTS]
                            ),
                           (self.CSS3_PAGED_MEDIA,
-                           properties[self.CSS3_PAGED_MEDIA],
+                           predefined(self.CSS3_PAGED_MEDIA),
                            macros[self.CSS3_PAGED_MEDIA]
                            ),
                           (self.CSS3_TEXT,
-                           properties[self.CSS3_TEXT],
+                           predefined(self.CSS3_TEXT),
                            macros[self.CSS3_TEXT]
                            )
                           ])
@@ -169,7 +207,9 @@ class Profiles(object):
             return '(?:%s)' % macros[m.groupdict()['macro']]
 
         for key, value in as_list(dictionary.items()):
-            if not hasattr(value, '__call__'):
+            if isinstance(value, ValueGrammar):
+                value = value.compile(macros)
+            elif not hasattr(value, '__call__'):
                 while re.search(r'{[a-z][a-z0-9-]*}', value):
                     value = re.sub(r'{(?P<macro>[a-z][a-z0-9-]*)}',
                                    macro_value, value)
@@ -190,10 +230,83 @@ class Profiles(object):
 
         return dictionary
 
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_cacheLock']
+        state['_cache'] = OrderedDict()
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._cacheLock = threading.Lock()
+
+    def warmup(self):
+        """Compile all regular expressions and grammars of all profiles now
+        instead of on first use, e.g. in a process before it forks workers.
+        """
+        for properties in self._profilesProperties.values():
+            for checker in properties.values():
+                ensure = getattr(checker, 'ensure', None)
+                if ensure is not None:
+                    ensure()
+
+    def snapshot(self):
+        """Return a snapshot of all profiles with all macros expanded as
+        bytes which may be stored and loaded with :meth:`fromSnapshot`
+        (e.g. at the start of a new process) instead of creating a new
+        Profiles object. Custom validation functions must be picklable.
+
+        Regular expressions are not compiled in the snapshot, use
+        :meth:`warmup` after loading it.
+        """
+        import css_parser
+        state = self.__getstate__()
+        state.update(_log=None, _cacheHits=0, _cacheMisses=0)
+        return pickle.dumps(((_SNAPSHOT_FORMAT, css_parser.VERSION), state),
+                            pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def fromSnapshot(cls, snapshot, log=None):
+        """Return new Profiles object from `snapshot` made by
+        :meth:`snapshot`.
+
+        :exceptions:
+            - :exc:`ValueError`:
+              If `snapshot` was made by a different version of css_parser.
+        """
+        import css_parser
+        version, state = pickle.loads(snapshot)
+        if version != (_SNAPSHOT_FORMAT, css_parser.VERSION):
+            raise ValueError('Snapshot of version %r cannot be used.'
+                             % (version,))
+        profiles = cls.__new__(cls)
+        profiles.__setstate__(state)
+        profiles._log = log
+        return profiles
+
+    def clearCache(self):
+        """Remove all cached validation results, called automatically if
+        profiles change."""
+        with self._cacheLock:
+            self._cache.clear()
+
+    cacheHits = property(lambda self: self._cacheHits,
+                         doc="Number of validations answered from the cache.")
+
+    cacheMisses = property(lambda self: self._cacheMisses,
+                           doc="Number of validations not found in the "
+                               "cache.")
+
     def __update_knownNames(self):
-        self._knownNames = []
-        for properties in as_list(self._profilesProperties.values()):
-            self._knownNames.extend(as_list(properties.keys()))
+        "Rebuild knownNames and the index of checkers of each property"
+        self.clearCache()
+        # {name: [(profile, checkfunc), ...], ...} in order of profiles
+        index = {}
+        for profile in self._profileNames:
+            for name, checker in self._profilesProperties[profile].items():
+                index.setdefault(name, []).append((profile, checker))
+        self._index = index
+        self._knownNames = frozenset(index)
 
     def _getDefaultProfiles(self):
         "If not explicitly set same as Profiles.profiles but in reverse order."
@@ -209,6 +322,7 @@ class Profiles(object):
             self._defaultProfiles = (profiles,)
         else:
             self._defaultProfiles = profiles
+        self.clearCache()
 
     defaultProfiles = property(_getDefaultProfiles,
                                _setDefaultProfiles,
@@ -221,7 +335,8 @@ class Profiles(object):
                         doc='Names of all profiles in order as defined.')
 
     knownNames = property(lambda self: self._knownNames,
-                          doc="All known property names of all profiles.")
+                          doc="All known property names of all profiles "
+                              "as a frozenset.")
 
     def _resetProperties(self, newMacros=None):
         "reset all props from raw values as changes in macros happened"
@@ -248,6 +363,7 @@ class Profiles(object):
 
         # save
         self._usedMacros = macros
+        self.__update_knownNames()
 
     def addProfiles(self, profiles):
         """Add a list of profiles at once. Useful as if profiles define custom
@@ -276,6 +392,10 @@ class Profiles(object):
             ``macros`` or the standard macros Profiles.tokens and
             Profiles.generalvalues.
 
+            ``propery-value`` may also be a
+            :class:`~css_parser.valuegrammar.ValueGrammar` which may use the
+            same macros.
+
             ``propery-value`` may also be a function which takes a single
             argument which is the value to validate and which should return
             True or False.
@@ -383,18 +503,17 @@ class Profiles(object):
             if the `value` is valid for the given property `name` in any
             profile
         """
-        for profile in self.profiles:
-            if name in self._profilesProperties[profile]:
-                try:
-                    # custom validation errors are caught
-                    r = bool(self._profilesProperties[profile][name](value))
-                except Exception as e:
-                    # TODO: more specific exception?
-                    # Validate should not be fatal though!
-                    self._log.error(e, error=Exception)
-                    r = False
-                if r:
-                    return r
+        for profile, validate in self._index.get(name, ()):
+            try:
+                # custom validation errors are caught
+                r = bool(validate(value))
+            except Exception as e:
+                # TODO: more specific exception?
+                # Validate should not be fatal though!
+                self._log.error(e, error=Exception)
+                r = False
+            if r:
+                return r
         return False
 
     def validateWithProfile(self, name, value, profiles=None):
@@ -420,41 +539,68 @@ class Profiles(object):
             >>> print css_parser.profile.validateWithProfile('color', 'rgba(1,1,1,1)')
             (True, False, Profiles.CSS3_COLOR)
         """
-        if name not in self.knownNames:
-            return False, False, []
+        if not self._cacheSize:
+            return self.__validateWithProfile(name, value, profiles)[0]
+
+        if profiles and not isinstance(profiles, string_type):
+            profiles = tuple(profiles)
+        key = (name, value, profiles)
+        with self._cacheLock:
+            try:
+                valid, matching, names = self._cache[key]
+            except KeyError:
+                self._cacheMisses += 1
+            else:
+                self._cache.move_to_end(key)
+                self._cacheHits += 1
+                return valid, matching, list(names)
+
+        result, cacheable = self.__validateWithProfile(name, value, profiles)
+        if cacheable:
+            valid, matching, names = result
+            with self._cacheLock:
+                self._cache[key] = valid, matching, tuple(names)
+                if len(self._cache) > self._cacheSize:
+                    self._cache.popitem(last=False)
+        return result
+
+    def __validateWithProfile(self, name, value, profiles):
+        """Return (result of validateWithProfile, cacheable) where result is
+        not cacheable if a custom validation function failed."""
+        cacheable = True
+        checkers = self._index.get(name)
+        if not checkers:
+            return (False, False, []), cacheable
         else:
             if not profiles:
                 profiles = self.defaultProfiles
             elif isinstance(profiles, string_type):
                 profiles = (profiles, )
+            byprofile = dict(checkers)
             for profilename in reversed(profiles):
                 # check given profiles
-                if name in self._profilesProperties[profilename]:
-                    validate = self._profilesProperties[profilename][name]
+                validate = byprofile.get(profilename)
+                if validate is not None:
                     try:
                         if validate(value):
-                            return True, True, [profilename]
+                            return (True, True, [profilename]), cacheable
                     except Exception as e:
+                        cacheable = False
                         self._log.error(e, error=Exception)
 
-            for profilename in (p for p in self._profileNames
-                                if p not in profiles):
+            for profilename, validate in checkers:
                 # check remaining profiles as well
-                if name in self._profilesProperties[profilename]:
-                    validate = self._profilesProperties[profilename][name]
+                if profilename not in profiles:
                     try:
                         if validate(value):
-                            return True, False, [profilename]
+                            return (True, False, [profilename]), cacheable
                     except Exception as e:
+                        cacheable = False
                         self._log.error(e, error=Exception)
 
-            names = []
-            for profilename, properties in as_list(self._profilesProperties.items()):
-                # return profile to which name belongs
-                if name in as_list(properties.keys()):
-                    names.append(profilename)
-            names.sort()
-            return False, False, names
+            # return profiles to which name belongs
+            names = sorted(profilename for profilename, validate in checkers)
+            return (False, False, names), cacheable
 
 
 properties = {}
@@ -746,3 +892,26 @@ macros[Profiles.CSS3_TEXT] = {
 properties[Profiles.CSS3_TEXT] = {
     'text-shadow': 'none|{shadow}({w},{w}{shadow})*',
 }
+
+# grammars used instead of the regular expressions if Profiles(useGrammars=True)
+_family = {'family-name': '<string> | <ident>+'}
+_shadow = {'shadow': 'inset? <length> <length> <length>? <length>? <color>?'}
+
+grammars = {}
+grammars[Profiles.CSS_LEVEL_2] = {
+    'background': ValueGrammar('<background-attrs>+ | inherit'),
+    'font-family': ValueGrammar('<family-name># | inherit', _family),
+    'font': ValueGrammar('<font-attrs>* <font-size> [ / <line-height> ]? '
+                         '[ <family-name># | inherit ] | caption | icon | '
+                         'menu | message-box | small-caption | status-bar | '
+                         'inherit', _family),
+}
+grammars[Profiles.CSS3_BACKGROUNDS_AND_BORDERS] = {
+    'box-shadow': ValueGrammar('none | <shadow>#', _shadow),
+}
+grammars[Profiles.CSS3_FONT_FACE] = {
+    'font-family': ValueGrammar('<family-name>', _family),
+}
+grammars[Profiles.CSS3_TEXT] = {
+    'text-shadow': ValueGrammar('none | <shadow>#', _shadow),
+}
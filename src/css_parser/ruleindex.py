@@ -0,0 +1,176 @@
+"""Index of the style rules of a style sheet by the elements they may apply
+to.
+
+Each :class:`~css_parser.css.Selector` of a style rule is put in one bucket
+by the key of its rightmost compound selector (the part after the last
+combinator), the one which has to match the element itself:
+
+- the id if it has one, e.g. ``#x`` of ``div p#x.a``
+- else a class, e.g. ``.a`` of ``div p.a.b``
+- else the (lowercased) element name, e.g. ``p`` of ``div > p:hover``
+- else it may apply to any element, e.g. ``div *`` or ``[lang]``
+
+The selectors which could apply to an element are then found in the
+buckets of its id, classes and name (and the universal one) only instead of
+checking all selectors. If they do apply has still to be checked.
+"""
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import heapq
+
+from .helper import unescape
+
+__all__ = ['RuleIndex', 'IndexedSelector', 'selectorKey']
+__docformat__ = 'restructuredtext'
+__version__ = '$Id$'
+
+
+# types of Selector.seq items which are combinators
+COMBINATORS = frozenset(('descendant', 'child', 'adjacent-sibling',
+                         'following-sibling'))
+
+
+def selectorKey(selector):
+    """Return key of the rightmost compound selector of `selector`, one of
+    ``('id', id)``, ``('class', classname)``, ``('tag', lowercased name)``
+    or ``None`` if it may apply to any element."""
+    classname = tag = None
+    for item in reversed(selector.seq):
+        type_ = item.type
+        if type_ in COMBINATORS:
+            break
+        elif type_ == 'id':
+            return 'id', unescape(item.value[1:])
+        elif type_ == 'class':
+            # the leftmost one of the compound
+            classname = unescape(item.value[1:])
+        elif type_ == 'type-selector':
+            tag = item.value[1].lower()
+    if classname is not None:
+        return 'class', classname
+    elif tag is not None:
+        return 'tag', tag
+    return None
+
+
+class IndexedSelector(object):
+    """A selector in a :class:`RuleIndex`.
+
+    selector
+        the :class:`~css_parser.css.Selector`
+    rule
+        the :class:`~css_parser.css.CSSStyleRule` containing it
+    order
+        position of the selector in the index, the rules of later selectors
+        are later in the style sheet(s)
+    """
+    __slots__ = ('selector', 'rule', 'order')
+
+    def __init__(self, selector, rule, order):
+        self.selector = selector
+        self.rule = rule
+        self.order = order
+
+    def __lt__(self, other):
+        return self.order < other.order
+
+    def __repr__(self):
+        return "<css_parser.ruleindex.%s selectorText=%r order=%r>" % (
+            self.__class__.__name__, self.selector.selectorText, self.order)
+
+    specificity = property(lambda self: self.selector.specificity,
+                           doc="Specificity of the selector.")
+
+
+class RuleIndex(object):
+    """Style rules of style sheets indexed by the rightmost compound
+    selector of their selectors.
+
+    Example::
+
+        index = RuleIndex(sheet)
+        for indexed in index.candidates('p', classes=['a', 'b'], id='x'):
+            print(indexed.selector.selectorText, indexed.rule.style.cssText)
+
+    The index reflects the sheets when added, it is not updated if a sheet
+    changes later.
+    """
+    def __init__(self, sheet=None):
+        """
+        :param sheet:
+            optional :class:`~css_parser.css.CSSStyleSheet` added to the index
+            with :meth:`addSheet`
+        """
+        self._ids = {}
+        self._classes = {}
+        self._tags = {}
+        self._universal = []
+        self._count = 0
+        if sheet is not None:
+            self.addSheet(sheet)
+
+    def __len__(self):
+        "Number of indexed selectors."
+        return self._count
+
+    def __repr__(self):
+        return "<css_parser.ruleindex.%s selectors=%r>" % (
+            self.__class__.__name__, self._count)
+
+    def addSheet(self, sheet):
+        """Add all style rules of `sheet`, also the ones in @media rules and
+        in style sheets of @import rules (which have been loaded). Rules
+        added later come later in the cascade."""
+        for rule in sheet.cssRules:
+            if rule.type == rule.IMPORT_RULE:
+                if rule.styleSheet is not None:
+                    self.addSheet(rule.styleSheet)
+            else:
+                self.addRule(rule)
+
+    def addRule(self, rule):
+        """Add `rule` if it is a :class:`~css_parser.css.CSSStyleRule` or
+        the style rules contained in `rule` if it is a
+        :class:`~css_parser.css.CSSMediaRule`. Other rules are ignored."""
+        if rule.type == rule.STYLE_RULE:
+            for selector in rule.selectorList:
+                self._add(selector, rule)
+        elif rule.type == rule.MEDIA_RULE:
+            for child in rule.cssRules:
+                self.addRule(child)
+
+    def _add(self, selector, rule):
+        indexed = IndexedSelector(selector, rule, self._count)
+        self._count += 1
+        key = selectorKey(selector)
+        if key is None:
+            self._universal.append(indexed)
+        else:
+            buckets = {'id': self._ids,
+                       'class': self._classes,
+                       'tag': self._tags}[key[0]]
+            buckets.setdefault(key[1], []).append(indexed)
+
+    def candidates(self, tag=None, classes=(), id=None):
+        """Return list of :class:`IndexedSelector` in cascade order whose
+        selectors may apply to an element.
+
+        :param tag:
+            name of the element
+        :param classes:
+            iterable of class names of the element
+        :param id:
+            id of the element
+        """
+        buckets = [self._universal]
+        if id is not None and id in self._ids:
+            buckets.append(self._ids[id])
+        for classname in set(classes):
+            if classname in self._classes:
+                buckets.append(self._classes[classname])
+        if tag is not None and tag.lower() in self._tags:
+            buckets.append(self._tags[tag.lower()])
+
+        if len(buckets) == 1:
+            return list(buckets[0])
+        return list(heapq.merge(*buckets))
@@ -0,0 +1,790 @@
+"""Matching of :class:`~css_parser.css.Selector` objects against the elements
+of a document.
+
+A selector is compiled into a chain of closures which is evaluated from the
+right: the compound selector which has to match the element itself is
+checked first and only if it matches are ancestors or siblings checked.
+
+Elements are accessed through an :class:`ElementAdapter` so any document
+tree may be used. Adapters for lxml (also as built by html5lib with the
+``lxml`` treebuilder), ElementTree (html5lib's default treebuilder) and
+nested dicts are included.
+
+Example::
+
+    import xml.etree.ElementTree as ET
+    root = ET.fromstring('<div><p class="a">x</p></div>')
+    compiled = compileSelector('div > .a', ElementTreeAdapter(root))
+    compiled.match(root[0])  # True
+
+While walking a document an :class:`AncestorFilter` of the ids, classes
+and names of the ancestors of the current element lets
+:meth:`CompiledSelector.mayMatch` reject most selectors with descendant or
+child combinators without walking up the tree.
+
+Names of elements are compared case-insensitively, everything else is
+case-sensitive. Dynamic pseudo-classes like ``:hover`` and unknown ones never
+match. Pseudo-elements are not matched but available as
+:attr:`CompiledSelector.pseudoElement`, ``match`` checks the originating
+element only.
+"""
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import re
+import zlib
+
+import css_parser
+from css_parser.helper import unescape
+
+__all__ = ['compileSelector', 'CompiledSelector', 'AncestorFilter',
+           'ElementAdapter', 'LxmlAdapter', 'ElementTreeAdapter',
+           'DictAdapter']
+__docformat__ = 'restructuredtext'
+__version__ = '$Id$'
+
+XML_NAMESPACE = 'http://www.w3.org/XML/1998/namespace'
+
+# types of Selector.seq items which are combinators
+COMBINATORS = frozenset(('descendant', 'child', 'adjacent-sibling',
+                         'following-sibling'))
+
+# bits of the hashes of ancestor keys used by AncestorFilter
+_FILTER_BITS = 12
+_FILTER_MASK = (1 << _FILTER_BITS) - 1
+
+_NTH = re.compile(r'^(?:([+-]?)(\d*)n(?:([+-])(\d+))?|([+-]?\d+))$')
+
+
+def _never(element):
+    return False
+
+
+def _always(element):
+    return True
+
+
+def _clark(tag):
+    "Return (namespaceURI or None, local name) of an ElementTree `tag`."
+    if tag[:1] == '{':
+        uri, local = tag[1:].split('}', 1)
+        return uri, local
+    return None, tag
+
+
+def _isElement(node):
+    # comments, processing instructions and entities have factory functions
+    # as tag
+    return isinstance(node.tag, str)
+
+
+class ElementAdapter(object):
+    """Access to the elements of a document tree used by
+    :class:`CompiledSelector`.
+
+    Subclasses implement at least :meth:`tag`, :meth:`attr`, :meth:`parent`,
+    :meth:`previousSibling`, :meth:`nextSibling` and :meth:`children` for
+    their kind of element. Only elements are returned, never text, comments
+    or processing instructions.
+    """
+    def tag(self, element):
+        "Return local name of `element`."
+        raise NotImplementedError()
+
+    def namespace(self, element):
+        "Return namespace URI of `element` or ``None`` if it has none."
+        return None
+
+    def attr(self, element, name):
+        """Return value of attribute `name` of `element` or ``None`` if it is
+        not set. ``xml:lang`` is the ``lang`` attribute in the XML
+        namespace."""
+        raise NotImplementedError()
+
+    def id(self, element):
+        "Return id of `element` or ``None``."
+        return self.attr(element, 'id')
+
+    def classes(self, element):
+        "Return list of class names of `element`."
+        value = self.attr(element, 'class')
+        if value:
+            return value.split()
+        return []
+
+    def parent(self, element):
+        "Return parent element of `element` or ``None`` for the root."
+        raise NotImplementedError()
+
+    def previousSibling(self, element):
+        "Return preceding sibling element of `element` or ``None``."
+        raise NotImplementedError()
+
+    def nextSibling(self, element):
+        "Return following sibling element of `element` or ``None``."
+        raise NotImplementedError()
+
+    def children(self, element):
+        "Return list of child elements of `element`."
+        raise NotImplementedError()
+
+    def isEmpty(self, element):
+        "Return if `element` has neither child elements nor text."
+        return not self.children(element)
+
+
+class _ElementTreeBase(ElementAdapter):
+    # common to lxml and ElementTree elements
+    def tag(self, element):
+        return _clark(element.tag)[1]
+
+    def namespace(self, element):
+        return _clark(element.tag)[0]
+
+    def attr(self, element, name):
+        if name.startswith('xml:'):
+            name = '{%s}%s' % (XML_NAMESPACE, name[4:])
+        return element.get(name)
+
+    def children(self, element):
+        return [child for child in element if _isElement(child)]
+
+    def isEmpty(self, element):
+        if element.text:
+            return False
+        for child in element:
+            if _isElement(child) or child.tail:
+                return False
+        return True
+
+
+class LxmlAdapter(_ElementTreeBase):
+    """Adapter for lxml elements (which know their parent and siblings)."""
+    def parent(self, element):
+        return element.getparent()
+
+    def previousSibling(self, element):
+        element = element.getprevious()
+        while element is not None and not _isElement(element):
+            element = element.getprevious()
+        return element
+
+    def nextSibling(self, element):
+        element = element.getnext()
+        while element is not None and not _isElement(element):
+            element = element.getnext()
+        return element
+
+
+class _IndexedAdapter(ElementAdapter):
+    # elements which do not know their parent, all elements of the tree
+    # below `root` are indexed by their id()
+    def __init__(self, root):
+        self.root = root
+        self._parents = {id(root): None}
+        self._siblings = {id(root): ([root], 0)}
+        stack = [root]
+        while stack:
+            element = stack.pop()
+            children = self.children(element)
+            for i, child in enumerate(children):
+                self._parents[id(child)] = element
+                self._siblings[id(child)] = (children, i)
+            stack.extend(children)
+
+    def parent(self, element):
+        return self._parents[id(element)]
+
+    def previousSibling(self, element):
+        siblings, i = self._siblings[id(element)]
+        if i:
+            return siblings[i - 1]
+        return None
+
+    def nextSibling(self, element):
+        siblings, i = self._siblings[id(element)]
+        if i + 1 < len(siblings):
+            return siblings[i + 1]
+        return None
+
+
+class ElementTreeAdapter(_IndexedAdapter, _ElementTreeBase):
+    """Adapter for the elements of an :mod:`xml.etree.ElementTree` tree below
+    `root` which must not change while the adapter is used."""
+    def __init__(self, root):
+        _IndexedAdapter.__init__(self, root)
+
+
+class DictAdapter(_IndexedAdapter):
+    """Adapter for elements given as dicts like::
+
+        {'tag': 'p',
+         'namespace': None,  # optional
+         'attrs': {'class': 'a b', 'id': 'x'},  # optional
+         'text': 'text content',  # optional
+         'children': [...]}  # optional
+
+    All elements below `root` are indexed and must not change while the
+    adapter is used.
+    """
+    def tag(self, element):
+        return element['tag']
+
+    def namespace(self, element):
+        return element.get('namespace')
+
+    def attr(self, element, name):
+        return element.get('attrs', {}).get(name)
+
+    def children(self, element):
+        return element.get('children', [])
+
+    def isEmpty(self, element):
+        return not element.get('children') and not element.get('text')
+
+
+def _compounds(seq):
+    """Return list of compound selectors of Selector `seq`, each a list
+    ``[combinator, simples, pseudoElement]`` where `combinator` is the one
+    before (``None`` for the first), `simples` a list of tuples of the simple
+    selectors and `pseudoElement` the name of a pseudo-element or ``None``."""
+    compounds = [[None, [], None]]
+    items = list(seq)
+    i = 0
+    while i < len(items):
+        item = items[i]
+        type_, value = item.type, item.value
+        i += 1
+        if type_ in COMBINATORS:
+            compounds.append([type_, [], None])
+            continue
+        simples = compounds[-1][1]
+        if type_ == 'type-selector':
+            simples.append(('type', value[0], value[1].lower()))
+        elif type_ == 'universal':
+            simples.append(('type', value[0], None))
+        elif type_ in ('id', 'class'):
+            simples.append((type_, unescape(value[1:])))
+        elif type_ == 'attribute-start':
+            name, op, attrValue = None, None, None
+            while i < len(items) and items[i].type != 'attribute-end':
+                type_, value = items[i].type, items[i].value
+                if type_ == 'attribute-selector':
+                    name = value[1] if isinstance(value, tuple) else value
+                elif type_ in ('STRING', 'attribute-value'):
+                    attrValue = value
+                else:
+                    op = type_
+                i += 1
+            i += 1
+            simples.append(('attribute', name, op, attrValue))
+        elif type_ in ('pseudo-class', 'pseudo-element'):
+            if isinstance(value, str):
+                name, arg = value.lower(), None
+                if name.endswith('('):
+                    args = []
+                    while i < len(items) and items[i].type != 'function-end':
+                        args.append(items[i].value)
+                        i += 1
+                    i += 1
+                    arg = ''.join(args).strip()
+            else:
+                # SelectorPseudoFunction
+                name, arg = value.name.lower(), value.selector_list
+            if type_ == 'pseudo-element' or name in (
+                    ':before', ':after', ':first-line', ':first-letter'):
+                if name[1] != ':':
+                    name = ':' + name
+                compounds[-1][2] = name
+            else:
+                simples.append(('pseudo-class', name, arg))
+    return compounds
+
+
+def _nth(arg):
+    "Return (a, b) of an+b `arg` or ``None`` if invalid."
+    arg = ''.join(arg.split()).lower()
+    if arg == 'odd':
+        return 2, 1
+    elif arg == 'even':
+        return 2, 0
+    match = _NTH.match(arg)
+    if match is None:
+        return None
+    sign, a, bsign, b, number = match.groups()
+    if number is not None:
+        return 0, int(number)
+    a = int(a or 1)
+    if sign == '-':
+        a = -a
+    b = int(b or 0)
+    if bsign == '-':
+        b = -b
+    return a, b
+
+
+class _Compiler(object):
+    # builds the closures of selectors for an adapter
+    def __init__(self, adapter):
+        self.adapter = adapter
+
+    def selector(self, compounds, first=None):
+        """Return function matching `compounds` from the right, the test of
+        the leftmost compound is `first` if given."""
+        for combinator, simples, pseudoElement in compounds[:-1]:
+            if pseudoElement is not None:
+                # a pseudo-element is allowed in the last compound only
+                return _never
+        match = first if first is not None else self.compound(compounds[0][1])
+        for combinator, simples, pseudoElement in compounds[1:]:
+            match = self.combine(combinator, self.compound(simples), match)
+        return match
+
+    def selectorList(self, selectorList):
+        "Return function matching any selector of `selectorList`."
+        matches = []
+        for selector in selectorList:
+            compounds = _compounds(selector.seq)
+            if compounds[-1][2] is None:
+                matches.append(self.selector(compounds))
+        if not matches:
+            return _never
+        elif len(matches) == 1:
+            return matches[0]
+
+        def anyOf(element):
+            for match in matches:
+                if match(element):
+                    return True
+            return False
+        return anyOf
+
+    def combine(self, combinator, test, left):
+        "Return function matching `test` and `left` by `combinator`."
+        adapter = self.adapter
+        if combinator == 'child':
+            parent = adapter.parent
+
+            def match(element):
+                if not test(element):
+                    return False
+                element = parent(element)
+                return element is not None and left(element)
+
+        elif combinator == 'descendant':
+            parent = adapter.parent
+
+            def match(element):
+                if not test(element):
+                    return False
+                element = parent(element)
+                while element is not None:
+                    if left(element):
+                        return True
+                    element = parent(element)
+                return False
+
+        elif combinator == 'adjacent-sibling':
+            previous = adapter.previousSibling
+
+            def match(element):
+                if not test(element):
+                    return False
+                element = previous(element)
+                return element is not None and left(element)
+
+        else:
+            previous = adapter.previousSibling
+
+            def match(element):
+                if not test(element):
+                    return False
+                element = previous(element)
+                while element is not None:
+                    if left(element):
+                        return True
+                    element = previous(element)
+                return False
+
+        return match
+
+    def compound(self, simples):
+        "Return function matching all `simples`."
+        # cheap and selective tests first
+        order = {'id': 0, 'class': 1, 'type': 2, 'attribute': 3,
+                 'pseudo-class': 4}
+        simples = sorted(simples, key=lambda simple: order[simple[0]])
+        tests = []
+        classes = [simple[1] for simple in simples if simple[0] == 'class']
+        if classes:
+            tests.append(self.classes(classes))
+        for simple in simples:
+            if simple[0] != 'class':
+                test = getattr(self, simple[0].replace('-', ''))(*simple[1:])
+                if test is _never:
+                    return _never
+                elif test is not _always:
+                    tests.append(test)
+
+        if not tests:
+            return _always
+        elif len(tests) == 1:
+            return tests[0]
+        elif len(tests) == 2:
+            first, second = tests
+            return lambda element: first(element) and second(element)
+
+        def match(element):
+            for test in tests:
+                if not test(element):
+                    return False
+            return True
+        return match
+
+    def id(self, value):
+        id = self.adapter.id
+        return lambda element: id(element) == value
+
+    def classes(self, names):
+        classes = self.adapter.classes
+        if len(names) == 1:
+            name = names[0]
+            return lambda element: name in classes(element)
+        names = frozenset(names)
+        return lambda element: names.issubset(classes(element))
+
+    def type(self, namespaceURI, name):
+        adapter = self.adapter
+        if namespaceURI is None or namespaceURI == css_parser._ANYNS:
+            nsTest = None
+        elif namespaceURI == '':
+            def nsTest(element):
+                return not adapter.namespace(element)
+        else:
+            def nsTest(element):
+                return adapter.namespace(element) == namespaceURI
+
+        if name is None:
+            return nsTest or _always
+        tag = adapter.tag
+        if nsTest is None:
+            return lambda element: tag(element).lower() == name
+        return lambda element: (tag(element).lower() == name and
+                                nsTest(element))
+
+    def attribute(self, name, op, value):
+        attr = self.adapter.attr
+        if op is None:
+            return lambda element: attr(element, name) is not None
+        elif op == 'equals':
+            return lambda element: attr(element, name) == value
+        elif op == 'includes':
+            if not value or len(value.split()) != 1:
+                return _never
+            return lambda element: value in (attr(element, name) or '').split()
+        elif op == 'dashmatch':
+            prefix = value + '-'
+            return lambda element: (attr(element, name) == value or
+                                    (attr(element, name) or '').startswith(prefix))
+        elif not value:
+            # ^= $= *= with empty string match nothing
+            return _never
+        elif op == 'prefixmatch':
+            return lambda element: (attr(element, name) or '').startswith(value)
+        elif op == 'suffixmatch':
+            return lambda element: (attr(element, name) or '').endswith(value)
+        elif op == 'substringmatch':
+            return lambda element: value in (attr(element, name) or '')
+        return _never
+
+    def pseudoclass(self, name, arg):
+        adapter = self.adapter
+        parent = adapter.parent
+        previous = adapter.previousSibling
+        next = adapter.nextSibling
+        if name in (':is(', ':where(', ':matches(', ':-moz-any(',
+                    ':-webkit-any('):
+            if arg is None or isinstance(arg, str):
+                return _never
+            return self.selectorList(arg)
+        elif name == ':not(':
+            if arg is None or isinstance(arg, str):
+                return _never
+            inner = self.selectorList(arg)
+            return lambda element: not inner(element)
+        elif name == ':has(':
+            if arg is None or isinstance(arg, str):
+                return _never
+            return self.has(arg)
+        elif name == ':root':
+            return lambda element: parent(element) is None
+        elif name == ':empty':
+            return adapter.isEmpty
+        elif name == ':first-child':
+            return lambda element: previous(element) is None
+        elif name == ':last-child':
+            return lambda element: next(element) is None
+        elif name == ':only-child':
+            return lambda element: (previous(element) is None and
+                                    next(element) is None)
+        elif name in (':first-of-type', ':last-of-type', ':only-of-type'):
+            first = self.nthTest(previous, True, (0, 1))
+            last = self.nthTest(next, True, (0, 1))
+            if name == ':first-of-type':
+                return first
+            elif name == ':last-of-type':
+                return last
+            return lambda element: first(element) and last(element)
+        elif name in (':nth-child(', ':nth-last-child(', ':nth-of-type(',
+                      ':nth-last-of-type('):
+            ab = _nth(arg or '')
+            if ab is None:
+                return _never
+            sibling = next if '-last-' in name else previous
+            return self.nthTest(sibling, name.endswith('-of-type('), ab)
+        elif name in (':link', ':any-link'):
+            tag = adapter.tag
+            attr = adapter.attr
+            return lambda element: (tag(element).lower() in ('a', 'area', 'link')
+                                    and attr(element, 'href') is not None)
+        elif name == ':lang(':
+            lang = (arg or '').strip('\'"').lower()
+            if not lang:
+                return _never
+            return self.lang(lang)
+        return _never
+
+    def nthTest(self, sibling, ofType, ab):
+        "Return function testing the position of an element."
+        a, b = ab
+        tag, namespace = self.adapter.tag, self.adapter.namespace
+
+        def match(element):
+            position = 1
+            if ofType:
+                # same type like type selectors match it
+                name = tag(element).lower()
+                uri = namespace(element)
+                other = sibling(element)
+                while other is not None:
+                    if tag(other).lower() == name and namespace(other) == uri:
+                        position += 1
+                    other = sibling(other)
+            else:
+                other = sibling(element)
+                while other is not None:
+                    position += 1
+                    other = sibling(other)
+            if a == 0:
+                return position == b
+            n, rest = divmod(position - b, a)
+            return rest == 0 and n >= 0
+        return match
+
+    def lang(self, lang):
+        adapter = self.adapter
+        prefix = lang + '-'
+
+        def match(element):
+            while element is not None:
+                value = adapter.attr(element, 'xml:lang')
+                if value is None:
+                    value = adapter.attr(element, 'lang')
+                if value is not None:
+                    value = value.lower()
+                    return value == lang or value.startswith(prefix)
+                element = adapter.parent(element)
+            return False
+        return match
+
+    def has(self, selectorList):
+        """Return function matching an element (the anchor) if any relative
+        selector of `selectorList` matches an element relative to it."""
+        adapter = self.adapter
+        anchor = [None]
+
+        def isAnchor(element):
+            return element is anchor[0]
+
+        matches = []
+        siblingScope = False
+        for selector in selectorList:
+            compounds = _compounds(selector.seq)
+            if compounds[-1][2] is not None:
+                continue
+            # a relative selector starting with a combinator is stored with
+            # a leading universal selector for the anchor
+            if (len(compounds) > 1 and compounds[0][1] == [('type', None, None)]
+                    and compounds[1][0] != 'descendant'):
+                compounds = compounds[1:]
+            else:
+                compounds[0][0] = 'descendant'
+            if any(c[0] in ('adjacent-sibling', 'following-sibling')
+                   for c in compounds):
+                siblingScope = True
+            matches.append(self.selector([[None, [], None]] + compounds,
+                                         first=isAnchor))
+        if not matches:
+            return _never
+
+        def descendants(element):
+            stack = list(reversed(adapter.children(element)))
+            while stack:
+                element = stack.pop()
+                yield element
+                stack.extend(reversed(adapter.children(element)))
+
+        def scope(element):
+            if siblingScope:
+                sibling = adapter.nextSibling(element)
+                while sibling is not None:
+                    yield sibling
+                    for descendant in descendants(sibling):
+                        yield descendant
+                    sibling = adapter.nextSibling(sibling)
+            for descendant in descendants(element):
+                yield descendant
+
+        def match(element):
+            saved, anchor[0] = anchor[0], element
+            try:
+                for candidate in scope(element):
+                    for inner in matches:
+                        if inner(candidate):
+                            return True
+                return False
+            finally:
+                anchor[0] = saved
+        return match
+
+
+def _filterHashes(key):
+    # the two counters of `key` in an AncestorFilter
+    h = zlib.crc32(key.encode('utf-8'))
+    return h & _FILTER_MASK, (h >> _FILTER_BITS) & _FILTER_MASK
+
+
+def _ancestorKeys(compounds):
+    """Return set of the keys of ids, classes and names which must be in
+    ancestors of an element matched by `compounds`: the ones of compounds
+    left of a descendant or child combinator (but not of a sibling
+    combinator)."""
+    keys = set()
+    for i in range(len(compounds) - 1):
+        if compounds[i + 1][0] not in ('descendant', 'child'):
+            continue
+        for simple in compounds[i][1]:
+            if simple[0] == 'id':
+                keys.add('#' + simple[1])
+            elif simple[0] == 'class':
+                keys.add('.' + simple[1])
+            elif simple[0] == 'type' and simple[2] is not None:
+                keys.add(simple[2])
+    return keys
+
+
+class AncestorFilter(object):
+    """Counting Bloom filter of the ids, classes and (lowercased) names of
+    the ancestors of an element.
+
+    It is maintained while walking a document: :meth:`push` an element
+    before walking its children and :meth:`pop` it afterwards. A key which
+    is not in the filter is not in any ancestor, a key in the filter
+    probably is.
+    """
+    def __init__(self, adapter):
+        """
+        :param adapter:
+            :class:`ElementAdapter` of the elements
+        """
+        self.adapter = adapter
+        self._counters = [0] * (_FILTER_MASK + 1)
+        # hashes added by each pushed element
+        self._pushed = []
+
+    def __len__(self):
+        "Number of pushed elements."
+        return len(self._pushed)
+
+    def push(self, element):
+        "Add the keys of `element`, an ancestor of the following elements."
+        adapter = self.adapter
+        id = adapter.id(element)
+        keys = ['#' + id] if id else []
+        keys.extend('.' + name for name in adapter.classes(element))
+        keys.append(adapter.tag(element).lower())
+        counters = self._counters
+        hashes = []
+        for key in keys:
+            for h in _filterHashes(key):
+                counters[h] += 1
+                hashes.append(h)
+        self._pushed.append(hashes)
+
+    def pop(self):
+        "Remove the keys of the element pushed last."
+        counters = self._counters
+        for h in self._pushed.pop():
+            counters[h] -= 1
+
+    def mightContain(self, hashes):
+        """Return ``False`` if any of `hashes` (from
+        :attr:`CompiledSelector.ancestorHashes`) is not in the filter."""
+        counters = self._counters
+        for h in hashes:
+            if not counters[h]:
+                return False
+        return True
+
+
+class CompiledSelector(object):
+    """A :class:`~css_parser.css.Selector` compiled for the elements of an
+    :class:`ElementAdapter`.
+
+    match(element)
+        function returning if the selector matches `element` (ignoring a
+        pseudo-element)
+    selector
+        the :class:`~css_parser.css.Selector`
+    pseudoElement
+        name of the pseudo-element of the selector like ``'::before'`` or
+        ``None``
+    ancestorHashes
+        tuple of the :class:`AncestorFilter` hashes of ids, classes and
+        names which are required in ancestors of a matched element
+    """
+    def __init__(self, selector, adapter):
+        self.selector = selector
+        self.adapter = adapter
+        compounds = _compounds(selector.seq)
+        self.pseudoElement = compounds[-1][2]
+        self.match = _Compiler(adapter).selector(compounds)
+        self.ancestorHashes = tuple(sorted(set(
+            h for key in _ancestorKeys(compounds)
+            for h in _filterHashes(key))))
+
+    def __repr__(self):
+        return "<css_parser.selectormatch.%s selectorText=%r>" % (
+            self.__class__.__name__, self.selector.selectorText)
+
+    def mayMatch(self, ancestors):
+        """Return ``False`` if the selector cannot match an element with
+        the ancestors in :class:`AncestorFilter` `ancestors`, ``True`` if
+        :attr:`match` has to decide."""
+        return ancestors.mightContain(self.ancestorHashes)
+
+    specificity = property(lambda self: self.selector.specificity,
+                           doc="Specificity of the selector.")
+
+
+def compileSelector(selector, adapter):
+    """Return :class:`CompiledSelector` of `selector` for elements accessed
+    by `adapter`.
+
+    :param selector:
+        a :class:`~css_parser.css.Selector` or selector text
+    :param adapter:
+        an :class:`ElementAdapter`
+    """
+    if isinstance(selector, str):
+        selector = css_parser.css.Selector(selectorText=selector)
+    return CompiledSelector(selector, adapter)
@@ -4,6 +4,8 @@ from __future__ import unicode_literals, division, absolute_import, print_functi
 from . import helper
 import css_parser
 import codecs
+import re
+import threading
 from css_parser.helper import normalize
 """css_parser serializer"""
 
@@ -129,15 +131,26 @@ class Preferences(object):
             if value:
                 self.__setattr__(key, value)
 
+    # changed with every option set, serializations kept by objects are
+    # used for the same version only
+    _version = 0
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, '_version', self._version + 1)
+        object.__setattr__(self, name, value)
+
+    def _options(self):
+        return [p for p in self.__dict__ if p != '_version']
+
     def __repr__(self):
         return "css_parser.css.%s(%s)" % (
                 self.__class__.__name__, ', '.join([
-                    '\n    %s=%r' % (p, self.__getattribute__(p)) for p in self.__dict__]))
+                    '\n    %s=%r' % (p, self.__getattribute__(p)) for p in self._options()]))
 
     def __str__(self):
         return "<css_parser.css.%s object %s at 0x%x" % (
                 self.__class__.__name__, ' '.join([
-                    '%s=%r' % (p, self.__getattribute__(p)) for p in self.__dict__]), id(self))
+                    '%s=%r' % (p, self.__getattribute__(p)) for p in self._options()]), id(self))
 
     def useDefaults(self):
         "Reset all preference options to their default value."
@@ -272,7 +285,7 @@ class Out(object):
             # APPEND
 
             if indent or (val == '}' and self.ser.prefs.indentClosingBrace):
-                self.out.append(self.ser._indentblock(val, self.ser._level+1))
+                self.out.append(self.ser._indentblock(val, self.ser._state.level+1))
             else:
                 if val.endswith(' '):
                     self._remove_last_if_S()
@@ -311,6 +324,36 @@ class Out(object):
         return delim.join(self.out)
 
 
+# Spacing of tokens in minified property values as Out.append does it:
+# no space before these tokens (and any ending with a space), no space after
+# these and FUNCTION starts, a space after all other tokens and ")"
+_MINIFIED_NO_SPACE_BEFORE = '+>~,:{;)]/=}'
+_MINIFIED_NO_SPACE_AFTER = frozenset(',:{;+>~}[](/=')
+# value types which Out.append formats itself
+_FORMATTED_TYPES = frozenset(('COMMENT', 'S', 'STRING', 'URI', 'HASH'))
+
+# tokens of unparsed property values which are serialized as they are with
+# any preferences, values with other tokens are parsed to be serialized
+_VERBATIM_IDENT = re.compile(r'^-?[a-zA-Z_][a-zA-Z0-9_-]*$')
+_VERBATIM_HASH = re.compile(r'^#(?:[0-9a-fA-F]{3}){1,2}$')
+_VERBATIM_NUMBER = re.compile(r'^(?:[+-]?[1-9][0-9]*(?:\.[0-9]*[1-9])?'
+                              r'[a-z%]*|0)$')
+
+
+class _SerializerState(threading.local):
+    """Nesting state of the serialization in the current thread."""
+    def __init__(self):
+        self.level = 0  # current nesting level
+        # if the current text depends on more than the serialized object
+        self.volatile = False
+        # if serialized texts are kept by the objects
+        self.keep = True
+
+        # TODO:
+        self.selectors = []  # holds SelectorList
+        self.selectorlevel = 0  # current specificity nesting level
+
+
 class CSSSerializer(object):
     """Serialize a CSSStylesheet and its parts.
 
@@ -326,11 +369,64 @@ class CSSSerializer(object):
         if not prefs:
             prefs = Preferences()
         self.prefs = prefs
-        self._level = 0  # current nesting level
-
-        # TODO:
-        self._selectors = []  # holds SelectorList
-        self._selectorlevel = 0  # current specificity nesting level
+        # nesting state of a serialization, kept per thread
+        self._state = _SerializerState()
+        # {Preferences method: ((prefs, version of prefs), result)}
+        self._prefsChecked = {}
+
+    def _prefsAre(self, setup):
+        """Return if the preferences are the ones set by Preferences method
+        `setup` (e.g. ``'useDefaults'``), checked once for each version of
+        the preferences."""
+        prefs = self.prefs
+        checked = self._prefsChecked.get(setup)
+        if checked is None or checked[0][0] is not prefs or \
+           checked[0][1] != prefs._version:
+            other = Preferences()
+            getattr(other, setup)()
+            result = all(getattr(prefs, p, None) == getattr(other, p)
+                         for p in other._options())
+            checked = self._prefsChecked[setup] = ((prefs, prefs._version),
+                                                   result)
+        return checked[1]
+
+    def _minified(self):
+        """Return if the preferences are the ones set by
+        Preferences.useMinified(), values are written without Out then."""
+        return self._prefsAre('useMinified')
+
+    def _useSource(self, rule):
+        """Return if `rule` is serialized to the text it has been parsed
+        from: if it keeps the text (and is not changed since) and the
+        preferences are the default ones."""
+        return rule._source is not None and self._prefsAre('useDefaults')
+
+    def _cached(self, obj, serialize):
+        """Return ``serialize(obj)``. The text is kept by `obj` and returned
+        again until `obj` or an object contained in it changes (see
+        ``obj._changed()``), the preferences change or the namespaces of the
+        style sheet containing `obj` change."""
+        prefs, state = self.prefs, self._state
+        if prefs.indentSpecificities or prefs.validOnly:
+            # depends on preceding rules or validation
+            return serialize(obj)
+
+        for root in obj._lineage():
+            pass
+        key = (self, prefs, prefs._version, state.level, root,
+               getattr(root, '_namespacesVersion', 0))
+        cache = obj._cssTextCache
+        if cache is not None and cache[0] == key:
+            return cache[1]
+
+        volatile, state.volatile = state.volatile, False
+        try:
+            text = serialize(obj)
+            if state.keep and not state.volatile:
+                obj._cssTextCache = (key, text)
+        finally:
+            state.volatile = state.volatile or volatile
+        return text
 
     def _atkeyword(self, rule):
         "returns default or source atkeyword depending on prefs"
@@ -342,7 +438,7 @@ class CSSSerializer(object):
     def _indentblock(self, text, level):
         """
         indent a block like a CSSStyleDeclaration to the given level
-        which may be higher than self._level (e.g. for CSSStyleDeclaration)
+        which may be higher than the current level (e.g. for CSSStyleDeclaration)
         """
         if not self.prefs.lineSeparator:
             return text
@@ -383,15 +479,47 @@ class CSSSerializer(object):
             return '#%s%s%s' % (val[1], val[3], val[5])
         return val
 
+    def _unparsed(self, tokens):
+        """Return text of value `tokens` not parsed yet, whitespace is
+        collapsed and comments are removed if not prefs.keepComments.
+        Return ``None`` if the value has to be parsed as tokens would be
+        serialized differently then (e.g. ``#FF0000`` or ``url( x )``)."""
+        out = []
+        for token in tokens:
+            type_, val = token[0], token[1]
+            if type_ == 'S':
+                if out and out[-1] != ' ':
+                    out.append(' ')
+            elif type_ == 'COMMENT':
+                if self.prefs.keepComments:
+                    out.append(val)
+            elif type_ == 'IDENT' and _VERBATIM_IDENT.match(val) or\
+                type_ in ('NUMBER', 'DIMENSION', 'PERCENTAGE') and\
+                _VERBATIM_NUMBER.match(val) or\
+                    type_ == 'HASH' and _VERBATIM_HASH.match(val) and\
+                    self._hash(val) == val:
+                out.append(val)
+            else:
+                return None
+        return ''.join(out).strip()
+
+    def _wellformed(self, property):
+        """Return if `property` is wellformed, a value not parsed yet is
+        parsed first unless it is serialized as it is."""
+        if property._valuetokens is not None and\
+           self._unparsed(property._valuetokens) is None:
+            property.propertyValue
+        return property.wellformed
+
     def _valid(self, x):
         "checks items valid property and prefs.validOnly"
         return not self.prefs.validOnly or (self.prefs.validOnly and
                                             x.valid)
 
-    def do_CSSStyleSheet(self, stylesheet):
-        """serializes a complete CSSStyleSheet"""
-        useduris = stylesheet._getUsedURIs()
-        out = []
+    def _rulesTexts(self, stylesheet):
+        "Yield text of each rule of `stylesheet` which is not left out"
+        if self.prefs.keepUsedNamespaceRulesOnly:
+            useduris = stylesheet._getUsedURIs()
         for rule in stylesheet.cssRules:
             if self.prefs.keepUsedNamespaceRulesOnly and\
                rule.NAMESPACE_RULE == rule.type and\
@@ -401,17 +529,47 @@ class CSSSerializer(object):
 
             cssText = rule.cssText
             if cssText:
-                out.append(cssText + self.prefs.linesAfterRules)
-        text = self._linenumbers(self.prefs.lineSeparator.join(out))
+                yield cssText + self.prefs.linesAfterRules
 
-        # get encoding of sheet, defaults to UTF-8
+    def _encoding(self, stylesheet):
+        "Return encoding of `stylesheet`, defaults to UTF-8"
         try:
-            encoding = stylesheet.cssRules[0].encoding
+            return stylesheet.cssRules[0].encoding
         except (IndexError, AttributeError):
-            encoding = 'UTF-8'
+            return 'UTF-8'
+
+    def do_CSSStyleSheet(self, stylesheet):
+        """serializes a complete CSSStyleSheet"""
+        text = self._linenumbers(self.prefs.lineSeparator.join(
+            self._rulesTexts(stylesheet)))
 
         # TODO: py3 return b str but tests use unicode?
-        return text.encode(encoding, 'escapecss')
+        return text.encode(self._encoding(stylesheet), 'escapecss')
+
+    def serializeTo(self, stylesheet, fp):
+        """Write serialized `stylesheet` to binary file-like object `fp`.
+
+        The bytes written are the same as ``stylesheet.cssText`` but they are
+        encoded and written rule by rule so the whole text is never kept in
+        memory (except if ``prefs.lineNumbers`` is set which needs the number
+        of all lines first). Serialized rules are not kept by the rules
+        either.
+        """
+        if self.prefs.lineNumbers:
+            fp.write(stylesheet.cssText)
+            return
+
+        encoder = codecs.getincrementalencoder(self._encoding(stylesheet))(
+            'escapecss')
+        keep, self._state.keep = self._state.keep, False
+        try:
+            separator = ''
+            for text in self._rulesTexts(stylesheet):
+                fp.write(encoder.encode(separator + text))
+                separator = self.prefs.lineSeparator
+        finally:
+            self._state.keep = keep
+        fp.write(encoder.encode('', True))
 
     def do_CSSComment(self, rule):
         """
@@ -430,6 +588,9 @@ class CSSSerializer(object):
         always @charset "encoding";
         no comments or other things allowed!
         """
+        if self._useSource(rule):
+            # not changed since parsed
+            return rule._source
         if rule.wellformed:
             return '@charset %s;' % helper.string(rule.encoding)
         else:
@@ -446,6 +607,9 @@ class CSSSerializer(object):
 
         + CSSComments
         """
+        if self._useSource(rule):
+            # not changed since parsed
+            return rule._source
         variablesText = rule.variables.cssText
 
         if variablesText and rule.wellformed and not self.prefs.resolveVariables:
@@ -471,6 +635,9 @@ class CSSSerializer(object):
 
         + CSSComments
         """
+        if self._useSource(rule):
+            # not changed since parsed
+            return rule._source
         styleText = self.do_css_CSSStyleDeclaration(rule.style)
 
         if styleText and rule.wellformed:
@@ -500,6 +667,9 @@ class CSSSerializer(object):
 
         + CSSComments
         """
+        if self._useSource(rule):
+            # not changed since parsed
+            return rule._source
         if rule.wellformed:
             out = Out(self)
             out.append(self._atkeyword(rule))
@@ -539,6 +709,9 @@ class CSSSerializer(object):
 
         + CSSComments
         """
+        if self._useSource(rule):
+            # not changed since parsed
+            return rule._source
         if rule.wellformed:
             out = Out(self)
             out.append(self._atkeyword(rule))
@@ -559,6 +732,9 @@ class CSSSerializer(object):
 
         + CSSComments
         """
+        if self._useSource(rule):
+            # not changed since parsed
+            return rule._source
         # TODO: use Out()?
 
         # mediaquery
@@ -595,14 +771,14 @@ class CSSSerializer(object):
             rtext = r.cssText
             if rtext:
                 # indent each line of cssText
-                rulesout.append(self._indentblock(rtext, self._level + 1))
+                rulesout.append(self._indentblock(rtext, self._state.level + 1))
                 rulesout.append(self.prefs.lineSeparator)
         if not self.prefs.keepEmptyRules and not ''.join(rulesout).strip():
             return ''
         out.extend(rulesout)
 
         #     }
-        out.append('%s}' % ((self._level + int(self.prefs.indentClosingBrace))
+        out.append('%s}' % ((self._state.level + int(self.prefs.indentClosingBrace))
                             * self.prefs.indent))
 
         return ''.join(out)
@@ -620,6 +796,9 @@ class CSSSerializer(object):
 
         + CSSComments
         """
+        if self._useSource(rule):
+            # not changed since parsed
+            return rule._source
         # rules
         rulesout = []
         for r in rule.cssRules:
@@ -678,6 +857,9 @@ class CSSSerializer(object):
 
         + CSSComments
         """
+        if self._useSource(rule):
+            # not changed since parsed
+            return rule._source
         # might not be set at all?!
         if rule.atkeyword:
             styleText = self.do_css_CSSStyleDeclaration(rule.style)
@@ -698,7 +880,7 @@ class CSSSerializer(object):
                 # ok for now:
                 out.append(self._atkeyword(rule), type_='ATKEYWORD')
                 out.append('{')
-                out.append('%s%s' % (self._indentblock(styleText, self._level+1),
+                out.append('%s%s' % (self._indentblock(styleText, self._state.level+1),
                                      self.prefs.lineSeparator))
                 out.append('}')
                 return out.value()
@@ -711,6 +893,9 @@ class CSSSerializer(object):
         anything until ";" or "{...}"
         + CSSComments
         """
+        if self._useSource(rule):
+            # not changed since parsed
+            return rule._source
         if rule.wellformed and self.prefs.keepUnknownAtRules:
             if not self.prefs.formatUnknownAtRules:
 
@@ -761,6 +946,9 @@ class CSSSerializer(object):
 
         + CSSComments
         """
+        if self._useSource(rule):
+            # not changed since parsed
+            return rule._source
         # TODO: use Out()
 
         # prepare for element nested rules
@@ -769,32 +957,32 @@ class CSSSerializer(object):
             # subselectorlist?
             elements = set([s.element for s in rule.selectorList])
             specitivities = [s.specificity for s in rule.selectorList]
-            for selector in self._selectors:
+            for selector in self._state.selectors:
                 lastelements = set([s.element for s in selector])
                 if elements.issubset(lastelements):
                     # higher specificity?
                     lastspecitivities = [s.specificity for s in selector]
                     if specitivities > lastspecitivities:
-                        self._selectorlevel += 1
+                        self._state.selectorlevel += 1
                         break
-                elif self._selectorlevel > 0:
-                    self._selectorlevel -= 1
+                elif self._state.selectorlevel > 0:
+                    self._state.selectorlevel -= 1
             else:
                 # save new reference
-                self._selectors.append(rule.selectorList)
-                self._selectorlevel = 0
+                self._state.selectors.append(rule.selectorList)
+                self._state.selectorlevel = 0
 
         # TODO ^ RESOLVE!!!!
 
         selectorText = self.do_css_SelectorList(rule.selectorList)
         if not selectorText or not rule.wellformed:
             return ''
-        self._level += 1
+        self._state.level += 1
         styleText = ''
         try:
             styleText = self.do_css_CSSStyleDeclaration(rule.style)
         finally:
-            self._level -= 1
+            self._state.level -= 1
         if not styleText:
             if self.prefs.keepEmptyRules:
                 return '%s%s{}' % (selectorText,
@@ -805,11 +993,11 @@ class CSSSerializer(object):
                     selectorText,
                     self.prefs.paranthesisSpacer,
                     self.prefs.lineSeparator,
-                    self._indentblock(styleText, self._level + 1),
+                    self._indentblock(styleText, self._state.level + 1),
                     self.prefs.lineSeparator,
-                    (self._level + int(self.prefs.indentClosingBrace))
+                    (self._state.level + int(self.prefs.indentClosingBrace))
                     * self.prefs.indent),
-                self._selectorlevel)
+                self._state.selectorlevel)
 
     def do_css_SelectorList(self, selectorlist):
         "comma-separated list of Selectors"
@@ -940,6 +1128,10 @@ class CSSSerializer(object):
                        if (isinstance(item.value, css_parser.css.Property)
                            and item.value in _effective)
                        or not isinstance(item.value, css_parser.css.Property)]
+            # lazily parsed values may be found not wellformed only now
+            seq = [item for item in seq
+                   if not isinstance(item.value, css_parser.css.Property) or
+                   self._wellformed(item.value)]
 
             out = []
             omitLastSemicolon = omit and self.prefs.omitLastSemicolon
@@ -988,6 +1180,13 @@ class CSSSerializer(object):
         """
         # TODO: use Out()
 
+        text = None
+        if property._valuetokens is not None:
+            text = self._unparsed(property._valuetokens)
+            if text is None:
+                # parse the value now, it may not be wellformed
+                property.propertyValue
+
         out = []
         if property.seqs[0] and property.wellformed and self._valid(property):
             nameseq, value, priorityseq = property.seqs
@@ -1008,7 +1207,9 @@ class CSSSerializer(object):
                 out.append(self.prefs.propertyNameSpacer)
 
             # value
-            out.append(value.cssText)
+            if text is None:
+                text = value.cssText
+            out.append(text)
 
             # priority
             if out and priorityseq:
@@ -1042,17 +1243,21 @@ class CSSSerializer(object):
 
     def do_css_PropertyValue(self, value, valuesOnly=False):
         """Serializes a PropertyValue"""
-        if not value:
+        if self._minified():
+            # empty values are empty anyway
+            return self._minifiedPropertyValue(value, valuesOnly)
+        elif not value:
             return ''
         else:
             out = Out(self)
             for item in value.seq:
                 type_, val = item.type, item.value
+                text = getattr(val, 'cssText', None)
                 if valuesOnly and type_ == css_parser.css.CSSComment:
                     continue
-                elif hasattr(val, 'cssText'):
+                elif text is not None:
                     # RGBColor or CSSValue if a CSSValueList
-                    out.append(val.cssText, type_)
+                    out.append(text, type_)
                 else:
                     if val and val[0] == val[-1] and val[0] in '\'"':
                         val = helper.string(val[1:-1])
@@ -1061,6 +1266,37 @@ class CSSSerializer(object):
 
             return out.value()
 
+    def _minifiedPropertyValue(self, value, valuesOnly):
+        """Same as do_css_PropertyValue for minified preferences but spaces
+        are added directly instead of using Out."""
+        out = []
+        space = False
+        for item in value.seq:
+            type_, val = item.type, item.value
+            text = getattr(val, 'cssText', None)
+            if valuesOnly and type_ == css_parser.css.CSSComment:
+                continue
+            elif text is not None:
+                val = text
+            elif type_ in _FORMATTED_TYPES:
+                # not in parsed values
+                out = Out(self)
+                for item in value.seq:
+                    out.append(item.value, item.type)
+                return out.value()
+            elif val and val[0] == val[-1] and val[0] in '\'"':
+                val = helper.string(val[1:-1])
+            if not val:
+                continue
+
+            if space and not (val in _MINIFIED_NO_SPACE_BEFORE or
+                              val.endswith(' ')):
+                out.append(' ')
+            out.append(val)
+            space = val == ')' or (val not in _MINIFIED_NO_SPACE_AFTER and
+                                   type_ not in ('FUNCTION', 'styletext'))
+        return ''.join(out)
+
     def _strip_zeros(self, s):
         i = s.index('.') + 2
         a, b = s[0:i], s[i:len(s)]
@@ -1072,7 +1308,6 @@ class CSSSerializer(object):
         if not value:
             return ''
         else:
-            out = Out(self)
             if value.type in ('DIMENSION', 'NUMBER', 'PERCENTAGE'):
                 dim = value.dimension or ''
                 if value.value == 0:
@@ -1100,11 +1335,26 @@ class CSSSerializer(object):
                 else:
                     sign = ''
 
-                out.append(sign + val + dim, value.type)
+                val = sign + val + dim
 
             else:
                 # e.g. URI
-                out.append(value.value, value.type)
+                val = value.value
+
+            type_ = value.type
+            if (type_ in ('URI', 'HASH') or type_ == 'STRING' and
+                    val is not None) or (
+                    val and val.strip() and val not in '+>~,:{;)]/=}[]('):
+                # a single token needs no spacing
+                if 'STRING' == type_:
+                    return helper.string(val)
+                elif 'URI' == type_:
+                    return helper.uri(val)
+                elif 'HASH' == type_:
+                    return self._hash(val)
+                return val
+            out = Out(self)
+            out.append(val, type_)
 
         return out.value()
 
@@ -1175,6 +1425,9 @@ class CSSSerializer(object):
         else:
             out = Out(self)
             v = variable.value
+            if self.prefs.resolveVariables:
+                # variables are defined elsewhere in the sheet
+                self._state.volatile = True
             if self.prefs.resolveVariables and v:
                 # resolve variable
                 out.append(v)
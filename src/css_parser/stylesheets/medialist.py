@@ -157,6 +157,9 @@ class MediaList(css_parser.util._NewListBase):
 
                 finalseq.append(item)
 
+            for item in finalseq:
+                if item.type == 'MediaQuery':
+                    item.value._parentList = self
             self._setSeq(finalseq)
 
     mediaText = property(_getMediaText, _setMediaText,
@@ -180,7 +183,9 @@ class MediaList(css_parser.util._NewListBase):
         # TODO: remove duplicates?
         newMedium = self.__prepareset(newMedium)
         if newMedium:
+            newMedium._parentList = self
             self._seq[index] = (newMedium, 'MediaQuery', None, None)
+            self._changed()
 
     def appendMedium(self, newMedium):
         """Add the `newMedium` to the end of the list.
@@ -204,6 +209,7 @@ class MediaList(css_parser.util._NewListBase):
         newMedium = self.__prepareset(newMedium)
 
         if newMedium:
+            newMedium._parentList = self
             mts = [normalize(item.value.mediaType) for item in self]
             newmt = normalize(newMedium.mediaType)
 
@@ -226,6 +232,7 @@ class MediaList(css_parser.util._NewListBase):
                 self._seq.append(newMedium, 'MediaQuery')
 
             self._seq._readonly = True
+            self._changed()
 
             return True
 
@@ -268,6 +275,9 @@ class MediaList(css_parser.util._NewListBase):
         except IndexError:
             return None
 
+    def _parentNode(self):
+        return self._parentRule
+
     parentRule = property(lambda self: self._parentRule,
                           doc="The CSSRule (e.g. an @media or @import rule "
                               "this list is part of or None")
@@ -63,6 +63,8 @@ class MediaQuery(_NewBase):  # css_parser.util.Base):
         self._wellformed = False
         self._mediaType = ''
         self._partof = _partof
+        # MediaList containing this query
+        self._parentList = None
         if mediaText:
             self.mediaText = mediaText  # sets self._mediaType too
             self._partof = False
@@ -191,6 +193,7 @@ class MediaQuery(_NewBase):  # css_parser.util.Base):
 
             # TODO: filter doubles!
             self._setSeq(seq)
+            self._changed()
 
     mediaText = property(_getMediaText, _setMediaText,
                          doc="The parsable textual representation of the media list.")
@@ -231,6 +234,10 @@ class MediaQuery(_NewBase):  # css_parser.util.Base):
                     break
         else:
             self._seq.insert(0, mediaType, 'IDENT')
+        self._changed()
+
+    def _parentNode(self):
+        return self._parentList
 
     mediaType = property(lambda self: self._mediaType, _setMediaType,
                          doc="The media type of this MediaQuery (usually one of "
@@ -7,11 +7,18 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 import itertools
 import re
 import sys
+from array import array
+from bisect import bisect_right
+
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
 
 from .cssproductions import MACROS, PRODUCTIONS, CSSProductions
 from .helper import normalize
 
-__all__ = ['Tokenizer', 'CSSProductions']
+__all__ = ['Tokenizer', 'CSSProductions', 'LineIndex', 'TokenSpan']
 __docformat__ = 'restructuredtext'
 __version__ = '$Id$'
 
@@ -20,11 +27,225 @@ unichr = chr
 
 _TOKENIZER_CACHE = {}
 
+# first characters are analysed for ASCII only, all other characters use the
+# complete master regex of the single pass engine
+_ASCII = frozenset(range(128))
+
+
+class _UnknownFirst(Exception):
+    """Raised if the possible first characters of a regex cannot be found."""
+    pass
+
+
+def _firstchars(pattern):
+    """Return frozenset of ASCII codes `pattern` may start with or ``None``
+    if this cannot be determined (so the pattern may start with any
+    character).
+    """
+    try:
+        first, nullable = _firstof(sre_parse.parse(pattern))
+    except Exception:
+        return None
+    if nullable:
+        # may match empty string
+        return None
+    return frozenset(first)
+
+
+def _firstof(items):
+    """Return (set of possible ASCII first characters, nullable) of a parsed
+    (sub)pattern."""
+    result = set()
+    for op, av in items:
+        first, nullable = _firstofitem(op, av)
+        result |= first
+        if not nullable:
+            return result, False
+    return result, True
+
+
+def _firstofitem(op, av):
+    "Return (first, nullable) of a single parsed regex item."
+    name = str(op)
+    if name == 'LITERAL':
+        return (set([av]) & _ASCII), False
+    elif name == 'NOT_LITERAL':
+        return set(_ASCII - set([av])), False
+    elif name == 'ANY':
+        return set(_ASCII), False
+    elif name == 'IN':
+        chars, negate = set(), False
+        for iop, iav in av:
+            iname = str(iop)
+            if iname == 'NEGATE':
+                negate = True
+            elif iname == 'LITERAL':
+                chars.add(iav)
+            elif iname == 'RANGE':
+                chars.update(range(iav[0], min(iav[1], 127) + 1))
+            else:
+                # CATEGORY etc
+                raise _UnknownFirst(iname)
+        chars &= _ASCII
+        return (set(_ASCII - chars) if negate else chars), False
+    elif name == 'BRANCH':
+        result, nullable = set(), False
+        for branch in av[1]:
+            first, n = _firstof(branch)
+            result |= first
+            nullable = nullable or n
+        return result, nullable
+    elif name == 'SUBPATTERN':
+        if av[1] & re.IGNORECASE:
+            raise _UnknownFirst(name)
+        return _firstof(av[-1])
+    elif name == 'ATOMIC_GROUP':
+        return _firstof(av)
+    elif name in ('MAX_REPEAT', 'MIN_REPEAT', 'POSSESSIVE_REPEAT'):
+        first, nullable = _firstof(av[2])
+        return first, nullable or av[0] == 0
+    elif name in ('ASSERT', 'ASSERT_NOT', 'AT'):
+        # zero width, ignoring possible restrictions is safe
+        return set(), True
+    else:
+        raise _UnknownFirst(name)
+
+
+class LineIndex(object):
+    """
+    Offsets of all line starts in a tokenized text.
+
+    Tokens of a ``Tokenizer(lazyPositions=True)`` contain the absolute
+    offset of the token in the text and the LineIndex of the text instead
+    of the actual line and column, see :func:`linecol`.
+    """
+    __slots__ = ('_starts',)
+
+    def __init__(self, text, start=0, linesep='\n'):
+        """
+        text
+            the tokenized text
+        start
+            offset of column 1 in line 1 (e.g. after a BOM)
+        """
+        self._starts = array('q', [start])
+        self.extend(text, start=start, linesep=linesep)
+
+    def extend(self, text, offset=0, start=0, end=None, linesep='\n'):
+        """Add line starts of ``text[start:end]`` where `text` begins at
+        absolute `offset`, used while tokenizing a text in chunks."""
+        starts = self._starts
+        if end is None:
+            end = len(text)
+        find = text.find
+        i = find(linesep, start, end)
+        while i != -1:
+            i += len(linesep)
+            starts.append(offset + i)
+            i = find(linesep, i, end)
+
+    def __repr__(self):
+        return "<css_parser.tokenize2.%s lines=%r at 0x%x>" % (
+            self.__class__.__name__, len(self._starts), id(self))
+
+    def __getstate__(self):
+        return self._starts
+
+    def __setstate__(self, state):
+        self._starts = state
+
+    def position(self, offset):
+        """Return (line, col) of absolute `offset`."""
+        line = bisect_right(self._starts, offset)
+        return line, offset - self._starts[line - 1] + 1
+
+
+# values of these tokens may contain escapes which are resolved
+_ESCAPABLE = frozenset(('DIMENSION', 'IDENT', 'STRING', 'URI', 'HASH', 'COMMENT',
+                        'FUNCTION', 'INVALID', 'UNICODE-RANGE'))
+
+
+def _repl(m):
+    "used by unicodesub"
+    num = int(m.group(0)[1:], 16)
+    if num <= sys.maxunicode:
+        return unichr(num)
+    else:
+        return m.group(0)
+
+
+class TokenSpan(object):
+    """
+    A compact token generated by :meth:`Tokenizer.spans` which only holds
+    the offsets of the token in the tokenized text. The value is built (and
+    escapes are resolved) when ``value`` is accessed.
+
+    type
+        name of the token, e.g. ``IDENT``
+    start, end
+        offsets of the token in the text, ``text[start:end]`` is the source
+        of the token
+    suffix
+        characters not in the text but added to complete the token at the
+        end of a full sheet, e.g. ``*/`` of an incomplete comment
+    """
+    __slots__ = ('type', 'start', 'end', 'suffix', '_text')
+
+    def __init__(self, text, type, start, end, suffix=''):
+        self._text = text
+        self.type = type
+        self.start = start
+        self.end = end
+        self.suffix = suffix
+
+    def __repr__(self):
+        return "css_parser.tokenize2.%s(type=%r, start=%r, end=%r, suffix=%r)" % (
+            self.__class__.__name__, self.type, self.start, self.end,
+            self.suffix)
+
+    @property
+    def value(self):
+        """Value of the token as in tokens of :meth:`Tokenizer.tokenize`."""
+        value = self._text[self.start:self.end] + self.suffix
+        if self.type in _ESCAPABLE and '\\' in value and not (
+                self.suffix and self.type == 'COMMENT'):
+            # an incomplete COMMENT is kept as it is like in tokenize
+            value = Tokenizer._unescape(self.type, value)
+        return value
+
+    def token(self, lineindex=None):
+        """Return token tuple ``(type, value, line, col)``, line and col
+        are only available if the `lineindex` of the text is given."""
+        if lineindex:
+            line, col = lineindex.position(self.start)
+        else:
+            line = col = None
+        return (self.type, self.value, line, col)
+
+
+def linecol(line, col):
+    """Return actual (line, col) of the ``line`` and ``col`` values of a
+    token which are (offset, LineIndex) if the token has been generated with
+    ``lazyPositions=True``."""
+    if isinstance(col, LineIndex):
+        return col.position(line)
+    return line, col
+
+
+def resolve(token):
+    """Return `token` with actual line and column, see :func:`linecol`."""
+    if token and isinstance(token[3], LineIndex):
+        return token[:2] + token[3].position(token[2])
+    return token
+
 
 class Tokenizer(object):
     """
     generates a list of Token tuples:
         (Tokenname, value, startline, startcolumn)
+
+    or if ``lazyPositions`` is set:
+        (Tokenname, value, offset, LineIndex)
     """
     _atkeywords = {
         '@font-face': CSSProductions.FONT_FACE_SYM,
@@ -38,10 +259,21 @@ class Tokenizer(object):
     unicodesub = re.compile(r'\\[0-9a-fA-F]{1,6}(?:\r\n|[\t\r\n\f\x20])?').sub
     cleanstring = re.compile(r'\\((\r\n)|[\n\r\f])').sub
 
-    def __init__(self, macros=None, productions=None, doComments=True):
+    def __init__(self, macros=None, productions=None, doComments=True,
+                 singlePass=False, lazyPositions=False):
         """
         inits tokenizer with given macros and productions which default to
         css_parser own macros and productions
+
+        singlePass
+            if ``True`` all productions are combined into a single regex
+            (per possible first character of a token) so each token needs
+            one regex match only instead of trying each production in turn.
+            The resulting tokens are the same.
+        lazyPositions
+            if ``True`` tokens contain (offset, LineIndex) instead of
+            (line, col) which are only computed if needed using
+            :func:`linecol`, mostly for log messages.
         """
         if isinstance(macros, dict):
             macros_hash_key = sorted(macros.items())
@@ -49,7 +281,8 @@ class Tokenizer(object):
             macros_hash_key = macros
         hash_key = str((macros_hash_key, productions))
         if hash_key in _TOKENIZER_CACHE:
-            (tokenmatches, commentmatcher, urimatcher) = _TOKENIZER_CACHE[hash_key]
+            (tokenmatches, commentmatcher, urimatcher,
+             singlepass) = _TOKENIZER_CACHE[hash_key]
         else:
             if not macros:
                 macros = MACROS
@@ -59,7 +292,10 @@ class Tokenizer(object):
                                                                          productions))
             commentmatcher = [x[1] for x in tokenmatches if x[0] == 'COMMENT'][0]
             urimatcher = [x[1] for x in tokenmatches if x[0] == 'URI'][0]
-            _TOKENIZER_CACHE[hash_key] = (tokenmatches, commentmatcher, urimatcher)
+            # compiled lazily by _compile_singlepass
+            singlepass = {}
+            _TOKENIZER_CACHE[hash_key] = (tokenmatches, commentmatcher, urimatcher,
+                                          singlepass)
 
         self.tokenmatches = tokenmatches
         self.commentmatcher = commentmatcher
@@ -68,6 +304,14 @@ class Tokenizer(object):
         self._doComments = doComments
         self._pushed = []
 
+        self._lazyPositions = lazyPositions
+        self._singlePass = singlePass
+        if singlePass:
+            if not singlepass:
+                singlepass.update(self._compile_singlepass(macros, productions))
+            self._masters = singlepass['masters']
+            self._dispatch = singlepass['dispatch']
+
     def _expand_macros(self, macros, productions):
         """returns macro expanded productions, order of productions is kept"""
         def macro_value(m):
@@ -87,6 +331,118 @@ class Tokenizer(object):
             compiled.append((key, re.compile('(?:%s)' % value, re.U).match))
         return compiled
 
+    def _compile_singlepass(self, macros, productions):
+        """compile master regexes for the single pass engine
+
+        Each master regex is an alternation of named groups of all productions
+        (without BOM) which may start with a specific first character, order
+        of productions is kept so the first matching production wins as when
+        trying productions in turn. Returns a dict with
+
+        masters
+            list of (compiled match, {groupindex: productionindex}, names) where
+            names is a tuple of production names only used if it is
+            ``('CHAR',)`` so the token is simply the current character
+        dispatch
+            list of index in masters for each ASCII character, all others use
+            master at index 0 which contains all productions
+        """
+        expanded = self._expand_macros(macros or MACROS,
+                                       productions or PRODUCTIONS)[1:]
+        firsts = [_firstchars('(?:%s)' % value) for key, value in expanded]
+
+        masters, subsets = [], {}
+
+        def master(indexes):
+            if indexes not in subsets:
+                alternatives, groups = [], {}
+                for i in indexes:
+                    alternatives.append('(?P<p%i>(?:%s))' % (i, expanded[i][1]))
+                compiled = re.compile('|'.join(alternatives), re.U)
+                for groupname, groupindex in compiled.groupindex.items():
+                    groups[groupindex] = int(groupname[1:])
+                subsets[indexes] = len(masters)
+                masters.append((compiled.match, groups,
+                                tuple(expanded[i][0] for i in indexes)))
+            return subsets[indexes]
+
+        master(tuple(range(len(expanded))))
+        dispatch = [master(tuple(i for i, first in enumerate(firsts)
+                                 if first is None or c in first))
+                    for c in range(128)]
+        return {'masters': masters, 'dispatch': dispatch}
+
+    def _match(self, text, pos, fullsheet, start=0):
+        """Return (name, end) of first production matching at `pos` trying
+        productions from index `start` in turn. `end` is the end offset of
+        the match, no string is build here. Returns (None, len(text)) if
+        `fullsheet` and an incomplete comment ate all remaining text.
+        """
+        for name, matcher in self.tokenmatches[1 + start:]:
+
+            # TODO: USE bad comment?
+            if (fullsheet and name == 'CHAR' and
+                    has_at(text, pos, '/*')):
+                # before CHAR production test for incomplete comment
+                possiblecomment = '%s*/' % text[pos:]
+                match = self.commentmatcher(possiblecomment)
+                if match and self._doComments:
+                    return None, len(text)
+
+            match = matcher(text, pos)  # if no match try next production
+            if match:
+                end = match.end(0)
+                # The ident regex also matches the beginning of
+                # functions, but we can't put the function regex before
+                # the ident regex, as otherwise 'and(' is recognized as
+                # function (even though it is valid in media queries).
+                # So we're doing this: if we find an ident, but the next
+                # character is a open parenthesis, we instead skip and
+                # let the FUNCTION production take over - except if the
+                # ident is "and"
+                if (name == 'IDENT' and
+                        end < len(text) and
+                        text[end] == '(' and
+                        text[pos:end].lower() != "and"):
+                    continue
+                return name, end
+
+    def _matchSinglePass(self, text, pos, fullsheet):
+        """Same as _match but with a single regex match for most tokens."""
+        c = ord(text[pos])
+        matcher, groups, names = self._masters[self._dispatch[c] if c < 128 else 0]
+        if names == ('CHAR',):
+            # no other production may start with this character
+            return 'CHAR', pos + 1
+
+        match = matcher(text, pos)
+        index = groups[match.lastindex]
+        name, end = self.tokenmatches[1 + index][0], match.end(0)
+        if name == 'CHAR' and fullsheet:
+            # handle possible incomplete comment
+            return self._match(text, pos, fullsheet, start=index)
+        elif (name == 'IDENT' and
+                end < len(text) and
+                text[end] == '(' and
+                text[pos:end].lower() != "and"):
+            # see _match, let following productions (FUNCTION) take over
+            return self._match(text, pos, fullsheet, start=index + 1)
+        return name, end
+
+    @classmethod
+    def _unescape(cls, name, found):
+        """Return value of token `name` with source `found` with unicode
+        escapes replaced by normal chars (but not normalized)."""
+        value = cls.unicodesub(_repl, found)
+        if name in ('STRING', 'INVALID'):  # 'URI'?
+            # remove \ followed by nl (so escaped) from string
+            value = cls.cleanstring('', value)
+        return value
+
+    def _normalize(self, value):
+        "normalize and do unicodesub"
+        return normalize(self.unicodesub(_repl, value))
+
     def push(self, *tokens):
         """Push back tokens which have been pulled but not processed."""
         self._pushed = itertools.chain(tokens, self._pushed)
@@ -100,6 +456,9 @@ class Tokenizer(object):
 
             (name, value, line, col)
 
+        or ``(name, value, offset, LineIndex)`` if ``lazyPositions`` is set.
+        The BOM token always has line and col 1.
+
         The token value will contain a normal string, meaning CSS unicode
         escapes have been resolved to normal characters. The serializer
         escapes needed characters back to unicode escapes depending on
@@ -111,37 +470,38 @@ class Tokenizer(object):
             if ``True`` appends EOF token as last one and completes incomplete
             COMMENT or INVALID (to STRING) tokens
         """
-        def _repl(m):
-            "used by unicodesub"
-            num = int(m.group(0)[1:], 16)
-            if num <= sys.maxunicode:
-                return unichr(num)
-            else:
-                return m.group(0)
-
-        def _normalize(value):
-            "normalize and do unicodesub"
-            return normalize(self.unicodesub(_repl, value))
-
         line = col = 1
         # The current starting character. We just increase this instead of
         # splitting off the beginning of text to increase performance.
         pos = 0
 
         # check for BOM first as it should only be max one at the start
-        (BOM, matcher), productions = self.tokenmatches[0], self.tokenmatches[1:]
+        BOM, matcher = self.tokenmatches[0]
         match = matcher(text, pos)
         if match:
             found = match.group(0)
             yield (BOM, found, line, col)
             pos += len(found)
 
+        lazy = self._lazyPositions
+        if lazy:
+            # BOM is not counted in columns
+            line, col = pos, LineIndex(text, start=pos)
+
         # check for @charset which is valid only at start of CSS
         if has_at(text, pos, '@charset '):
             found = '@charset '  # production has trailing S!
             yield (CSSProductions.CHARSET_SYM, found, line, col)
             pos += len(found)
-            col += len(found)
+            if lazy:
+                line = pos
+            else:
+                col += len(found)
+
+        if self._singlePass:
+            nextmatch = self._matchSinglePass
+        else:
+            nextmatch = self._match
 
         # Avoid repeated function call
         _len_text = len(text)
@@ -155,104 +515,264 @@ class Tokenizer(object):
             c = text[pos]
             if c in ',:;{}>[]':  # + but in num!
                 yield ('CHAR', c, line, col)
-                col += 1
                 pos += 1
+                if lazy:
+                    line = pos
+                else:
+                    col += 1
 
             else:
                 # check all other productions, at least CHAR must match
-                for name, matcher in productions:
-
-                    # TODO: USE bad comment?
-                    if (fullsheet and name == 'CHAR' and
-                            has_at(text, pos, '/*')):
-                        # before CHAR production test for incomplete comment
-                        possiblecomment = '%s*/' % text[pos:]
-                        match = self.commentmatcher(possiblecomment)
-                        if match and self._doComments:
-                            yield ('COMMENT', possiblecomment, line, col)
-                            pos = _len_text  # ate all remaining text
-                            break
-
-                    match = matcher(text, pos)  # if no match try next production
-                    if match:
-                        found = match.group(0)  # needed later for line/col
-                        # The ident regex also matches the beginning of
-                        # functions, but we can't put the function regex before
-                        # the ident regex, as otherwise 'and(' is recognized as
-                        # function (even though it is valid in media queries).
-                        # So we're doing this: if we find an ident, but the next
-                        # character is a open parenthesis, we instead skip and
-                        # let the FUNCTION production take over - except if the
-                        # ident is "and"
-                        if (name == 'IDENT' and
-                                found.lower() != "and" and
-                                match.end(0) < len(text) and
-                                text[match.end(0)] == '('):
-                            continue
-                        if fullsheet:
-                            # check if found may be completed into a full token
-                            if ('INVALID' == name and
-                                    suffix_eq(text, pos, found)):
-                                # complete INVALID to STRING with start char " or '
-                                name, found = 'STRING', '%s%s' % (found, found[0])
-
-                            elif 'FUNCTION' == name and\
-                                 'url(' == _normalize(found):
-                                # url( is a FUNCTION if incomplete sheet
-                                # FUNCTION production MUST BE after URI production
-                                for end in ("')", '")', ')'):
-                                    possibleuri = '%s%s' % (text[pos:], end)
-                                    match = self.urimatcher(possibleuri)
-                                    if match:
-                                        name, found = 'URI', match.group(0)
-                                        break
-
-                        if name in ('DIMENSION', 'IDENT', 'STRING', 'URI',
-                                    'HASH', 'COMMENT', 'FUNCTION', 'INVALID',
-                                    'UNICODE-RANGE'):
-                            # may contain unicode escape, replace with normal
-                            # char but do not _normalize (?)
-                            value = self.unicodesub(_repl, found)
-                            if name in ('STRING', 'INVALID'):  # 'URI'?
-                                # remove \ followed by nl (so escaped) from string
-                                value = self.cleanstring('', value)
-
-                        else:
-                            if 'ATKEYWORD' == name:
-                                try:
-                                    # get actual ATKEYWORD SYM
-                                    name = self._atkeywords[_normalize(found)]
-                                except KeyError:
-                                    # might also be misplace @charset...
-                                    if ('@charset' == found and
-                                            has_at(text, pos + len(found), ' ')):
-                                        # @charset needs tailing S!
-                                        name = CSSProductions.CHARSET_SYM
-                                        found += ' '
-                                    else:
-                                        name = 'ATKEYWORD'
-
-                            value = found  # should not contain unicode escape (?)
-
-                        if self._doComments or (not self._doComments and
-                                                name != 'COMMENT'):
-                            yield (name, value, line, col)
-
-                        pos += len(found)
-                        nls = found.count(self._linesep)
-                        line += nls
-                        if nls:
-                            col = len(found[found.rfind(self._linesep):])
-                        else:
-                            col += len(found)
+                name, end = nextmatch(text, pos, fullsheet)
+                if name is None:
+                    # incomplete COMMENT
+                    yield ('COMMENT', '%s*/' % text[pos:], line, col)
+                    pos = _len_text  # ate all remaining text
+                    continue
+
+                found = text[pos:end]
+
+                if fullsheet:
+                    # check if found may be completed into a full token
+                    if 'INVALID' == name and end == _len_text:
+                        # complete INVALID to STRING with start char " or '
+                        name, found = 'STRING', '%s%s' % (found, found[0])
+
+                    elif 'FUNCTION' == name and\
+                         'url(' == self._normalize(found):
+                        # url( is a FUNCTION if incomplete sheet
+                        # FUNCTION production MUST BE after URI production
+                        for close in ("')", '")', ')'):
+                            possibleuri = '%s%s' % (text[pos:], close)
+                            match = self.urimatcher(possibleuri)
+                            if match:
+                                name, found = 'URI', match.group(0)
+                                break
+
+                if name in _ESCAPABLE:
+                    # may contain unicode escape, replace with normal
+                    # char but do not _normalize (?), most values have
+                    # no escapes at all
+                    if '\\' in found:
+                        value = self._unescape(name, found)
+                    else:
+                        value = found
+
+                else:
+                    if 'ATKEYWORD' == name:
+                        try:
+                            # get actual ATKEYWORD SYM
+                            name = self._atkeywords[self._normalize(found)]
+                        except KeyError:
+                            # might also be misplace @charset...
+                            if ('@charset' == found and
+                                    has_at(text, pos + len(found), ' ')):
+                                # @charset needs tailing S!
+                                name = CSSProductions.CHARSET_SYM
+                                found += ' '
+                            else:
+                                name = 'ATKEYWORD'
+
+                    value = found  # should not contain unicode escape (?)
+
+                if self._doComments or (not self._doComments and
+                                        name != 'COMMENT'):
+                    yield (name, value, line, col)
+
+                pos += len(found)
+                if lazy:
+                    line = pos
+                else:
+                    nls = found.count(self._linesep)
+                    line += nls
+                    if nls:
+                        col = len(found[found.rfind(self._linesep):])
+                    else:
+                        col += len(found)
 
-                        break
             # Make sure we didn't accidentally modify text in the process
             assert text is _orig_text
 
         if fullsheet:
             yield ('EOF', '', line, col)
 
+    def spans(self, text, fullsheet=False):
+        """Generator: Tokenize text like :meth:`tokenize` but yield
+        :class:`TokenSpan` objects which contain the offsets of each token in
+        `text` only. No string is built for a token until its ``value`` is
+        used. Pushed tokens are not used.
+
+        text
+            to be tokenized
+        fullsheet
+            if ``True`` appends EOF token as last one and completes incomplete
+            COMMENT or INVALID (to STRING) tokens
+        """
+        return self._spans(text, fullsheet)
+
+    def _spans(self, text, fullsheet, sheetstart=True):
+        """Generator used by spans, `sheetstart` is ``False`` if `text` is
+        not the start of a sheet so no BOM or @charset is checked first."""
+        pos = 0
+        _len_text = len(text)
+
+        if sheetstart:
+            # check for BOM first as it should only be max one at the start
+            BOM, matcher = self.tokenmatches[0]
+            match = matcher(text, pos)
+            if match:
+                pos = match.end(0)
+                yield TokenSpan(text, BOM, 0, pos)
+
+            # check for @charset which is valid only at start of CSS
+            if has_at(text, pos, '@charset '):
+                yield TokenSpan(text, CSSProductions.CHARSET_SYM, pos, pos + 9)
+                pos += 9
+
+        if self._singlePass:
+            nextmatch = self._matchSinglePass
+        else:
+            nextmatch = self._match
+
+        while pos < _len_text:
+            c = text[pos]
+            if c in ',:;{}>[]':
+                yield TokenSpan(text, 'CHAR', pos, pos + 1)
+                pos += 1
+                continue
+
+            name, end = nextmatch(text, pos, fullsheet)
+            suffix = ''
+            if name is None:
+                # incomplete COMMENT ate all remaining text
+                name, suffix = 'COMMENT', '*/'
+
+            elif fullsheet and 'INVALID' == name and end == _len_text:
+                # complete INVALID to STRING with start char " or '
+                name, suffix = 'STRING', text[pos]
+
+            elif (fullsheet and 'FUNCTION' == name and
+                    'url(' == self._normalize(text[pos:end])):
+                # url( is a FUNCTION if incomplete sheet
+                for close in ("')", '")', ')'):
+                    possibleuri = '%s%s' % (text[pos:], close)
+                    match = self.urimatcher(possibleuri)
+                    if match:
+                        name, end = 'URI', pos + match.end(0)
+                        if end > _len_text:
+                            suffix = possibleuri[_len_text - pos:match.end(0)]
+                            end = _len_text
+                        break
+
+            elif 'ATKEYWORD' == name:
+                found = text[pos:end]
+                try:
+                    # get actual ATKEYWORD SYM
+                    name = self._atkeywords[self._normalize(found)]
+                except KeyError:
+                    # might also be misplace @charset...
+                    if '@charset' == found and has_at(text, end, ' '):
+                        # @charset needs tailing S!
+                        name, end = CSSProductions.CHARSET_SYM, end + 1
+
+            if self._doComments or name != 'COMMENT':
+                yield TokenSpan(text, name, pos, end, suffix)
+            pos = end
+
+        if fullsheet:
+            yield TokenSpan(text, 'EOF', pos, pos)
+
+    def tokenizeChunks(self, chunks, fullsheet=False):
+        """Generator: Tokenize text given as an iterable of `chunks` (e.g.
+        decoded parts of a file) and yield the same tokens as
+        :meth:`tokenize` of the complete text would.
+
+        Tokens may span chunks, only tokens which cannot change with the
+        following text are yielded, all others are kept and tokenized again
+        with the next chunk. So only a small part of the text is in memory
+        at any time (unless e.g. an unclosed ``url(`` keeps everything after
+        it undecided until the end). Only the position of the EOF token
+        after an incomplete COMMENT differs, it is the end of the text here.
+
+        chunks
+            iterable of strings
+        fullsheet
+            if ``True`` appends EOF token as last one and completes incomplete
+            COMMENT or INVALID (to STRING) tokens at the end of the last chunk
+        """
+        lazy = self._lazyPositions
+        # text not yet yielded as tokens and its offset in the complete text
+        buffer, offset = '', 0
+        # tokenize again if buffer has at least this length
+        needed = 0
+
+        def tokens(spans, end):
+            "yield tokens of spans, line starts are added up to end"
+            if not offset:
+                # BOM is not counted in columns
+                if spans and spans[0].type == 'BOM':
+                    index._starts[0] = spans[0].end
+            index.extend(buffer, offset=offset, end=end)
+            for span in spans:
+                if span.type == 'BOM':
+                    yield (span.type, span.value, 1, 1)
+                elif lazy:
+                    yield (span.type, span.value, offset + span.start, index)
+                else:
+                    yield ((span.type, span.value) +
+                           index.position(offset + span.start))
+
+        index = LineIndex('')
+        for chunk in chunks:
+            buffer += chunk
+            if len(buffer) < needed:
+                continue
+
+            spans = list(self._spans(buffer, False, sheetstart=not offset))
+            done = self._finalspans(spans, len(buffer))
+            if done:
+                end = spans[done].start if done < len(spans) else len(buffer)
+                for token in tokens(spans[:done], end):
+                    yield token
+                offset += end
+                buffer = buffer[end:]
+                needed = 0
+            else:
+                # avoid tokenizing a growing undecided text over and over
+                needed = 2 * len(buffer)
+
+        spans = list(self._spans(buffer, fullsheet, sheetstart=not offset))
+        for token in tokens(spans, len(buffer)):
+            yield token
+
+    # characters at the end of a chunk which may change previous tokens
+    _CHUNKMARGIN = 64
+
+    def _finalspans(self, spans, length):
+        """Return number of leading `spans` of a chunk of `length` chars
+        which cannot change if more text follows the chunk."""
+        limit = length - self._CHUNKMARGIN
+        for i, span in enumerate(spans):
+            if span.end > limit:
+                # may be longer, e.g. an IDENT or escape
+                break
+            elif (span.type == 'FUNCTION' and
+                    'url(' == self._normalize(span.value)):
+                # URI not complete yet
+                break
+            elif span.type == 'CHAR' and has_at(span._text, span.start, '/*'):
+                # COMMENT not complete yet
+                break
+        else:
+            i = len(spans)
+        # a RATIO (like "16 / 9)") may still be completed and is never
+        # directly after "(" which is not seen if the text starts after it
+        while i and (spans[i - 1].type in ('S', 'NUMBER') or (
+                spans[i - 1].type == 'CHAR' and spans[i - 1].value == '/') or
+                has_at(spans[i - 1]._text, spans[i - 1].end - 1, '(')):
+            i -= 1
+        return i
+
 
 def has_at(text, pos, string):
     """Check if text has substring string as position pos.
@@ -37,6 +37,140 @@ def as_list(p):
 log = errorhandler.ErrorHandler()
 
 
+# nesting levels of {}, [] and () are kept in a single int: each count is a
+# "digit" of its own, so the level is 0 only if all counts are 0
+_PARANT = 1
+_BRACKET = 1 << 20
+_BRACE = 1 << 40
+
+
+class _Scanner(object):
+    """Collects tokens up to the end of a construct like a rule, property
+    value or function. Used by :meth:`Base._tokensupto2`, each end condition
+    has its own precompiled scanner.
+
+    A construct ends with a token with a value in `ends` (or type in
+    `endtypes`) which is not nested in any {}, [] or (). `level` is the
+    initial nesting level, e.g. ``-_BRACE`` to end with the first ``{``.
+    """
+    __slots__ = ('_ends', '_endtypes', '_level', '_startdeltas',
+                 '_endlevel')
+
+    # change of nesting level for values
+    _deltas = {'{': _BRACE, '}': -_BRACE,
+               '[': _BRACKET, ']': -_BRACKET,
+               '(': _PARANT, ')': -_PARANT}
+    _function = tokenize2.CSSProductions.FUNCTION
+    # types of tokens which start a function if ending with (
+    _pseudotypes = frozenset(('pseudo-class', 'pseudo-element'))
+
+    def __init__(self, ends, endtypes=(), level=0, startdeltas=None,
+                 endlevel=None):
+        """
+        startdeltas
+            change of nesting level for the value of a starttoken, only
+            openings are counted by default
+        endlevel
+            additional level at which a token of `endtypes` ends
+        """
+        self._ends = frozenset(ends)
+        self._endtypes = frozenset(endtypes)
+        self._level = level
+        if startdeltas is None:
+            startdeltas = {'{': _BRACE, '[': _BRACKET, '(': _PARANT}
+        self._startdeltas = startdeltas
+        self._endlevel = endlevel
+
+    def collect(self, tokenizer, starttoken=None):
+        """Return list of tokens of `tokenizer` up to and including the end
+        token or EOF, starting with `starttoken` if given."""
+        level = self._level
+        resulttokens = []
+        if starttoken:
+            resulttokens.append(starttoken)
+            level += self._startdeltas.get(starttoken[1], 0)
+
+        if tokenizer:
+            append = resulttokens.append
+            deltas, function = self._deltas, self._function
+            pseudotypes = self._pseudotypes
+            ends, endtypes, endlevel = self._ends, self._endtypes, self._endlevel
+            for token in tokenizer:
+                typ, val = token[0], token[1]
+                if 'EOF' == typ:
+                    append(token)
+                    break
+
+                delta = deltas.get(val)
+                if delta is not None:
+                    level += delta
+                elif function == typ or (typ in pseudotypes and
+                                         val.endswith('(')):
+                    # function( or pseudo-class(
+                    level += _PARANT
+
+                append(token)
+
+                if level == 0:
+                    if val in ends or typ in endtypes:
+                        break
+                elif level == endlevel and typ in endtypes:
+                    break
+        return resulttokens
+
+    def find(self, tokens, start=0):
+        """Return index after the end token or EOF in list `tokens` starting
+        at index `start`, so ``tokens[start:index]`` are the tokens
+        :meth:`collect` returns for ``iter(tokens[start:])``."""
+        level = self._level
+        deltas, function = self._deltas, self._function
+        pseudotypes = self._pseudotypes
+        ends, endtypes, endlevel = self._ends, self._endtypes, self._endlevel
+        for index in range(start, len(tokens)):
+            typ, val = tokens[index][0], tokens[index][1]
+            if 'EOF' == typ:
+                return index + 1
+
+            delta = deltas.get(val)
+            if delta is not None:
+                level += delta
+            elif function == typ or (typ in pseudotypes and
+                                     val.endswith('(')):
+                level += _PARANT
+
+            if level == 0:
+                if val in ends or typ in endtypes:
+                    return index + 1
+            elif level == endlevel and typ in endtypes:
+                return index + 1
+        return len(tokens)
+
+
+# scanners for each end condition of _tokensupto2, default looks for ending
+# "}" and ";"
+_scanners = {
+    None: _Scanner(';}'),
+    'blockstartonly': _Scanner('{', level=-_BRACE),  # set to 0 with first {
+    'blockendonly': _Scanner('}', level=_BRACE),
+    'mediaendonly': _Scanner('}', level=_BRACE),  # rules } and mediarules }
+    # end of mediaquery which may be ; or STRING
+    'importmediaqueryendonly': _Scanner(';', endtypes=('STRING',)),
+    # end of mediaquery which may be { or STRING (also before first {)
+    'mediaqueryendonly': _Scanner('{', endtypes=('STRING',), level=-_BRACE,
+                                  endlevel=-_BRACE),
+    'semicolon': _Scanner(';'),
+    'propertynameendonly': _Scanner(':;'),  # : and ; in case of an error
+    'propertyvalueendonly': _Scanner(';!'),  # ; or !important
+    'propertypriorityendonly': _Scanner(';'),
+    # a starting [ is counted twice
+    'selectorattendonly': _Scanner(']', startdeltas={'{': _BRACE,
+                                                     '[': 2 * _BRACKET,
+                                                     '(': _PARANT}),
+    'funcendonly': _Scanner(')', level=_PARANT),
+    'listseponly': _Scanner(','),
+}
+
+
 class _BaseClass(object):
     """
     Base class for Base, Base2 and _NewBase.
@@ -45,6 +179,41 @@ class _BaseClass(object):
     """
     _log = errorhandler.ErrorHandler()
     _prods = tokenize2.CSSProductions
+    _scanners = _scanners
+
+    # source text this object was parsed from while it is not changed
+    _source = None
+    # (key, text) of the last serialization while this object is not changed
+    _cssTextCache = None
+
+    def _parentNode(self):
+        "Return the object containing this one or None"
+        return None
+
+    def _lineage(self):
+        "Yield this object and all objects containing it"
+        node = self
+        while node is not None:
+            yield node
+            node = node._parentNode()
+
+    def _changed(self):
+        """Called after this object has been changed. Drops the source text
+        and the kept serialization of this object and all objects containing
+        it (up to the style sheet) as they do not reflect the change."""
+        node = self
+        while node is not None:
+            if node._source is not None:
+                node._source = None
+            if node._cssTextCache is not None:
+                node._cssTextCache = None
+            node = node._parentNode()
+
+    def __getstate__(self):
+        # a kept serialization refers to the serializer which is not pickled
+        state = self.__dict__.copy()
+        state.pop('_cssTextCache', None)
+        return state
 
     def _checkReadonly(self):
         "Raise xml.dom.NoModificationAllowedErr if rule/... is readonly"
@@ -83,6 +252,7 @@ class _NewBase(_BaseClass):
         """Set value of ``seq`` which is readonly."""
         newseq._readonly = True
         self._seq = newseq
+        self._changed()
 
     def _clearSeq(self):
         self._seq.clear()
@@ -122,6 +292,7 @@ class _NewListBase(_NewBase):
 
     def __delitem__(self, index):
         del self._seq[index]
+        self._changed()
 
     def __getitem__(self, index):
         return self._seq[index].value
@@ -301,91 +472,38 @@ class Base(_BaseClass):
         end is defined by parameters, might be ; } ) or other
 
         default looks for ending "}" and ";"
+
+        Uses the precompiled scanner in ``_scanners`` for the given end,
+        frequent callers use these directly.
         """
-        ends = ';}'
-        endtypes = ()
-        brace = bracket = parant = 0  # {}, [], ()
-
-        if blockstartonly:  # {
-            ends = '{'
-            brace = - 1  # set to 0 with first {
-        elif blockendonly:  # }
-            ends = '}'
-            brace = 1
-        elif mediaendonly:  # }
-            ends = '}'
-            brace = 1  # rules } and mediarules }
+        if blockstartonly:
+            scanner = 'blockstartonly'
+        elif blockendonly:
+            scanner = 'blockendonly'
+        elif mediaendonly:
+            scanner = 'mediaendonly'
         elif importmediaqueryendonly:
-            # end of mediaquery which may be ; or STRING
-            ends = ';'
-            endtypes = ('STRING',)
+            scanner = 'importmediaqueryendonly'
         elif mediaqueryendonly:
-            # end of mediaquery which may be { or STRING
-            # special case, see below
-            ends = '{'
-            brace = - 1  # set to 0 with first {
-            endtypes = ('STRING',)
+            scanner = 'mediaqueryendonly'
         elif semicolon:
-            ends = ';'
-        elif propertynameendonly:  # : and ; in case of an error
-            ends = ':;'
-        elif propertyvalueendonly:  # ; or !important
-            ends = ';!'
-        elif propertypriorityendonly:  # ;
-            ends = ';'
-        elif selectorattendonly:  # ]
-            ends = ']'
-            if starttoken and self._tokenvalue(starttoken) == '[':
-                bracket = 1
-        elif funcendonly:  # )
-            ends = ')'
-            parant = 1
-        elif listseponly:  # ,
-            ends = ','
-
-        resulttokens = []
-        if starttoken:
-            resulttokens.append(starttoken)
-            val = starttoken[1]
-            if '[' == val:
-                bracket += 1
-            elif '{' == val:
-                brace += 1
-            elif '(' == val:
-                parant += 1
-
-        if tokenizer:
-            for token in tokenizer:
-                typ, val, line, col = token
-                if 'EOF' == typ:
-                    resulttokens.append(token)
-                    break
+            scanner = 'semicolon'
+        elif propertynameendonly:
+            scanner = 'propertynameendonly'
+        elif propertyvalueendonly:
+            scanner = 'propertyvalueendonly'
+        elif propertypriorityendonly:
+            scanner = 'propertypriorityendonly'
+        elif selectorattendonly:
+            scanner = 'selectorattendonly'
+        elif funcendonly:
+            scanner = 'funcendonly'
+        elif listseponly:
+            scanner = 'listseponly'
+        else:
+            scanner = None
 
-                if '{' == val:
-                    brace += 1
-                elif '}' == val:
-                    brace -= 1
-                elif '[' == val:
-                    bracket += 1
-                elif ']' == val:
-                    bracket -= 1
-                # function( or single (
-                elif '(' == val or \
-                     Base._prods.FUNCTION == typ or \
-                     (typ in ('pseudo-class', 'pseudo-element') and val.endswith('(')):
-                    parant += 1
-                elif ')' == val:
-                    parant -= 1
-
-                resulttokens.append(token)
-
-                if (brace == bracket == parant == 0) and (
-                        val in ends or typ in endtypes):
-                    break
-                elif mediaqueryendonly and brace == - 1 and (
-                        bracket == parant == 0) and typ in endtypes:
-                    # mediaqueryendonly with STRING
-                    break
+        resulttokens = self._scanners[scanner].collect(tokenizer, starttoken)
         if separateEnd:
             # TODO: use this method as generator, then this makes sense
             if resulttokens:
@@ -485,7 +603,8 @@ class Base(_BaseClass):
                     expected = p(expected, seq, token, tokenizer)
                 else:
                     wellformed = False
-                    self._log.error('Unexpected token (%s, %s, %s, %s)' % token)
+                    self._log.error('Unexpected token (%s, %s, %s, %s)' %
+                                    tokenize2.resolve(token))
         return wellformed, expected
 
 
@@ -560,6 +679,7 @@ class Seq(object):
 
     is normally readonly, only writable during parsing
     """
+    __slots__ = ('_seq', '_readonly')
 
     def __init__(self, readonly=True):
         """
@@ -605,6 +725,12 @@ class Seq(object):
     def __len__(self):
         return len(self._seq)
 
+    def __getstate__(self):
+        return self._seq, self._readonly
+
+    def __setstate__(self, state):
+        self._seq, self._readonly = state
+
     def append(self, val, typ=None, line=None, col=None):
         "If not readonly add new Item()"
         if self._readonly:
@@ -669,8 +795,14 @@ class Item(object):
         the actual value which may be a string, number etc or an instance
         of e.g. a CSSComment
     *line*
-        **NOT IMPLEMENTED YET, may contain the line in the source later**
+        line in the source if available
+    *col*
+        column in the source if available
+
+    line and col may be given as (offset, LineIndex) of a token of a
+    tokenizer with ``lazyPositions`` and are computed on first access only.
     """
+    __slots__ = ('__value', '__type', '__line', '__col')
 
     def __init__(self, value, type, line=None, col=None):
         self.__value = value
@@ -678,15 +810,27 @@ class Item(object):
         self.__line = line
         self.__col = col
 
+    def __reduce__(self):
+        # positions are pickled unresolved, a LineIndex only once per sheet
+        return self.__class__, (self.__value, self.__type,
+                                self.__line, self.__col)
+
+    def __position(self):
+        "Return (line, col), resolved only once"
+        if isinstance(self.__col, tokenize2.LineIndex):
+            self.__line, self.__col = self.__col.position(self.__line)
+        return self.__line, self.__col
+
     type = property(lambda self: self.__type)
     value = property(lambda self: self.__value)
-    line = property(lambda self: self.__line)
-    col = property(lambda self: self.__col)
+    line = property(lambda self: self.__position()[0])
+    col = property(lambda self: self.__position()[1])
 
     def __repr__(self):
+        line, col = self.__position()
         return "%s.%s(value=%r, type=%r, line=%r, col=%r)" % (
             self.__module__, self.__class__.__name__,
-            self.__value, self.__type, self.__line, self.__col)
+            self.__value, self.__type, line, col)
 
 
 class ListSeq(object):
@@ -757,6 +901,8 @@ class _Namespaces(object):
         "no initial values are set, only the relevant sheet is"
         self.parentStyleSheet = parentStyleSheet
         self._log = log
+        # (version of namespaces of parentStyleSheet, effective namespaces)
+        self._effective = None
 
     def __repr__(self):
         return "%r" % self.namespaces
@@ -823,12 +969,16 @@ class _Namespaces(object):
         A property holding only effective @namespace rules in
         self.parentStyleSheets.
         """
-        namespaces = {}
-        for rule in filter(lambda r: r.type == r.NAMESPACE_RULE,
-                           reversed(self.parentStyleSheet.cssRules)):
-            if rule.namespaceURI not in as_list(namespaces.values()):
-                namespaces[rule.prefix] = rule.namespaceURI
-        return namespaces
+        version = self.parentStyleSheet._namespacesVersion
+        if self._effective is None or self._effective[0] != version:
+            # collected again only after namespaces of the sheet changed
+            namespaces = {}
+            for rule in filter(lambda r: r.type == r.NAMESPACE_RULE,
+                               reversed(self.parentStyleSheet.cssRules)):
+                if rule.namespaceURI not in as_list(namespaces.values()):
+                    namespaces[rule.prefix] = rule.namespaceURI
+            self._effective = (version, namespaces)
+        return dict(self._effective[1])
 
     def get(self, prefix, default):
         return self.namespaces.get(prefix, default)
@@ -1006,6 +1156,10 @@ class LazyRegex(object):
         self.groups = self.matcher.groups
         self.groupindex = self.matcher.groupindex
 
+    def __reduce__(self):
+        # compiled again on first use after unpickling only
+        return self.__class__, (self.pattern, self.flags)
+
     def __call__(self, string, pos=None, endpos=None):
         """Shortcut for self.match(string)."""
         return self.match(string, pos, endpos)
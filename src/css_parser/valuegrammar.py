@@ -0,0 +1,379 @@
+"""Structural validation of property values.
+
+A :class:`ValueGrammar` describes valid values of a property in a subset of
+the CSS value definition syntax. Other than the regular expressions of
+:class:`~css_parser.profiles.Profiles` it is matched against the component
+values (tokens or complete functions) of a value and not the value text.
+Matching does not backtrack, so the time needed is linear in the length of
+the value.
+
+Syntax of a grammar:
+
+``keyword``
+    an identifier matching an IDENT case-insensitively, e.g. ``inherit``
+``,`` and ``/``
+    the literal delimiter
+``<name>``
+    a component value matching macro ``{name}`` of the profiles, e.g.
+    ``<length>`` or ``<color>`` or a grammar given in `macros`
+``a b``
+    ``a`` followed by ``b``
+``a | b``
+    either ``a`` or ``b``
+``[ a ]``
+    groups ``a``
+``a?``, ``a*``, ``a+``, ``a{m}``, ``a{m,n}``, ``a{m,}``
+    ``a`` optionally, any number of times, at least once, exactly `m`
+    times, `m` to `n` times or at least `m` times
+``a#``
+    one or more ``a`` separated by commas
+"""
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import re
+
+from css_parser import util
+from css_parser.parsecontext import current
+
+__all__ = ['ValueGrammar']
+__docformat__ = 'restructuredtext'
+__version__ = '$Id$'
+
+
+_syntax = re.compile(r'''\s*(?:
+    (?P<open>\[) | (?P<close>\]) | (?P<or>\|) |
+    (?P<multiplier>[?*+\#]|\{\d+(?:,\d*)?\}) |
+    <(?P<macro>[a-z][a-z0-9-]*)> |
+    (?P<delim>[,/]) |
+    (?P<keyword>-?[a-z][a-z0-9-]*)
+    )''', re.I | re.X)
+
+# instructions of a compiled grammar
+_TEST, _SPLIT, _JUMP, _MATCH = 'test', 'split', 'jump', 'match'
+
+
+class _Keyword(object):
+    "Test of a component for a keyword"
+    __slots__ = ('keyword',)
+
+    def __init__(self, keyword):
+        self.keyword = keyword.lower()
+
+    def __call__(self, component):
+        return component[0] == 'IDENT' and component[1].lower() == self.keyword
+
+
+class _Delim(object):
+    "Test of a component for a delimiter"
+    __slots__ = ('delim',)
+
+    def __init__(self, delim):
+        self.delim = delim
+
+    def __call__(self, component):
+        return component[0] == 'CHAR' and component[1] == self.delim
+
+
+class _Macro(object):
+    "Test of a component for a regular expression macro"
+    __slots__ = ('regex',)
+
+    def __init__(self, value):
+        self.regex = util.LazyRegex('^(?:%s)$' % value, re.I)
+
+    def __call__(self, component):
+        return self.regex.match(component[1]) is not None
+
+
+def components(value):
+    """Return list of ``(type, text)`` of component values of `value`.
+    A function with all its arguments is a single component of type
+    ``FUNCTION``, whitespace and comments are not components."""
+    result = []
+    depth = 0
+    # the tokenizer of the value being parsed
+    for span in current().tokenizer.spans(value):
+        type_ = span.type
+        if depth:
+            if type_ == 'FUNCTION' or (type_ == 'CHAR' and
+                                       value[span.start] == '('):
+                depth += 1
+            elif type_ == 'CHAR' and value[span.start] == ')':
+                depth -= 1
+            end = span.end
+        elif type_ == 'FUNCTION':
+            depth, start, end = 1, span.start, span.end
+        elif type_ != 'S' and type_ != 'COMMENT':
+            result.append((type_, value[span.start:span.end]))
+            continue
+        else:
+            continue
+
+        if not depth:
+            result.append(('FUNCTION', value[start:end]))
+
+    if depth:
+        # unclosed function
+        result.append(('FUNCTION', value[start:end]))
+    return result
+
+
+class ValueGrammar(object):
+    """Grammar of valid values of a property, may be used instead of a
+    regular expression in the properties of a profile, see
+    :meth:`~css_parser.profiles.Profiles.addProfile`.
+
+    Example::
+
+        ValueGrammar('none | <shadow>#', {'shadow': 'inset? <length>{2,4}'})
+    """
+    def __init__(self, grammar, macros=None):
+        """
+        :param grammar:
+            the grammar
+        :param macros:
+            ``{name: grammar}`` of grammars which may be used as ``<name>``
+            in `grammar`, other ``<name>`` are the macros of the profiles
+        :exceptions:
+            - :exc:`ValueError`:
+              If `grammar` is not valid.
+        """
+        self.grammar = grammar
+        self.macros = macros or {}
+        # check syntax now
+        self._parse(None)
+
+    def __repr__(self):
+        return "css_parser.valuegrammar.%s(%r, %r)" % (
+            self.__class__.__name__, self.grammar, self.macros)
+
+    def _parse(self, macros):
+        """Return tree of grammar using regular expression `macros`, if
+        ``None`` the syntax is checked only."""
+        return _Parser(self.macros, macros).parse(self.grammar)
+
+    def compile(self, macros):
+        """Return a function which checks if a value (string) is valid using
+        regular expression `macros` for ``<name>`` not given in the grammar's
+        own macros."""
+        return _Matcher(self._parse(macros))
+
+
+class _Parser(object):
+    "Parser of the syntax of a ValueGrammar"
+    def __init__(self, grammars, macros):
+        self._grammars = grammars
+        self._macros = macros
+        self._used = []
+        # tests of regular expression macros: {name: test}
+        self._tests = {}
+
+    def parse(self, grammar):
+        self._tokens = [(m.lastgroup, m.group(m.lastgroup))
+                        for m in self._scan(grammar)]
+        self._pos = 0
+        tree = self._alternatives()
+        if self._pos < len(self._tokens):
+            raise ValueError('Unexpected %r in grammar %r' % (
+                self._tokens[self._pos][1], grammar))
+        return tree
+
+    def _scan(self, grammar):
+        pos, end = 0, len(grammar.rstrip())
+        while pos < end:
+            match = _syntax.match(grammar, pos)
+            if not match:
+                raise ValueError('Invalid grammar %r at %r' % (
+                    grammar, grammar[pos:]))
+            yield match
+            pos = match.end()
+
+    def _peek(self):
+        if self._pos < len(self._tokens):
+            return self._tokens[self._pos]
+        return None, None
+
+    def _alternatives(self):
+        choices = [self._sequence()]
+        while self._peek()[0] == 'or':
+            self._pos += 1
+            choices.append(self._sequence())
+        if len(choices) == 1:
+            return choices[0]
+        return ('alt', choices)
+
+    def _sequence(self):
+        items = []
+        while self._peek()[0] in ('open', 'macro', 'delim', 'keyword'):
+            items.append(self._item())
+        if not items:
+            raise ValueError('Empty alternative in grammar')
+        if len(items) == 1:
+            return items[0]
+        return ('seq', items)
+
+    def _item(self):
+        kind, value = self._peek()
+        self._pos += 1
+        if kind == 'open':
+            node = self._alternatives()
+            if self._peek()[0] != 'close':
+                raise ValueError('Missing "]" in grammar')
+            self._pos += 1
+        elif kind == 'macro':
+            node = self._macro(value)
+        elif kind == 'delim':
+            node = ('test', _Delim(value))
+        else:
+            node = ('test', _Keyword(value))
+
+        while self._peek()[0] == 'multiplier':
+            node = self._multiply(node, self._peek()[1])
+            self._pos += 1
+        return node
+
+    def _macro(self, name):
+        if name in self._grammars:
+            if name in self._used:
+                raise ValueError('Recursive macro %r in grammar' % name)
+            self._used.append(name)
+            tokens, pos = self._tokens, self._pos
+            node = self.parse(self._grammars[name])
+            self._tokens, self._pos = tokens, pos
+            self._used.pop()
+            return node
+        elif self._macros is None:
+            return ('test', None)
+        elif name in self._macros:
+            if name not in self._tests:
+                self._tests[name] = _Macro(_expand(self._macros[name],
+                                                   self._macros))
+            return ('test', self._tests[name])
+        else:
+            raise ValueError('Unknown macro <%s> in grammar' % name)
+
+    def _multiply(self, node, multiplier):
+        if multiplier == '?':
+            return ('rep', node, 0, 1)
+        elif multiplier == '*':
+            return ('rep', node, 0, None)
+        elif multiplier == '+':
+            return ('rep', node, 1, None)
+        elif multiplier == '#':
+            return ('seq', [node, ('rep', ('seq', [('test', _Delim(',')),
+                                                   node]), 0, None)])
+        else:
+            counts = multiplier[1:-1].split(',')
+            low = int(counts[0])
+            if len(counts) == 1:
+                high = low
+            elif counts[1]:
+                high = int(counts[1])
+            else:
+                high = None
+            return ('rep', node, low, high)
+
+
+def _expand(value, macros):
+    "Return regular expression `value` with all {macro} expanded"
+    def macro_value(m):
+        return '(?:%s)' % macros[m.group(1)]
+
+    while re.search(r'{[a-z][a-z0-9-]*}', value):
+        value = re.sub(r'{([a-z][a-z0-9-]*)}', macro_value, value)
+    return value
+
+
+class _Matcher(object):
+    """Compiled ValueGrammar, called with a value returns if it is valid.
+
+    The grammar is compiled into a program of test, split, jump and match
+    instructions which is run for all possible paths at once, each
+    component is checked by every test of the current paths once only.
+    """
+    __slots__ = ('_program', '_closures')
+
+    def __init__(self, tree):
+        program = []
+        self._emit(tree, program)
+        program.append((_MATCH,))
+        self._program = program
+        # instructions reachable from each instruction without a test
+        self._closures = [self._closure(pc) for pc in range(len(program))]
+
+    def _emit(self, node, program):
+        kind = node[0]
+        if kind == 'test':
+            program.append((_TEST, node[1]))
+        elif kind == 'seq':
+            for item in node[1]:
+                self._emit(item, program)
+        elif kind == 'alt':
+            jumps = []
+            for choice in node[1][:-1]:
+                split = len(program)
+                program.append(None)
+                self._emit(choice, program)
+                jumps.append(len(program))
+                program.append(None)
+                program[split] = (_SPLIT, split + 1, len(program))
+            self._emit(node[1][-1], program)
+            for jump in jumps:
+                program[jump] = (_JUMP, len(program))
+        else:
+            item, low, high = node[1:]
+            for i in range(low):
+                self._emit(item, program)
+            if high is None:
+                # loop
+                split = len(program)
+                program.append(None)
+                self._emit(item, program)
+                program.append((_JUMP, split))
+                program[split] = (_SPLIT, split + 1, len(program))
+            else:
+                splits = []
+                for i in range(high - low):
+                    splits.append(len(program))
+                    program.append(None)
+                    self._emit(item, program)
+                for split in splits:
+                    program[split] = (_SPLIT, split + 1, len(program))
+
+    def _closure(self, pc):
+        "Return tuple of test and match instructions reachable from `pc`"
+        program = self._program
+        found, todo, seen = [], [pc], set()
+        while todo:
+            pc = todo.pop()
+            if pc in seen:
+                continue
+            seen.add(pc)
+            op = program[pc]
+            if op[0] == _SPLIT:
+                todo.extend((op[2], op[1]))
+            elif op[0] == _JUMP:
+                todo.append(op[1])
+            else:
+                found.append(pc)
+        return tuple(sorted(found))
+
+    def ensure(self):
+        "Compile all regular expressions of the grammar now."
+        for op in self._program:
+            if op[0] == _TEST and isinstance(op[1], _Macro):
+                op[1].regex.ensure()
+
+    def __call__(self, value):
+        program, closures = self._program, self._closures
+        current = closures[0]
+        for component in components(value):
+            following = set()
+            for pc in current:
+                op = program[pc]
+                if op[0] == _TEST and op[1](component):
+                    following.update(closures[pc + 1])
+            if not following:
+                return False
+            current = following
+        return any(program[pc][0] == _MATCH for pc in current)